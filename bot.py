@@ -1,83 +1,208 @@
+import asyncio
+import datetime
+import hashlib
+import json
 import logging
 import os
+import time
 
 import discord
 from discord.ext import commands
 from pymongo import UpdateOne
 
 import config
-from database import divisions
+from database import divisions, user_cache
 from database.connection import establish_db_connection
-from database.models import User
+from database.models import SyncState, User
 from error_handling import _custom_view_on_error, on_tree_error
 from ui.views import load_buttons
 from utils.audit import audit_logger
-from utils.roles import get_rank_from_roles
+from utils.deadline import deadline_tracer
+from utils.logs import bound_to_interaction
+from utils.member_sync import member_fields, member_sync
+from utils.metrics import metrics
+from utils.outbound import outbound
 
 logger = logging.getLogger(__name__)
 
+SYNC_STATE_NAME = "guild_members"
+COMMANDS_STATE_NAME = "command_tree"
+
 discord.ui.View.on_error = _custom_view_on_error
+# Записи логов из обработчиков view и модалок получают поля взаимодействия
+for _view_cls in (discord.ui.View, discord.ui.LayoutView, discord.ui.Modal):
+    _view_cls.interaction_check = bound_to_interaction(_view_cls.interaction_check)
 
 
 class Bot(commands.Bot):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
+        self._users_synced = False
+        self._users_syncing = False
 
     async def _sync_users(self):
-        inited_ids = set(await User.distinct("discord_id", {"pre_inited": True}))
+        """
+        Полная синхронизация участников гильдии с БД - один раз за процесс.
+        Если есть watermark прошлой синхронизации, проверяются только участники,
+        вступившие после нее: остальные уже были синхронизированы раньше.
+        Дальнейшие изменения приходят через on_member_join/on_member_update.
+        Неудачная синхронизация повторяется при следующем on_ready.
+        """
+        if self._users_synced or self._users_syncing:
+            return
+        self._users_syncing = True
+        try:
+            await self._run_user_sync()
+            self._users_synced = True
+        finally:
+            self._users_syncing = False
 
+    async def _run_user_sync(self):
+        started_at = discord.utils.utcnow()
         guild = self.get_guild(config.GUILD_ID)
 
+        state = await SyncState.find_one(SyncState.name == SYNC_STATE_NAME)
+        if state is None:
+            state = SyncState(name=SYNC_STATE_NAME)
+
+        members = guild.members
+        inited_filter = {"pre_inited": True}
+        if state.synced_at is not None:
+            watermark = state.synced_at.replace(tzinfo=datetime.timezone.utc)
+            members = [
+                m for m in members if m.joined_at is None or m.joined_at > watermark
+            ]
+            inited_filter["discord_id"] = {"$in": [m.id for m in members]}
+
+        inited_ids = set(await User.distinct("discord_id", inited_filter))
+
         operations = []
+        updated = {}
 
-        for member in guild.members:
+        for member in members:
             if member.id in inited_ids:
                 continue
 
-            div, pos = divisions.get_user_data(member)
-            rank = get_rank_from_roles(member.roles)
-
-            op = UpdateOne(
-                {"discord_id": member.id},
-                {
-                    "$set": {
-                        "division": div.division_id if div else None,
-                        "position": pos.name if pos else None,
-                        "rank": rank,
-                        "pre_inited": True,
-                    },
-                },
-                upsert=True,
-            )
+            fields = member_fields(member)
+            fields["pre_inited"] = True
+
+            op = UpdateOne({"discord_id": member.id}, {"$set": fields}, upsert=True)
             operations.append(op)
+            updated[member.id] = fields
 
         if operations:
             await User.get_pymongo_collection().bulk_write(operations, ordered=False)
+            for discord_id, fields in updated.items():
+                user_cache.update(discord_id, fields)
             logger.info(f"Synchronized {len(operations)} users from guild members")
 
+        state.synced_at = started_at
+        await state.save()
+
     async def on_ready(self):
         logger.info(f"Logged in as {self.user} (ID: {self.user.id})")
         logger.info("------")
         await self._sync_users()
 
+    async def on_interaction(self, interaction: discord.Interaction):
+        deadline_tracer.track(interaction)
+
+    async def on_app_command_completion(
+        self, interaction: discord.Interaction, command
+    ):
+        metrics.observe_command(interaction, command)
+
+    async def on_member_join(self, member: discord.Member):
+        if member.guild.id == config.GUILD_ID:
+            member_sync.member_joined(member)
+
+    async def on_member_update(self, before: discord.Member, after: discord.Member):
+        if after.guild.id == config.GUILD_ID:
+            member_sync.member_updated(before, after)
+
     async def _load_cogs(self):
-        for file in os.listdir("./cogs"):
-            if file.endswith(".py"):
-                await self.load_extension(f"cogs.{file[:-3]}")
-                logger.info(f"Loaded cog {file[:-3]}")
+        names = [file[:-3] for file in os.listdir("./cogs") if file.endswith(".py")]
+        await asyncio.gather(*(self.load_extension(f"cogs.{name}") for name in names))
+        logger.info(f"Loaded cogs: {', '.join(sorted(names))}")
+
+    async def _sync_commands(self) -> bool:
+        """
+        Синхронизировать команды с гильдией, только если дерево изменилось.
+
+        Команды регистрируются на гильдию config.GUILD_ID. Хэш дерева
+        хранится в SyncState: если он совпадает с прошлым запуском, обращения
+        к Discord не нужны.
+
+        Returns:
+            True, если синхронизация выполнялась
+        """
+        guild = discord.Object(id=config.GUILD_ID)
+        self.tree.copy_global_to(guild=guild)
+        self.tree.clear_commands(guild=None)
+
+        payload = [
+            command.to_dict(self.tree)
+            for command in self.tree.get_commands(guild=guild)
+        ]
+        payload.sort(key=lambda command: (command["type"], command["name"]))
+        digest = hashlib.sha256(
+            json.dumps(payload, sort_keys=True, ensure_ascii=False).encode()
+        ).hexdigest()
+
+        state = await SyncState.find_one(SyncState.name == COMMANDS_STATE_NAME)
+        if state is not None and state.digest == digest:
+            return False
+        if state is None:
+            state = SyncState(name=COMMANDS_STATE_NAME)
+
+        await self.tree.sync(guild=guild)
+        # Глобальные команды прошлых версий иначе дублировали бы гильдейские
+        await self.tree.sync()
+
+        state.digest = digest
+        state.synced_at = datetime.datetime.now()
+        await state.save()
+        return True
 
     async def setup_hook(self):
+        timings = {}
+        started = time.perf_counter()
+
+        def phase(name: str):
+            nonlocal started
+            now = time.perf_counter()
+            timings[name] = now - started
+            started = now
+
         await establish_db_connection()
+        phase("db")
         await divisions.load()
+        phase("divisions")
         audit_logger.set_bot(self)
+        outbound.start()
 
         load_buttons(self)
         await self._load_cogs()
+        phase("cogs")
 
         self.tree.on_error = on_tree_error
-
-        await self.tree.sync()
-        logger.info("Slash commands tree synced")
+        self.tree.interaction_check = bound_to_interaction(self.tree.interaction_check)
+        metrics.instrument_tree(self.tree)
+        metrics.attach_bot(self)
+
+        synced = await self._sync_commands()
+        phase("tree_sync")
+        logger.info(
+            "Slash commands tree synced"
+            if synced
+            else "Slash commands tree unchanged, sync skipped"
+        )
+        logger.info(
+            "Startup timings: "
+            + ", ".join(
+                f"{name} {elapsed * 1000:.0f}ms" for name, elapsed in timings.items()
+            )
+        )
 
     async def getch_user(self, discord_id: int):
         if user := self.get_user(discord_id):
@@ -1,67 +1,135 @@
+import asyncio
+import logging
+
 import discord
 from discord.ext import commands
 
 import config
 from bot import Bot
-from database import divisions
-from database.counters import get_next_id
-from database.models import DismissalRequest, DismissalType, User
-from ui.views.dismissal import DismissalManagementView
+from database import divisions, user_cache
+from database.counters import get_next_ids
+from database.models import DismissalRequest, DismissalType
+from ui.views.dismissal import DismissalGroupView, DismissalManagementView
+from utils.outbound import Priority, outbound
 
+logger = logging.getLogger(__name__)
 
-class AutoDismissal(commands.Cog):
-    def __init__(self, bot: Bot):
-        self.bot = bot
+BATCH_WINDOW = 3.0  # секунд, за которые копятся уходы с сервера
+REQUESTS_PER_MESSAGE = 5  # по строке кнопок на рапорт, строк в сообщении не больше 5
 
-    @commands.Cog.listener()
-    async def on_member_remove(self, member: discord.Member):
-        user_db = await User.find_one(User.discord_id == member.id)
 
-        if not user_db or user_db.rank is None:
-            return
+def _mention_roles(division_id: int | None) -> list[str]:
+    user_division = divisions.get_division(division_id)
+    if user_division and user_division.positions:
+        division = user_division
+    else:
+        division = divisions.get_division_by_abbreviation("ВК")
 
-        new_id = await get_next_id("dismissal_requests")
+    positions = division.positions if division else []
+    return [
+        f"<@&{pos.role_id}>"
+        for pos in positions
+        if pos.privilege.value >= 2 and pos.role_id
+    ]
 
-        request = DismissalRequest(
-            id=new_id,
-            user_id=member.id,
-            type=DismissalType.AUTO,
-            full_name=user_db.full_name or member.display_name,
-            static=user_db.static or 0,
-            rank_index=user_db.rank,
-            division_id=user_db.division,
-            position=user_db.position,
-            status="PENDING"
-        )
 
-        await request.create()
+class AutoDismissal(commands.Cog):
+    """
+    Автоматические рапорты на увольнение при выходе с сервера.
 
-        channel = self.bot.get_channel(config.CHANNELS["dismissal"])
+    Уходы копятся BATCH_WINDOW секунд и обрабатываются пакетом: один запрос
+    пользователей, один блок ID, один insert_many и сообщения по
+    REQUESTS_PER_MESSAGE рапортов. Нижнее сообщение обновляется один раз
+    на пакет.
+    """
+
+    def __init__(self, bot: Bot):
+        self.bot = bot
+        self._pending: dict[int, str] = {}  # discord_id -> отображаемое имя
+        self._task: asyncio.Task | None = None
 
-        embed = await request.to_embed(self.bot)
+    def cog_unload(self):
+        if self._task:
+            self._task.cancel()
 
-        user_division = divisions.get_division(user_db.division)
-        if user_division and user_division.positions:
-            division = user_division
-        else:
-            division = divisions.get_division_by_abbreviation("ВК")
+    @commands.Cog.listener()
+    async def on_member_remove(self, member: discord.Member):
+        self._pending[member.id] = member.display_name
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def _run(self):
+        while self._pending:
+            await asyncio.sleep(BATCH_WINDOW)
+            pending, self._pending = self._pending, {}
+            try:
+                await self._process(pending)
+            except Exception as e:
+                logger.error(f"Failed to process {len(pending)} departures: {e}")
+
+    async def _process(self, pending: dict[int, str]):
+        users = await user_cache.get_many(list(pending))
+        users = [
+            users[discord_id]
+            for discord_id in pending
+            if discord_id in users and users[discord_id].rank is not None
+        ]
+        if not users:
+            return
 
-        positions = division.positions if division else []
-        mentions = [
-            f"<@&{pos.role_id}>"
-            for pos in positions
-            if pos.privilege.value >= 2 and pos.role_id
+        ids = await get_next_ids("dismissal_requests", len(users))
+        requests = [
+            DismissalRequest(
+                id=request_id,
+                user_id=user_db.discord_id,
+                type=DismissalType.AUTO,
+                full_name=user_db.full_name or pending[user_db.discord_id],
+                static=user_db.static or 0,
+                rank_index=user_db.rank,
+                division_id=user_db.division,
+                position=user_db.position,
+                status="PENDING",
+            )
+            for request_id, user_db in zip(ids, users)
         ]
+        await DismissalRequest.insert_many(requests)
+        logger.info(f"Created {len(requests)} auto dismissal requests")
 
-        await channel.send(
-            content=f"||<@{member.id}>{''.join(mentions)}||",
-            embed=embed,
-            view=DismissalManagementView(request.id),
-        )
+        channel = self.bot.get_channel(config.CHANNELS["dismissal"])
+        for start in range(0, len(requests), REQUESTS_PER_MESSAGE):
+            group = requests[start : start + REQUESTS_PER_MESSAGE]
+            await self._send_group(channel, group)
 
         from cogs.dismissal import update_bottom_message
+
         await update_bottom_message(self.bot)
 
+    async def _send_group(self, channel, requests: list[DismissalRequest]):
+        mentions = []
+        for request in requests:
+            mentions.append(f"<@{request.user_id}>")
+            mentions.extend(
+                role
+                for role in _mention_roles(request.division_id)
+                if role not in mentions
+            )
+        content = f"||{''.join(mentions)}||"
+
+        embeds = [await request.to_embed(self.bot) for request in requests]
+        if len(requests) == 1:
+            view = DismissalManagementView(requests[0].id)
+        else:
+            view = DismissalGroupView([request.id for request in requests])
+
+        try:
+            await outbound.run(
+                f"channel:{channel.id}",
+                lambda: channel.send(content=content, embeds=embeds, view=view),
+                Priority.CHANNEL,
+            )
+        except discord.HTTPException as e:
+            logger.error(f"Failed to post auto dismissal requests: {e}")
+
 
 async def setup(bot: Bot):
-    await bot.add_cog(AutoDismissal(bot))
\ No newline at end of file
+    await bot.add_cog(AutoDismissal(bot))
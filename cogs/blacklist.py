@@ -6,18 +6,21 @@ from discord.ext import commands
 
 import config
 from bot import Bot
+from database import user_cache
 from database.models import Blacklist as BlacklistModel
 from database.models import User
-from utils.notifications import notify_blacklisted, notify_unblacklisted
+from utils import notifications
+from utils.blacklist_sweeper import blacklist_sweeper
+from utils.permissions import get_user_rank
 from utils.user_data import format_game_id, get_initiator
 
 channel_id = config.CHANNELS["blacklist"]
 
 
-def have_permissions(initiator: User, target: User) -> bool:
-    if initiator.rank is None or initiator.rank < config.RankIndex.CAPTAIN:
+def have_permissions(initiator_rank: int | None, target: User) -> bool:
+    if initiator_rank is None or initiator_rank < config.RankIndex.CAPTAIN:
         return False
-    if target.rank is not None and target.rank >= initiator.rank:
+    if target.rank is not None and target.rank >= initiator_rank:
         return False
     return True
 
@@ -25,6 +28,10 @@ def have_permissions(initiator: User, target: User) -> bool:
 class Blacklist(commands.Cog):
     def __init__(self, bot: Bot):
         self.bot = bot
+        blacklist_sweeper.start(bot)
+
+    def cog_unload(self):
+        blacklist_sweeper.stop()
 
     @app_commands.command(
         name="blacklist", description="Добавить военнослужащего в общий черный список"
@@ -46,21 +53,22 @@ class Blacklist(commands.Cog):
         reason: str,
         evidence: str,
     ):
-        db_user = await User.find_one(User.discord_id == user.id)
-        initiator = await get_initiator(interaction)
+        db_user = await user_cache.get(user.id)
         if not db_user:
             await interaction.response.send_message(
                 f"Пользователь {user.mention} не найден в базе данных.", ephemeral=True
             )
             return
 
-        if not have_permissions(initiator, db_user):
+        if not have_permissions(await get_user_rank(interaction), db_user):
             await interaction.response.send_message(
                 "❌ У вас нет прав для добавления этого пользователя в черный список.",
                 ephemeral=True,
             )
             return
 
+        initiator = await get_initiator(interaction)
+
         await interaction.response.send_message(
             f"Гражданин {user.mention} был добавлен в черный список.", ephemeral=True
         )
@@ -76,10 +84,11 @@ class Blacklist(commands.Cog):
 
         db_user.blacklist = blacklist
         await db_user.save()
+        blacklist_sweeper.schedule(user.id, blacklist.ends_at)
 
         # Уведомление в ЛС
         duration = f"{days} дней" if days > 0 else "Бессрочно"
-        await notify_blacklisted(self.bot, user.id, reason, duration)
+        await notifications.notify_blacklisted(self.bot, user.id, reason, duration)
 
         embed = discord.Embed(
             title="📋 Новое дело",
@@ -128,8 +137,7 @@ class Blacklist(commands.Cog):
         user: discord.Member,
         reason: str,
     ):
-        db_user = await User.find_one(User.discord_id == user.id)
-        initiator = await get_initiator(interaction)
+        db_user = await user_cache.get(user.id)
 
         if not db_user:
             await interaction.response.send_message(
@@ -144,13 +152,15 @@ class Blacklist(commands.Cog):
             )
             return
 
-        if not have_permissions(initiator, db_user):
+        if not have_permissions(await get_user_rank(interaction), db_user):
             await interaction.response.send_message(
                 "У вас нет прав для снятия этого пользователя с черного списка.",
                 ephemeral=True,
             )
             return
 
+        initiator = await get_initiator(interaction)
+
         await interaction.response.send_message(
             f"Гражданин {user.mention} был вынесен из черного списка.", ephemeral=True
         )
@@ -160,7 +170,7 @@ class Blacklist(commands.Cog):
         await db_user.save()
 
         # Уведомление в ЛС
-        await notify_unblacklisted(self.bot, user.id)
+        await notifications.notify_unblacklisted(self.bot, user.id)
 
         embed = discord.Embed(
             title="Дело закрыто",
@@ -1,65 +1,220 @@
+import asyncio
 import datetime
+import io
 import logging
 import os
 
 import discord
+from beanie import UpdateResponse
+from beanie.odm.operators.find.logical import Or
+from beanie.odm.operators.update.general import Set
 from discord.ext import commands, tasks
 
 import config
 from bot import Bot
+from database.models import DailyAnnouncement
+from utils.outbound import Priority, outbound
 
 logger = logging.getLogger(__name__)
 
 # 21:00 по МСК
 DAILY_TIME = datetime.time(hour=18, minute=0, tzinfo=datetime.timezone.utc)
 PICS_PATH = "./daily_pics"
+SCHEDULE_RELOAD_INTERVAL = 10  # минут
+SEND_WINDOW = datetime.timedelta(minutes=30)  # допустимое опоздание отправки
+
+
+def _read_file(path: str) -> bytes:
+    with open(path, "rb") as f:
+        return f.read()
 
 
 class DailyAnnounce(commands.Cog):
+    """
+    Ежедневные картинки в каналы.
+
+    Расписание хранится в коллекции daily_announcements (при первом запуске
+    заполняется из ./daily_pics) и перечитывается каждые
+    SCHEDULE_RELOAD_INTERVAL минут; заодно повторяются отправки, которые не
+    удались или были пропущены в пределах SEND_WINDOW. Картинка читается с
+    диска один раз и каждый день отправляется вложением. Отправки в разные
+    каналы идут параллельно через очередь outbound.
+    """
+
     def __init__(self, bot: Bot):
         self.bot = bot
+        self._images: dict[str, bytes] = {}
+        self._times: list[datetime.time] = [DAILY_TIME]
+        self.reload_schedule.start()
         self.daily_task.start()
 
     def cog_unload(self):
+        self.reload_schedule.cancel()
         self.daily_task.cancel()
 
-    @tasks.loop(time=DAILY_TIME)
-    async def daily_task(self):
-        logger.info("Daily task started")
+    async def _seed(self):
+        """Заполнить расписание из ./daily_pics, если оно пустое"""
+        if await DailyAnnouncement.find_all().count():
+            return
         if not os.path.exists(PICS_PATH):
             logger.warning(f"Directory '{PICS_PATH}' does not exist.")
             return
 
-        guild = self.bot.get_guild(config.GUILD_ID)
-        if guild is None:
-            logger.error(f"Guild with ID {config.GUILD_ID} not found.")
-            return
-
-        for pic in os.listdir(PICS_PATH):
+        announcements = []
+        for pic in await asyncio.to_thread(os.listdir, PICS_PATH):
             try:
                 channel_id = int(pic.split(".")[0])
             except ValueError:
                 logger.warning(f"Invalid file name '{pic}', skipping.")
                 continue
+            announcements.append(
+                DailyAnnouncement(
+                    channel_id=channel_id,
+                    image=pic,
+                    hour=DAILY_TIME.hour,
+                    minute=DAILY_TIME.minute,
+                )
+            )
 
-            channel = guild.get_channel(channel_id)
+        if announcements:
+            await DailyAnnouncement.insert_many(announcements)
+            logger.info(f"Seeded {len(announcements)} daily announcements")
 
-            if channel is None:
-                logger.warning(f"Channel with ID {channel_id} not found in guild.")
-                continue
+    async def _load_image(self, name: str) -> bytes | None:
+        if name not in self._images:
+            try:
+                path = os.path.join(PICS_PATH, name)
+                self._images[name] = await asyncio.to_thread(_read_file, path)
+            except OSError as e:
+                logger.warning(f"Failed to read daily picture '{name}': {e}")
+                return None
+        return self._images[name]
+
+    @tasks.loop(minutes=SCHEDULE_RELOAD_INTERVAL)
+    async def reload_schedule(self):
+        announcements = await DailyAnnouncement.find(
+            DailyAnnouncement.enabled == True  # noqa: E712
+        ).to_list()
+        times = sorted({a.send_time for a in announcements}) or [DAILY_TIME]
+        if times != self._times:
+            self._times = times
+            self.daily_task.change_interval(time=times)
+            logger.info(
+                "Daily announcements rescheduled: "
+                + ", ".join(t.strftime("%H:%M") for t in times)
+            )
+
+        # Повтор неудавшихся и пропущенных (например, при перезапуске) отправок;
+        # отметка last_sent_at не даст отправить картинку дважды
+        if self.bot.is_ready():
+            await self._send_due()
+
+    @reload_schedule.before_loop
+    async def before_reload_schedule(self):
+        await self._seed()
 
-            file_path = os.path.join(PICS_PATH, pic)
+    @tasks.loop(time=DAILY_TIME)
+    async def daily_task(self):
+        logger.info("Daily task started")
+        await self._send_due()
 
-            try:
-                await channel.send(
-                    file=discord.File(fp=file_path, filename="daily_announce.png")
-                )
-            except discord.Forbidden:
-                logger.warning(
-                    f"Permission denied to send message in channel ID {channel_id}."
-                )
-            except Exception as e:
-                logger.error(f"Failed to send message in channel ID {channel_id}: {e}")
+    async def _send_due(self):
+        """Отправить картинки, время которых наступило не позже SEND_WINDOW назад"""
+        guild = self.bot.get_guild(config.GUILD_ID)
+        if guild is None:
+            logger.error(f"Guild with ID {config.GUILD_ID} not found.")
+            return
+
+        # Без микросекунд: Mongo хранит время с точностью до миллисекунд,
+        # а отметка отправки потом сравнивается на равенство
+        now = discord.utils.utcnow().replace(tzinfo=None, microsecond=0)
+        announcements = await DailyAnnouncement.find(
+            DailyAnnouncement.enabled == True  # noqa: E712
+        ).to_list()
+
+        jobs = []
+        for announcement in announcements:
+            scheduled = now.replace(
+                hour=announcement.hour,
+                minute=announcement.minute,
+                second=0,
+                microsecond=0,
+            )
+            if scheduled > now:
+                scheduled -= datetime.timedelta(days=1)
+            if now - scheduled <= SEND_WINDOW:
+                jobs.append(self._send(guild, announcement, scheduled, now))
+
+        if not jobs:
+            return
+        results = await asyncio.gather(*jobs)
+        logger.info(f"Daily announcements sent: {sum(results)}/{len(jobs)}")
+
+    async def _send(
+        self,
+        guild: discord.Guild,
+        announcement: DailyAnnouncement,
+        scheduled: datetime.datetime,
+        now: datetime.datetime,
+    ) -> bool:
+        channel = guild.get_channel(announcement.channel_id)
+        if channel is None:
+            logger.warning(
+                f"Channel with ID {announcement.channel_id} not found in guild."
+            )
+            return False
+
+        # Отметка об отправке ставится атомарно - при нескольких срабатываниях
+        # или процессах картинка уйдет в канал один раз
+        claimed = await DailyAnnouncement.find_one(
+            DailyAnnouncement.id == announcement.id,
+            Or(
+                DailyAnnouncement.last_sent_at == None,  # noqa: E711
+                DailyAnnouncement.last_sent_at < scheduled,
+            ),
+        ).update(
+            Set({DailyAnnouncement.last_sent_at: now}),
+            response_type=UpdateResponse.NEW_DOCUMENT,
+        )
+        if not claimed:
+            return False
+
+        data = await self._load_image(claimed.image)
+        if data is None:
+            await self._unclaim(announcement, now)
+            return False
+
+        # Вложение загружается заново каждый раз: ссылки CDN Discord подписаны
+        # и истекают
+        def factory():
+            file = discord.File(io.BytesIO(data), filename="daily_announce.png")
+            return channel.send(file=file)
+
+        try:
+            await outbound.run(f"channel:{channel.id}", factory, Priority.CHANNEL)
+        except discord.Forbidden:
+            logger.warning(
+                f"Permission denied to send message in channel ID {channel.id}."
+            )
+            await self._unclaim(announcement, now)
+            return False
+        except Exception as e:
+            logger.error(f"Failed to send message in channel ID {channel.id}: {e}")
+            await self._unclaim(announcement, now)
+            return False
+
+        return True
+
+    async def _unclaim(self, announcement: DailyAnnouncement, now: datetime.datetime):
+        """
+        Вернуть прежнюю отметку после неудачной отправки, чтобы ее повторил
+        reload_schedule. Отметка возвращается, только если ее не перезаписал
+        другой процесс.
+        """
+        await DailyAnnouncement.find_one(
+            DailyAnnouncement.id == announcement.id,
+            DailyAnnouncement.last_sent_at == now,
+        ).update(Set({DailyAnnouncement.last_sent_at: announcement.last_sent_at}))
 
     @daily_task.before_loop
     async def before_daily_task(self):
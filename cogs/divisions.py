@@ -0,0 +1,42 @@
+import logging
+
+from discord.ext import commands, tasks
+
+from bot import Bot
+from database import divisions
+
+logger = logging.getLogger(__name__)
+
+RELOAD_INTERVAL = 10  # минут
+
+
+class Divisions(commands.Cog):
+    """Перезагрузка подразделений из БД без перезапуска бота"""
+
+    def __init__(self, bot: Bot):
+        self.bot = bot
+        self.reload_task.start()
+
+    def cog_unload(self):
+        self.reload_task.cancel()
+
+    @tasks.loop(minutes=RELOAD_INTERVAL)
+    async def reload_task(self):
+        try:
+            await divisions.load()
+        except Exception as e:
+            logger.error(f"Failed to reload divisions: {e}")
+
+    @reload_task.before_loop
+    async def before_reload(self):
+        await self.bot.wait_until_ready()
+
+    @commands.command(name="reload_divisions")
+    @commands.has_permissions(administrator=True)
+    async def reload_command(self, ctx: commands.Context):
+        await divisions.load()
+        await ctx.reply(f"✅ Загружено подразделений: {len(divisions.divisions)}")
+
+
+async def setup(bot: Bot):
+    await bot.add_cog(Divisions(bot))
@@ -0,0 +1,186 @@
+import logging
+
+import discord
+from beanie.odm.operators.find.logical import And, Or
+from discord import app_commands
+from discord.ext import commands
+
+from bot import Bot
+from config import RankIndex
+from database.models import AuditEvent
+from utils.audit import AuditAction, action_emojis
+from utils.permissions import require_rank
+from utils.user_data import display_rank, format_game_id
+
+logger = logging.getLogger(__name__)
+
+EVENTS_PER_PAGE = 10
+
+
+def _format_event(event: AuditEvent) -> str:
+    try:
+        emoji = action_emojis[AuditAction(event.action)]
+    except ValueError:
+        emoji = "•"
+
+    target = f"<@{event.target_id}>" if event.target_id else (event.target or "—")
+    line = (
+        f"{discord.utils.format_dt(event.created_at, 'f')} {emoji} "
+        f"**{event.action}** ❯ {target}"
+    )
+    if event.full_name:
+        line += f" {event.full_name}"
+    if event.static:
+        line += f" `{format_game_id(event.static)}`"
+    line += f" ❯ <@{event.initiator_id}>"
+    if event.message_url:
+        line += f" [лог]({event.message_url})"
+    return line
+
+
+class HistoryBrowser(discord.ui.LayoutView):
+    """Постраничный просмотр журнала аудита по ключу (created_at, _id)"""
+
+    def __init__(self, filters: list, title: str, total: int):
+        super().__init__(timeout=300)
+        self.filters = filters
+        self.title = title
+        self.total = total
+        self.current_page = 0
+        # Начало каждой открытой страницы: (created_at, _id) последней записи
+        # предыдущей страницы
+        self.page_cursors: list[tuple | None] = [None]
+        self.events: list[AuditEvent] = []
+        self.has_next = False
+
+    async def load_page(self):
+        filters = list(self.filters)
+        cursor = self.page_cursors[self.current_page]
+        if cursor:
+            created_at, event_id = cursor
+            filters.append(
+                Or(
+                    AuditEvent.created_at < created_at,
+                    And(AuditEvent.created_at == created_at, AuditEvent.id < event_id),
+                )
+            )
+
+        events = (
+            await AuditEvent.find(*filters)
+            .sort(-AuditEvent.created_at, -AuditEvent.id)
+            .limit(EVENTS_PER_PAGE + 1)
+            .to_list()
+        )
+        self.has_next = len(events) > EVENTS_PER_PAGE
+        self.events = events[:EVENTS_PER_PAGE]
+        self.render_page()
+
+    def render_page(self):
+        self.clear_items()
+
+        container = discord.ui.Container()
+        container.add_item(
+            discord.ui.TextDisplay(f"## 📜 {self.title}: {self.total} записей")
+        )
+        container.add_item(discord.ui.Separator())
+        container.add_item(
+            discord.ui.TextDisplay(
+                "\n".join(_format_event(event) for event in self.events) or "Пусто."
+            )
+        )
+        container.add_item(
+            discord.ui.TextDisplay(f"Страница: `{self.current_page + 1}`")
+        )
+        container.add_item(discord.ui.Separator())
+
+        action_row = discord.ui.ActionRow()
+
+        btn_prev = discord.ui.Button(
+            emoji="⬅️",
+            style=discord.ButtonStyle.gray,
+            disabled=(self.current_page == 0),
+        )
+        btn_prev.callback = self.on_prev
+        action_row.add_item(btn_prev)
+
+        btn_next = discord.ui.Button(
+            emoji="➡️",
+            style=discord.ButtonStyle.gray,
+            disabled=not self.has_next,
+        )
+        btn_next.callback = self.on_next
+        action_row.add_item(btn_next)
+
+        container.add_item(action_row)
+
+        self.add_item(container)
+
+    async def on_prev(self, interaction: discord.Interaction):
+        if self.current_page > 0:
+            self.current_page -= 1
+            await self.load_page()
+            await interaction.response.edit_message(view=self)
+
+    async def on_next(self, interaction: discord.Interaction):
+        if self.has_next:
+            last = self.events[-1]
+            del self.page_cursors[self.current_page + 1 :]
+            self.page_cursors.append((last.created_at, last.id))
+            self.current_page += 1
+            await self.load_page()
+            await interaction.response.edit_message(view=self)
+
+
+class History(commands.Cog):
+    def __init__(self, bot: Bot):
+        self.bot = bot
+
+    @app_commands.command(name="history", description="История кадровых действий")
+    @require_rank(
+        RankIndex.CAPTAIN,
+        f"❌ Просмотр журнала аудита доступен "
+        f"со звания {display_rank(RankIndex.CAPTAIN)}.",
+    )
+    @app_commands.describe(
+        user="Военнослужащий, над которым выполнялись действия",
+        initiator="Кто выполнял действия",
+        action="Тип действия",
+    )
+    @app_commands.rename(
+        user="военнослужащий", initiator="составитель", action="действие"
+    )
+    @app_commands.choices(
+        action=[
+            app_commands.Choice(name=action.value, value=action.value)
+            for action in AuditAction
+        ]
+    )
+    async def history_handler(
+        self,
+        interaction: discord.Interaction,
+        user: discord.User | None = None,
+        initiator: discord.User | None = None,
+        action: app_commands.Choice[str] | None = None,
+    ):
+        filters = []
+        title_parts = []
+        if user:
+            filters.append(AuditEvent.target_id == user.id)
+            title_parts.append(user.display_name)
+        if initiator:
+            filters.append(AuditEvent.initiator_id == initiator.id)
+            title_parts.append(f"от {initiator.display_name}")
+        if action:
+            filters.append(AuditEvent.action == action.value)
+            title_parts.append(action.value)
+
+        title = "История " + " ".join(title_parts) if title_parts else "История"
+        total = await AuditEvent.find(*filters).count()
+
+        browser_view = HistoryBrowser(filters, title, total)
+        await browser_view.load_page()
+        await interaction.response.send_message(view=browser_view, ephemeral=True)
+
+
+async def setup(bot: Bot):
+    await bot.add_cog(History(bot))
@@ -1,28 +1,154 @@
+import asyncio
 import logging
 import math
+import time
 
 import discord
 from discord import app_commands
 from discord.ext import commands
+from pydantic import BaseModel
 
 from bot import Bot
 from config import RANK_EMOJIS, RANKS, RankIndex
 from database import divisions
 from database.models import User
-from utils.user_data import format_game_id, get_initiator, display_rank
+from utils.permissions import require_rank, resolve_interaction
+from utils.user_data import format_game_id, display_rank
 
 logger = logging.getLogger(__name__)
 
+MEMBERS_PER_PAGE = 25
+ROSTER_TTL = 60  # секунд
+
+
+class RosterEntry(BaseModel):
+    """Поля пользователя, которые выводятся в списке участников"""
+
+    discord_id: int
+    static: int | None = None
+    first_name: str | None = None
+    last_name: str | None = None
+    rank: int | None = None
+    position: str | None = None
+    sort_key: int = 0
+
+    @property
+    def full_name(self) -> str | None:
+        if self.first_name and self.last_name:
+            return f"{self.first_name} {self.last_name}"
+        return self.first_name or self.last_name
+
+
+def _sort_key_expression(division_info) -> dict:
+    """Ключ сортировки: звание + 10 * привилегия должности (если больше 1)"""
+    rank = {"$ifNull": ["$rank", 0]}
+    branches = [
+        {
+            "case": {"$eq": ["$position", pos.name]},
+            "then": pos.privilege.value * 10,
+        }
+        for pos in (division_info.positions or [])
+        if pos.privilege.value > 1
+    ]
+    if not branches:
+        return rank
+    return {"$add": [rank, {"$switch": {"branches": branches, "default": 0}}]}
+
+
+class RosterSnapshot:
+    """
+    Список участников подразделения, общий для всех, кто его сейчас смотрит.
+
+    Сортировка и проекция выполняются в Mongo, страницы подгружаются лениво
+    по ключу (sort_key, discord_id) и переиспользуются до истечения
+    ROSTER_TTL.
+    """
+
+    def __init__(self, match: dict, sort_key: dict, per_page: int):
+        self.match = match
+        self.sort_key = sort_key
+        self.per_page = per_page
+        self.created_at = time.monotonic()
+        self.total: int | None = None
+        self._pages: list[list[RosterEntry]] = []
+        self._lock = asyncio.Lock()
+
+    @property
+    def expired(self) -> bool:
+        return time.monotonic() - self.created_at > ROSTER_TTL
+
+    async def load_total(self) -> int:
+        async with self._lock:
+            if self.total is None:
+                self.total = await User.find(self.match).count()
+            return self.total
+
+    async def get_page(self, index: int) -> list[RosterEntry]:
+        async with self._lock:
+            while len(self._pages) <= index:
+                if self._pages and not self._pages[-1]:
+                    break  # дальше записей нет
+                last = self._pages[-1][-1] if self._pages else None
+                self._pages.append(await self._fetch_after(last))
+            return self._pages[index] if index < len(self._pages) else []
+
+    async def _fetch_after(self, last: RosterEntry | None) -> list[RosterEntry]:
+        projection = {field: 1 for field in RosterEntry.model_fields}
+        projection.update({"_id": 0, "sort_key": self.sort_key})
+        pipeline = [
+            {"$match": self.match},
+            {"$project": projection},
+        ]
+        if last is not None:
+            pipeline.append(
+                {
+                    "$match": {
+                        "$or": [
+                            {"sort_key": {"$lt": last.sort_key}},
+                            {
+                                "sort_key": last.sort_key,
+                                "discord_id": {"$gt": last.discord_id},
+                            },
+                        ]
+                    }
+                }
+            )
+        pipeline += [
+            {"$sort": {"sort_key": -1, "discord_id": 1}},
+            {"$limit": self.per_page},
+        ]
+        return await User.aggregate(pipeline, projection_model=RosterEntry).to_list()
+
+
+_rosters: dict[int | None, RosterSnapshot] = {}
+
+
+def get_roster(division_id: int | None, division_info) -> RosterSnapshot:
+    """Общий снимок списка подразделения (None - без подразделения)"""
+    snapshot = _rosters.get(division_id)
+    if snapshot is None or snapshot.expired:
+        snapshot = RosterSnapshot(
+            {"division": division_id},
+            _sort_key_expression(division_info),
+            MEMBERS_PER_PAGE,
+        )
+        _rosters[division_id] = snapshot
+    return snapshot
+
 
 class MembersBrowser(discord.ui.LayoutView):
-    def __init__(self, members: list, division_info, members_per_page: int = 25):
+    def __init__(self, roster: RosterSnapshot, division_info):
         super().__init__(timeout=300)
-        self.members = members
+        self.roster = roster
         self.division_info = division_info
-        self.per_page = members_per_page
+        self.per_page = roster.per_page
         self.current_page = 0
-        self.total_pages = math.ceil(len(members) / members_per_page)
+        self.total = roster.total or 0
+        self.total_pages = math.ceil(self.total / self.per_page)
+        self.members: list[RosterEntry] = []
 
+    async def load_page(self):
+        self.members = await self.roster.get_page(self.current_page)
         self.render_page()
 
     def render_page(self):
@@ -30,11 +156,10 @@ class MembersBrowser(discord.ui.LayoutView):
 
         start = self.current_page * self.per_page
         end = start + self.per_page
-        current_slice = self.members[start:end]
 
         header_text = (
             f"## {self.division_info.emoji} {self.division_info.name}: "
-            f"{min(len(self.members), end)}/{len(self.members)} участников"
+            f"{min(self.total, end)}/{self.total} участников"
         )
 
         members_text = "\n".join([
@@ -43,7 +168,7 @@ class MembersBrowser(discord.ui.LayoutView):
             f"<@{u.discord_id}> "
             f"❯ {u.full_name or 'Без имени'} "
             f"❯ {u.position or 'Без должности'}"
-            for i, u in current_slice
+            for i, u in enumerate(self.members, start=start + 1)
         ])
 
         container = discord.ui.Container()
@@ -78,42 +203,28 @@ class MembersBrowser(discord.ui.LayoutView):
     async def on_prev(self, interaction: discord.Interaction):
         if self.current_page > 0:
             self.current_page -= 1
-            self.render_page()
+            await self.load_page()
             await interaction.response.edit_message(view=self)
 
     async def on_next(self, interaction: discord.Interaction):
         if self.current_page < self.total_pages - 1:
             self.current_page += 1
-            self.render_page()
+            await self.load_page()
             await interaction.response.edit_message(view=self)
 
+
 class Members(commands.Cog):
     def __init__(self, bot: Bot):
         self.bot = bot
 
-    async def _check_permissions(self, interaction: discord.Interaction) -> User | None:
-        editor_db = await get_initiator(interaction)
-
-        if not editor_db:
-            await interaction.response.send_message(
-                "❌ Вы не найдены в базе данных.", ephemeral=True
-            )
-            return None
-
-        MIN_RANK = RankIndex.CAPTAIN
-        if (editor_db.rank or 0) < MIN_RANK:
-            await interaction.response.send_message(
-                f"❌ Доступ к просмотру участников подразделений доступен "
-                f"со звания {display_rank(MIN_RANK)}.",
-                ephemeral=True,
-            )
-            return None
-
-        return editor_db
-
     @app_commands.command(
         name="members", description="Просмотр участников подразделения"
     )
+    @require_rank(
+        RankIndex.CAPTAIN,
+        f"❌ Доступ к просмотру участников подразделений доступен "
+        f"со звания {display_rank(RankIndex.CAPTAIN)}.",
+    )
     @app_commands.describe(division="Подразделение для просмотра")
     @app_commands.rename(division="подразделение")
     @app_commands.choices(
@@ -127,23 +238,15 @@ class Members(commands.Cog):
         interaction: discord.Interaction,
         division: app_commands.Choice[str] | None,
     ):
-        editor_db = await self._check_permissions(interaction)
-        if not editor_db:
-            return
-
         if division and division.value == "none":
-            members = await User.find(User.division == None).to_list()  # noqa: E711
-            members.sort(key=lambda u: u.rank or 0, reverse=True)
-            members_indexed = list(enumerate(members, start=1))
 
             class _NoDivisionInfo:
                 name = "Без подразделения"
                 emoji = "🚫"
+                positions = None
 
-                def get_position_by_name(self, _):
-                    return None
-
-            if not members:
+            roster = get_roster(None, _NoDivisionInfo())
+            if not await roster.load_total():
                 empty_container = discord.ui.Container()
                 empty_container.add_item(
                     discord.ui.TextDisplay("## 🚫 Без подразделения: 0 участников\n\nПусто.")
@@ -153,15 +256,17 @@ class Members(commands.Cog):
                 await interaction.response.send_message(view=view, ephemeral=True)
                 return
 
-            browser_view = MembersBrowser(members_indexed, _NoDivisionInfo())
+            browser_view = MembersBrowser(roster, _NoDivisionInfo())
+            await browser_view.load_page()
             await interaction.response.send_message(view=browser_view, ephemeral=True)
             return
 
         division_id = int(division.value) if division else None
 
         if division is None:
-            if editor_db.division is not None:
-                division_id = editor_db.division
+            editor = await resolve_interaction(interaction)
+            if editor.division is not None:
+                division_id = editor.division.division_id
             else:
                 await interaction.response.send_message(
                     "❌ Вы не находитесь в подразделении. "
@@ -177,20 +282,8 @@ class Members(commands.Cog):
             )
             return
 
-        members = await User.find(User.division == division_id).to_list()
-
-        def member_sort_key(u: User):
-            value = u.rank or 0
-            if u.position:
-                position = division_info.get_position_by_name(u.position)
-                if position and position.privilege.value > 1:
-                    value += position.privilege.value * 10
-            return value
-
-        members.sort(key=member_sort_key, reverse=True)
-        members_indexed = list(enumerate(members, start=1))
-
-        if not members:
+        roster = get_roster(division_id, division_info)
+        if not await roster.load_total():
             empty_container = discord.ui.Container()
             empty_container.add_item(
                 discord.ui.TextDisplay(f"## {division_info.emoji} {division_info.name}: 0 участников\n\nПусто."))
@@ -199,7 +292,8 @@ class Members(commands.Cog):
             await interaction.response.send_message(view=view, ephemeral=True)
             return
 
-        browser_view = MembersBrowser(members_indexed, division_info)
+        browser_view = MembersBrowser(roster, division_info)
+        await browser_view.load_page()
         await interaction.response.send_message(view=browser_view, ephemeral=True)
 
 
@@ -8,8 +8,8 @@ from utils.bottom_message import update_bottom_message as _update_bottom_message
 channel_id = config.CHANNELS["reinstatement"]
 
 
-async def update_bottom_message(bot: Bot):
-    await _update_bottom_message(bot, channel_id, ReinstatementApplyView())
+async def update_bottom_message(bot: Bot, force: bool = False):
+    await _update_bottom_message(bot, channel_id, ReinstatementApplyView(), force=force)
 
 
 class Reinstatement(commands.Cog):
@@ -21,7 +21,7 @@ class Reinstatement(commands.Cog):
     async def update_command(self, ctx: commands.Context):
         if ctx.channel.id != channel_id:
             return
-        await update_bottom_message(self.bot)
+        await update_bottom_message(self.bot, force=True)
 
 
 async def setup(bot: Bot):
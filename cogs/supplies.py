@@ -9,7 +9,7 @@ from utils.bottom_message import update_bottom_message as _update_bottom_message
 channel_id = config.CHANNELS["storage_requests"]
 
 
-async def update_bottom_message(bot: Bot):
+async def update_bottom_message(bot: Bot, force: bool = False):
     description = (
         "Нажмите кнопку ниже, чтобы сформировать заявку "
         "на получение амуниции и материалов.\n\n"
@@ -21,7 +21,9 @@ async def update_bottom_message(bot: Bot):
         description=description,
         color=discord.Color.blue(),
     )
-    await _update_bottom_message(bot, channel_id, SupplyCreateView(), embed)
+    await _update_bottom_message(
+        bot, channel_id, SupplyCreateView(), embed, force=force
+    )
 
 
 class Supplies(commands.Cog):
@@ -33,7 +35,7 @@ class Supplies(commands.Cog):
     async def update_command(self, ctx: commands.Context):
         if ctx.channel.id != channel_id:
             return
-        await update_bottom_message(self.bot)
+        await update_bottom_message(self.bot, force=True)
 
 
 async def setup(bot: Bot):
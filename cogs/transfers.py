@@ -6,17 +6,14 @@ from ui.views.transfers import TransferView
 from utils.bottom_message import update_bottom_message as _update_bottom_message
 
 
-async def update_bottom_message(bot: Bot, channel_id: int):
-    target_division = None
-    for division in divisions.divisions:
-        if division.transfer_channel == channel_id:
-            target_division = division
-            break
-
+async def update_bottom_message(bot: Bot, channel_id: int, force: bool = False):
+    target_division = divisions.get_division_by_transfer_channel(channel_id)
     if not target_division:
         return
 
-    await _update_bottom_message(bot, channel_id, TransferView(target_division))
+    await _update_bottom_message(
+        bot, channel_id, TransferView(target_division), force=force
+    )
 
 
 class Transfers(commands.Cog):
@@ -26,7 +23,7 @@ class Transfers(commands.Cog):
     @commands.command(name="refresh_transfer")
     @commands.has_permissions(administrator=True)
     async def update_command(self, ctx: commands.Context):
-        await update_bottom_message(self.bot, ctx.channel.id)
+        await update_bottom_message(self.bot, ctx.channel.id, force=True)
 
 
 async def setup(bot: Bot):
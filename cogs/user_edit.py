@@ -7,18 +7,14 @@ from discord.ext import commands
 
 import config
 from bot import Bot
-from config import RANK_EMOJIS, RANKS, EXCLUDED_ROLES, RankIndex
-from database import divisions
+from config import RANK_EMOJIS, RANKS, RankIndex
+from database import divisions, user_cache
 from database.models import User
+from utils import notifications
 from utils.audit import AuditAction, audit_logger
-from utils.notifications import (
-    notify_demoted,
-    notify_dismissed,
-    notify_position_changed,
-    notify_promoted,
-)
-from utils.roles import to_division, to_position, to_rank
-from utils.user_data import format_game_id, get_initiator, display_rank
+from utils.roles import sync_member
+from utils.permissions import get_user_rank, resolve_interaction
+from utils.user_data import format_game_id, display_rank
 
 logger = logging.getLogger(__name__)
 
@@ -45,15 +41,9 @@ class UserEdit(commands.Cog):
     async def _check_permissions(
         self, interaction: discord.Interaction, target_user_db: User
     ) -> bool:
-        editor_db = await get_initiator(interaction)
+        editor_rank = await get_user_rank(interaction)
 
-        if not editor_db:
-            await interaction.response.send_message(
-                "❌ Вы не найдены в базе данных.", ephemeral=True
-            )
-            return False
-
-        if (editor_db.rank or 0) < 11:
+        if (editor_rank or 0) < RankIndex.CAPTAIN:
             await interaction.response.send_message(
                 f"❌ Доступ к управлению кадрами разрешен "
                 f"со звания {display_rank(RankIndex.CAPTAIN)}.",
@@ -62,7 +52,7 @@ class UserEdit(commands.Cog):
             return False
 
         if target_user_db.rank is not None:
-            if (editor_db.rank or 0) <= target_user_db.rank:
+            if editor_rank <= target_user_db.rank:
                 await interaction.response.send_message(
                     "❌ Вы не можете редактировать пользователей "
                     "равного или старшего звания.",
@@ -76,38 +66,8 @@ class UserEdit(commands.Cog):
         self, interaction: discord.Interaction, member: discord.Member, user_info: User
     ):
         try:
-            roles = member.roles
-
-            if user_info.rank is None:
-                roles = [
-                    role for role in roles
-                    if role.is_default() or role.id in EXCLUDED_ROLES or not role.is_assignable()
-                ]
-
-                full_name = (
-                    user_info.full_name
-                    if (len(user_info.full_name) + 9) <= 32
-                    else (user_info.short_name or "Неизвестный")
-                )
-                new_nick = f"Уволен | {full_name}"
-            else:
-                division = divisions.get_division(user_info.division)
-
-                roles = to_division(roles, user_info.division)
-                roles = to_rank(roles, user_info.rank)
-                roles = to_position(roles, user_info.division, user_info.position)
-
-                if division.abbreviation == "ССО":
-                    new_nick = member.display_name
-                else:
-                    new_nick = user_info.discord_nick
-
-            new_nick = new_nick[:32]
-
-            await member.edit(
-                nick=new_nick,
-                roles=roles,
-                reason=f"Изменил {interaction.user.display_name}",
+            await sync_member(
+                member, user_info, reason=f"Изменил {interaction.user.display_name}"
             )
             return True
 
@@ -131,7 +91,7 @@ class UserEdit(commands.Cog):
     async def ask_dismiss_user_callback(
         self, interaction: discord.Interaction, user: discord.Member
     ):
-        user_info = await User.find_one(User.discord_id == user.id)
+        user_info = await user_cache.get(user.id)
         if not user_info:
             await interaction.response.send_message(
                 "Пользователь не найден в БД.", ephemeral=True
@@ -175,7 +135,7 @@ class UserEdit(commands.Cog):
             )
 
             # Уведомление в ЛС
-            await notify_dismissed(
+            await notifications.notify_dismissed(
                 interaction.client, user.id, reason_input.value, by_report=False
             )
 
@@ -195,7 +155,7 @@ class UserEdit(commands.Cog):
     async def fast_promotion_callback(
         self, interaction: discord.Interaction, user: discord.Member
     ):
-        user_info = await User.find_one(User.discord_id == user.id)
+        user_info = await user_cache.get(user.id)
         if not user_info:
             await interaction.response.send_message(
                 "Пользователь не найден.", ephemeral=True
@@ -217,8 +177,7 @@ class UserEdit(commands.Cog):
             )
             return
 
-        editor = await get_initiator(interaction)
-        if (editor.rank or 0) <= user_info.rank:
+        if ((await get_user_rank(interaction)) or 0) <= user_info.rank:
             await interaction.response.send_message(
                 "❌ Вы не можете присвоить звание выше или равное вашему.",
                 ephemeral=True,
@@ -243,12 +202,12 @@ class UserEdit(commands.Cog):
         rank_name = config.RANKS[user_info.rank]
 
         # Уведомление в ЛС
-        await notify_promoted(interaction.client, user.id, rank_name)
+        await notifications.notify_promoted(interaction.client, user.id, rank_name)
 
     async def edit_user_callback(
         self, interaction: discord.Interaction, user: discord.Member
     ):
-        user_info = await User.find_one(User.discord_id == user.id)
+        user_info = await user_cache.get(user.id)
         if not user_info:
             await interaction.response.send_message(
                 "Пользователь не найден.", ephemeral=True
@@ -357,10 +316,9 @@ class UserEdit(commands.Cog):
             if not await self._check_permissions(interaction, user_info):
                 return
 
-            editor = await get_initiator(interaction)
             new_rank = int(select_rank.values[0])
 
-            if (editor.rank or 0) <= new_rank:
+            if ((await get_user_rank(interaction)) or 0) <= new_rank:
                 await interaction.response.send_message(
                     "❌ Вы не можете присвоить звание выше или равное вашему.",
                     ephemeral=True,
@@ -381,13 +339,13 @@ class UserEdit(commands.Cog):
                 if (old_rank or -1) < new_rank:
                     action = AuditAction.PROMOTED
                     # Уведомление в ЛС о повышении
-                    await notify_promoted(
+                    await notifications.notify_promoted(
                         interaction.client, user.id, config.RANKS[new_rank]
                     )
                 else:
                     action = AuditAction.DEMOTED
                     # Уведомление в ЛС о понижении
-                    await notify_demoted(
+                    await notifications.notify_demoted(
                         interaction.client, user.id, config.RANKS[new_rank]
                     )
                 await audit_logger.log_action(action, interaction.user, user)
@@ -420,7 +378,7 @@ class UserEdit(commands.Cog):
                         AuditAction.POSITION_CHANGED, modal_interaction.user, user
                     )
                     # Уведомление в ЛС
-                    await notify_position_changed(
+                    await notifications.notify_position_changed(
                         modal_interaction.client, user.id, user_info.position
                     )
 
@@ -522,40 +480,29 @@ class UserEdit(commands.Cog):
                 if not await self._check_permissions(interaction, user_info):
                     return
 
-                editor = await get_initiator(interaction)
+                editor = await resolve_interaction(interaction)
                 new_position_name = position_select.values[0]
 
-                if editor.division and editor.position:
-                    editor_div_obj = divisions.get_division(editor.division)
-                    if editor_div_obj and editor_div_obj.positions:
-                        editor_pos_obj = next(
-                            (
-                                p
-                                for p in editor_div_obj.positions
-                                if p.name == editor.position
-                            ),
-                            None,
-                        )
-                        target_pos_obj = next(
-                            (
-                                p
-                                for p in (div_obj.positions or [])
-                                if p.name == new_position_name
-                            ),
-                            None,
-                        )
+                if editor.position:
+                    target_pos_obj = next(
+                        (
+                            p
+                            for p in (div_obj.positions or [])
+                            if p.name == new_position_name
+                        ),
+                        None,
+                    )
 
-                        if editor_pos_obj and target_pos_obj:
-                            if (
-                                editor_pos_obj.privilege.value
-                                <= target_pos_obj.privilege.value
-                            ):
-                                await interaction.response.send_message(
-                                    "❌ Вы не можете назначить должность "
-                                    "с привилегиями выше или равными вашим.",
-                                    ephemeral=True,
-                                )
-                                return
+                    if (
+                        target_pos_obj
+                        and editor.privilege.value <= target_pos_obj.privilege.value
+                    ):
+                        await interaction.response.send_message(
+                            "❌ Вы не можете назначить должность "
+                            "с привилегиями выше или равными вашим.",
+                            ephemeral=True,
+                        )
+                        return
 
                 await interaction.response.edit_message(
                     view=self.build_view(user, user_info)
@@ -570,7 +517,7 @@ class UserEdit(commands.Cog):
                         AuditAction.POSITION_CHANGED, interaction.user, user
                     )
                     # Уведомление в ЛС
-                    await notify_position_changed(
+                    await notifications.notify_position_changed(
                         interaction.client, user.id, user_info.position
                     )
 
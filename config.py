@@ -1,3 +1,4 @@
+import json
 import logging
 import os
 import re
@@ -19,6 +20,17 @@ if not MONGO_URI:
     logger.warning("MONGO_URI not found, using default value")
 MONGO_DB_NAME = os.getenv("MONGO_DB_NAME", "TimohaBot")
 
+# Метрики Prometheus и проверки /healthz, /readyz
+METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")
+METRICS_PORT = int(os.getenv("METRICS_PORT", "9100"))
+
+# Логи: формат text или json; ротация по времени, если задан LOG_ROTATE_WHEN
+# (например "midnight"), иначе по размеру
+LOG_FORMAT = os.getenv("LOG_FORMAT", "text").lower()
+LOG_ROTATE_WHEN = os.getenv("LOG_ROTATE_WHEN")
+LOG_MAX_BYTES = int(os.getenv("LOG_MAX_BYTES", str(10 * 1024 * 1024)))
+LOG_BACKUP_COUNT = int(os.getenv("LOG_BACKUP_COUNT", "7"))
+
 ENVIRONMENT = os.getenv("ENVIRONMENT")
 if not ENVIRONMENT:
     raise Exception("ENVIRONMENT not set")
@@ -149,15 +161,31 @@ SUPPLY_ITEMS = {
     "Прочее": ["Бодикамеры", "Патроны", "Материалы", "Прочее"],
 }
 
-SUPPLY_LIMITS = {
-    "Оружие": 3,  # Лимит на категорию Оружие (суммарно)
-    "Материалы": 2000,  # Материалы
-    "Броня": 20,  # Бронежилеты
-    "Медикаменты": 50,  # Общий лимит на медикаменты
-    "Армейская аптечка": 25,  # Конкретный предмет
-    "Обезболивающее": 15,  # Конкретный предмет
-    "Дефибриллятор": 15,  # Конкретный предмет
-}
+# Квоты на получение склада (на одного военнослужащего)
+#   scope:  "item" - предмет, "category" - категория SUPPLY_ITEMS,
+#           "total" - все предметы
+#   window: период в часах, за который суммируются одобренные заявки
+#           (None - лимит на одну заявку)
+SUPPLY_QUOTAS = [
+    {"scope": "category", "key": "Оружие", "limit": 3, "window": None},
+    {"scope": "item", "key": "Материалы", "limit": 2000, "window": None},
+    {
+        "scope": "category",
+        "key": "Броня",
+        "label": "Бронежилеты",
+        "limit": 20,
+        "window": None,
+    },
+    {"scope": "category", "key": "Медикаменты", "limit": 50, "window": None},
+    {"scope": "item", "key": "Армейская аптечка", "limit": 25, "window": None},
+    {"scope": "item", "key": "Обезболивающее", "limit": 15, "window": None},
+    {"scope": "item", "key": "Дефибриллятор", "limit": 15, "window": None},
+]
+# Квоты на расход за период задаются командованием через окружение, JSON-список
+# в том же формате, например:
+# [{"scope": "category", "key": "Оружие", "limit": 6, "window": 24}]
+# По умолчанию отключены
+SUPPLY_QUOTAS += json.loads(os.getenv("SUPPLY_WINDOW_QUOTAS") or "[]")
 
 BLACKLIST_MENTIONS = (1245655012760092707, 1245655012760092705, 1246113710255374336)
 SUPPLIES_AUDIT_MENTIONS = (1245655012760092707, 1245655012760092705)
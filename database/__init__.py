@@ -1,3 +1,5 @@
 from database.division import Divisions
+from database.user_cache import UserCache
 
 divisions = Divisions()
+user_cache = UserCache()
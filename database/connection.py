@@ -1,20 +1,26 @@
+import datetime
 import logging
 
-from beanie import init_beanie
+from beanie import Document, init_beanie
 from pymongo import AsyncMongoClient
 
 import config
 from database.counters import Counter
+from database.leader import LeaderLease
 from database.models import (
+    AuditEvent,
     BottomMessage,
+    DailyAnnouncement,
     DismissalRequest,
     Division,
     ReinstatementRequest,
     RoleRequest,
     SupplyRequest,
+    SyncState,
     TransferRequest,
     User, TimeoffRequest,
 )
+from utils.metrics import metrics
 
 _IS_INITIALIZED = False
 MODELS = [
@@ -27,16 +33,81 @@ MODELS = [
     DismissalRequest,
     TransferRequest,
     Counter,
-    TimeoffRequest
+    TimeoffRequest,
+    SyncState,
+    AuditEvent,
+    DailyAnnouncement,
+    LeaderLease,
 ]
 
 
+def _hot_queries() -> list[tuple[type[Document], dict]]:
+    """Запросы с горячего пути взаимодействий, которые обязаны идти по индексу"""
+    now = datetime.datetime.now()
+    return [
+        (User, {"discord_id": 0}),
+        (User, {"division": 0}),
+        (User, {"blacklist.ends_at": {"$ne": None, "$lte": now}}),
+        (RoleRequest, {"user": 0, "checked": False}),
+        (ReinstatementRequest, {"user": 0, "checked": False}),
+        (TimeoffRequest, {"user_id": 0, "checked": False}),
+        (
+            TimeoffRequest,
+            {"user_id": 0, "approved": True, "reviewed_at": {"$gte": now}},
+        ),
+        (
+            TransferRequest,
+            {"user_id": 0, "status": {"$nin": ["APPROVED", "REJECTED"]}},
+        ),
+        (SupplyRequest, {"user_id": 0, "status": "PENDING"}),
+        (
+            SupplyRequest,
+            {"user_id": 0, "status": "APPROVED", "reviewed_at": {"$gte": now}},
+        ),
+        (DismissalRequest, {"user_id": 0, "status": "PENDING"}),
+        (AuditEvent, {"target_id": 0, "created_at": {"$lt": now}}),
+    ]
+
+
+def _has_collscan(plan: dict) -> bool:
+    if plan.get("stage") == "COLLSCAN":
+        return True
+
+    children = []
+    for key in ("inputStage", "queryPlan"):
+        if isinstance(plan.get(key), dict):
+            children.append(plan[key])
+    children.extend(plan.get("inputStages", []))
+
+    return any(_has_collscan(child) for child in children)
+
+
+async def audit_indexes():
+    """Проверить планы горячих запросов через explain() и предупредить о COLLSCAN"""
+    for model, query in _hot_queries():
+        collection = model.get_pymongo_collection()
+        try:
+            explain = await collection.find(query).explain()
+        except Exception as e:
+            logging.warning(f"Index audit failed for {collection.name}: {e}")
+            continue
+
+        winning_plan = explain.get("queryPlanner", {}).get("winningPlan", {})
+        if _has_collscan(winning_plan):
+            logging.warning(
+                f"Collection scan in hot query on {collection.name}: "
+                f"{sorted(query)}. Check Settings.indexes of {model.__name__}"
+            )
+
+
 async def establish_db_connection():
     global _IS_INITIALIZED
     if _IS_INITIALIZED:
         return
 
-    client = AsyncMongoClient(config.MONGO_URI)
+    client = AsyncMongoClient(
+        config.MONGO_URI, event_listeners=[metrics.mongo_listener]
+    )
 
     await init_beanie(
         database=client.get_database(config.MONGO_DB_NAME), document_models=MODELS
@@ -44,3 +115,5 @@ async def establish_db_connection():
 
     _IS_INITIALIZED = True
     logging.info("Database connection established")
+
+    await audit_indexes()
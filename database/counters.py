@@ -1,6 +1,10 @@
+import asyncio
+
 from beanie import Document
 from pymongo import ReturnDocument
 
+ID_BLOCK_SIZE = 20
+
 
 class Counter(Document):
     """Счетчик для атомарной генерации ID"""
@@ -12,16 +16,70 @@ class Counter(Document):
         name = "counters"
 
 
+class IdAllocator:
+    """
+    Выдает ID блоками: один атомарный $inc резервирует сразу block_size значений,
+    дальше ID раздаются из памяти без обращений к БД.
+
+    Блоки резервируются атомарно, поэтому несколько процессов никогда не получат
+    одинаковый ID. Зато неиспользованный остаток блока теряется при перезапуске
+    или падении бота - в нумерации заявок появляются пропуски, это допустимо.
+    ID разных процессов также не обязаны идти строго по возрастанию.
+    """
+
+    def __init__(self, block_size: int = ID_BLOCK_SIZE):
+        self.block_size = block_size
+        self._blocks: dict[str, tuple[int, int]] = {}  # имя -> (следующий, последний)
+        self._locks: dict[str, asyncio.Lock] = {}
+
+    async def _reserve(self, collection_name: str, count: int) -> int:
+        """Резервирует count ID и возвращает последний из них"""
+        result = await Counter.get_pymongo_collection().find_one_and_update(
+            {"name": collection_name},
+            {"$inc": {"value": count}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER,
+        )
+        return result["value"]
+
+    async def next_id(self, collection_name: str) -> int:
+        return (await self.next_ids(collection_name, 1))[0]
+
+    async def next_ids(self, collection_name: str, count: int) -> list[int]:
+        """
+        Выдает count ID подряд. Если в текущем блоке их не хватает, недостающие
+        резервируются одним $inc вместе со следующим блоком.
+        """
+        lock = self._locks.setdefault(collection_name, asyncio.Lock())
+        async with lock:
+            next_value, last_value = self._blocks.get(collection_name, (1, 0))
+            ids = list(range(next_value, min(last_value, next_value + count - 1) + 1))
+            missing = count - len(ids)
+            if missing:
+                last_value = await self._reserve(
+                    collection_name, missing + self.block_size
+                )
+                first = last_value - missing - self.block_size + 1
+                ids.extend(range(first, first + missing))
+                next_value = first + missing
+            else:
+                next_value += count
+
+            self._blocks[collection_name] = (next_value, last_value)
+            return ids
+
+
+id_allocator = IdAllocator()
+
+
 async def get_next_id(collection_name: str) -> int:
     """
-    Атомарно получает следующий ID для указанной коллекции.
-    Использует findAndModify с upsert и $inc для предотвращения race conditions.
+    Получает следующий ID для указанной коллекции.
+    ID берутся из заранее зарезервированного блока (см. IdAllocator).
     """
-    result = await Counter.get_pymongo_collection().find_one_and_update(
-        {"name": collection_name},
-        {"$inc": {"value": 1}},
-        upsert=True,
-        return_document=ReturnDocument.AFTER,
-    )
-
-    return result["value"]
+    return await id_allocator.next_id(collection_name)
+
+
+async def get_next_ids(collection_name: str, count: int) -> list[int]:
+    """Получает сразу count ID для указанной коллекции (для пакетных вставок)"""
+    return await id_allocator.next_ids(collection_name, count)
@@ -1,4 +1,5 @@
-from typing import Tuple
+from types import MappingProxyType
+from typing import Mapping, Tuple
 
 import discord
 
@@ -10,15 +11,52 @@ class Divisions:
         self.divisions: list[Division] = []
         self._by_id: dict[int, Division] = {}
         self._by_abbr: dict[str, Division] = {}
+        # Обратные индексы по ролям. Порядковый номер сохраняет приоритет
+        # исходного обхода: первое подразделение и первая должность в списке.
+        self._by_position_role: Mapping[int, tuple[int, Division, Position]] = {}
+        self._by_division_role: Mapping[int, tuple[int, Division]] = {}
+        self._position_roles: Mapping[tuple[int, str], int] = {}
+        self._by_transfer_channel: Mapping[int, Division] = {}
+        self.position_role_ids: frozenset[int] = frozenset()
+        self.division_role_ids: frozenset[int] = frozenset()
 
     async def load(self):
-        self.divisions = await Division.find_all().to_list()
-        self._rebuild_cache()
+        divisions = await Division.find_all().to_list()
+        self._rebuild_cache(divisions)
 
-    def _rebuild_cache(self):
-        """Перестроить кэш после загрузки данных"""
-        self._by_id = {d.division_id: d for d in self.divisions}
-        self._by_abbr = {d.abbreviation.lower(): d for d in self.divisions}
+    def _rebuild_cache(self, divisions: list[Division] | None = None):
+        """
+        Перестроить кэш после загрузки данных.
+        Все индексы строятся заново и подменяются целиком, поэтому читатели
+        никогда не видят частично обновленное состояние.
+        """
+        if divisions is None:
+            divisions = self.divisions
+
+        by_position_role = {}
+        position_roles = {}
+        order = 0
+        for div in divisions:
+            for pos in div.positions or []:
+                by_position_role.setdefault(pos.role_id, (order, div, pos))
+                position_roles.setdefault((div.division_id, pos.name), pos.role_id)
+                order += 1
+
+        by_division_role = {}
+        for index, div in enumerate(divisions):
+            by_division_role.setdefault(div.role_id, (index, div))
+
+        self.divisions = divisions
+        self._by_id = {d.division_id: d for d in divisions}
+        self._by_abbr = {d.abbreviation.lower(): d for d in divisions}
+        self._by_position_role = MappingProxyType(by_position_role)
+        self._by_division_role = MappingProxyType(by_division_role)
+        self._position_roles = MappingProxyType(position_roles)
+        self._by_transfer_channel = MappingProxyType(
+            {d.transfer_channel: d for d in divisions if d.transfer_channel}
+        )
+        self.position_role_ids = frozenset(by_position_role)
+        self.division_role_ids = frozenset(by_division_role)
 
     def get_division(self, division_id: int) -> Division | None:
         """O(1) поиск по ID"""
@@ -28,26 +66,41 @@ class Divisions:
         """O(1) поиск по аббревиатуре (регистронезависимый)"""
         return self._by_abbr.get(abbreviation.lower())
 
+    def get_division_by_transfer_channel(self, channel_id: int) -> Division | None:
+        """O(1) поиск по каналу переводов"""
+        return self._by_transfer_channel.get(channel_id)
+
     def get_division_name(self, division_id: int) -> str | None:
         """Получить имя подразделения по ID"""
         div = self._by_id.get(division_id)
         return div.name if div else None
 
+    def get_position_role_id(
+        self, division_id: int | None, position_name: str | None
+    ) -> int | None:
+        """O(1) поиск роли должности в подразделении"""
+        return self._position_roles.get((division_id, position_name))
+
     def get_user_data(
         self, user: discord.Member
     ) -> Tuple[Division | None, Position | None]:
         """Получить подразделение и должность пользователя из его ролей"""
-        user_role_ids = {role.id for role in user.roles}
-
-        for div in self.divisions:
-            if not div.positions:
-                continue
-            for pos in div.positions:
-                if pos.role_id in user_role_ids:
-                    return div, pos
-
-        for div in self.divisions:
-            if div.role_id in user_role_ids:
-                return div, None
+        positions = [
+            self._by_position_role[role.id]
+            for role in user.roles
+            if role.id in self._by_position_role
+        ]
+        if positions:
+            _, div, pos = min(positions, key=lambda item: item[0])
+            return div, pos
+
+        user_divisions = [
+            self._by_division_role[role.id]
+            for role in user.roles
+            if role.id in self._by_division_role
+        ]
+        if user_divisions:
+            _, div = min(user_divisions, key=lambda item: item[0])
+            return div, None
 
         return None, None
@@ -0,0 +1,146 @@
+import asyncio
+import datetime
+import logging
+import os
+import socket
+import uuid
+from typing import Awaitable, Callable
+
+from beanie import Document, Indexed
+from pymongo import ASCENDING, IndexModel, ReturnDocument
+from pymongo.errors import DuplicateKeyError, PyMongoError
+
+logger = logging.getLogger(__name__)
+
+LEASE_NAME = "bot"
+LEASE_TTL = datetime.timedelta(seconds=30)
+HEARTBEAT_INTERVAL = 10  # секунд
+STANDBY_POLL_INTERVAL = 5  # секунд
+WARM_INTERVAL = 120  # секунд, не больше TTL кэша пользователей
+
+
+class LeaderLease(Document):
+    """Аренда лидерства: кто из процессов сейчас подключен к Discord"""
+
+    name: Indexed(str, unique=True)
+    holder: str
+    expires_at: datetime.datetime
+
+    class Settings:
+        name = "leader_lease"
+        indexes = [
+            # Брошенная аренда удаляется сама (TTL-монитор работает раз в минуту,
+            # поэтому при захвате срок дополнительно проверяется запросом)
+            IndexModel([("expires_at", ASCENDING)], expireAfterSeconds=0),
+        ]
+
+
+def _utcnow() -> datetime.datetime:
+    return datetime.datetime.now(datetime.timezone.utc)
+
+
+class LeaderElection:
+    """
+    Выбор лидера между основным и резервными процессами.
+
+    Лидер держит документ аренды в Mongo и продлевает его каждые
+    HEARTBEAT_INTERVAL секунд. Резервный процесс раз в STANDBY_POLL_INTERVAL
+    секунд пытается захватить аренду и, пока ждет, держит кэши прогретыми.
+    Если лидер не может продлить аренду до ее истечения, он обязан
+    остановиться - иначе работа выполнялась бы двумя процессами.
+    """
+
+    def __init__(self, name: str = LEASE_NAME):
+        self.name = name
+        self.node_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+        self.is_leader = False
+        self.expires_at: datetime.datetime | None = None
+        self._heartbeat: asyncio.Task | None = None
+
+    async def try_acquire(self) -> bool:
+        """Захватить или продлить аренду одним find_one_and_update"""
+        now = _utcnow()
+        expires_at = now + LEASE_TTL
+        try:
+            await LeaderLease.get_pymongo_collection().find_one_and_update(
+                {
+                    "name": self.name,
+                    "$or": [
+                        {"holder": self.node_id},
+                        {"expires_at": {"$lt": now}},
+                    ],
+                },
+                {"$set": {"holder": self.node_id, "expires_at": expires_at}},
+                upsert=True,
+                return_document=ReturnDocument.AFTER,
+            )
+        except DuplicateKeyError:
+            # Аренда есть и действует у другого процесса
+            self.is_leader = False
+            return False
+
+        self.is_leader = True
+        self.expires_at = expires_at
+        return True
+
+    async def wait_for_leadership(
+        self, warm_up: Callable[[], Awaitable[None]] | None = None
+    ):
+        """Ждать лидерства, периодически прогревая кэши"""
+        next_warm_up = 0.0
+        loop = asyncio.get_running_loop()
+
+        while True:
+            try:
+                if await self.try_acquire():
+                    logger.info(f"Leadership acquired by {self.node_id}")
+                    return
+            except PyMongoError as e:
+                logger.warning(f"Leader lease check failed: {e}")
+
+            if warm_up and loop.time() >= next_warm_up:
+                next_warm_up = loop.time() + WARM_INTERVAL
+                try:
+                    await warm_up()
+                except Exception as e:
+                    logger.warning(f"Standby warm-up failed: {e}")
+
+            await asyncio.sleep(STANDBY_POLL_INTERVAL)
+
+    def start_heartbeat(self, on_lost: Callable[[], None]):
+        """Продлевать аренду; при ее потере вызвать on_lost"""
+        if self._heartbeat is None or self._heartbeat.done():
+            self._heartbeat = asyncio.create_task(self._run_heartbeat(on_lost))
+
+    async def _run_heartbeat(self, on_lost: Callable[[], None]):
+        while True:
+            await asyncio.sleep(HEARTBEAT_INTERVAL)
+            try:
+                if await self.try_acquire():
+                    continue
+                logger.critical(f"Leadership taken over from {self.node_id}")
+            except PyMongoError as e:
+                if self.expires_at and _utcnow() < self.expires_at:
+                    logger.warning(f"Leader lease renewal failed: {e}")
+                    continue
+                logger.critical(f"Leader lease expired, renewal failed: {e}")
+
+            self.is_leader = False
+            on_lost()
+            return
+
+    async def release(self):
+        """Отдать аренду, чтобы резервный процесс подхватил работу сразу"""
+        if self._heartbeat:
+            self._heartbeat.cancel()
+            self._heartbeat = None
+        if not self.is_leader:
+            return
+
+        self.is_leader = False
+        try:
+            await LeaderLease.get_pymongo_collection().delete_one(
+                {"name": self.name, "holder": self.node_id}
+            )
+        except PyMongoError as e:
+            logger.warning(f"Failed to release leader lease: {e}")
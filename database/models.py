@@ -3,8 +3,18 @@ from enum import Enum
 from typing import Dict
 
 import discord
-from beanie import Document, Indexed
+from beanie import (
+    Delete,
+    Document,
+    Indexed,
+    Insert,
+    Replace,
+    Save,
+    SaveChanges,
+    after_event,
+)
 from pydantic import BaseModel, Field
+from pymongo import ASCENDING, DESCENDING, IndexModel
 
 import config
 from utils.user_data import format_game_id, display_rank, transliterate_abbreviation
@@ -103,8 +113,24 @@ class User(Document):
                 parts.append(self.full_name)
         return " | ".join(parts)[:32]
 
+    @after_event(Insert, Replace, Save, SaveChanges)
+    def _store_in_cache(self):
+        from database import user_cache
+
+        user_cache.put(self)
+
+    @after_event(Delete)
+    def _drop_from_cache(self):
+        from database import user_cache
+
+        user_cache.invalidate(self.discord_id)
+
     class Settings:
         name = "users"
+        indexes = [
+            IndexModel([("division", ASCENDING)]),
+            IndexModel([("blacklist.ends_at", ASCENDING)], sparse=True),
+        ]
 
 
 class ReinstatementData(BaseModel):
@@ -121,9 +147,13 @@ class ReinstatementRequest(Document):
     checked: bool = False
     rank: int | None = None
     sent_at: datetime.datetime = Field(default_factory=datetime.datetime.now)
+    claimed_by: int | None = None  # Кто рассматривает заявку
+    claim_expires_at: datetime.datetime | None = None  # Срок захвата
 
     async def to_embed(self):
-        user = await User.find_one(User.discord_id == self.user)
+        from database import user_cache
+
+        user = await user_cache.get(self.user)
 
         status = (
             "одобрено"
@@ -159,6 +189,9 @@ class ReinstatementRequest(Document):
 
     class Settings:
         name = "reinstatement_requests"
+        indexes = [
+            IndexModel([("user", ASCENDING), ("checked", ASCENDING)]),
+        ]
 
 
 class RoleType(str, Enum):
@@ -190,6 +223,8 @@ class RoleRequest(Document):
     approved: bool = False
     checked: bool = False
     sent_at: datetime.datetime = Field(default_factory=datetime.datetime.now)
+    claimed_by: int | None = None  # Кто рассматривает заявку
+    claim_expires_at: datetime.datetime | None = None  # Срок захвата
 
     def _get_role_type_name(self) -> str:
         names = {
@@ -255,6 +290,9 @@ class RoleRequest(Document):
 
     class Settings:
         name = "role_requests"
+        indexes = [
+            IndexModel([("user", ASCENDING), ("checked", ASCENDING)]),
+        ]
 
 class TimeoffRequest(Document):
     id: int
@@ -265,6 +303,8 @@ class TimeoffRequest(Document):
     period: str | None = None
     sent_at: datetime.datetime = Field(default_factory=datetime.datetime.now)
     reviewed_at: datetime.datetime | None = None
+    claimed_by: int | None = None  # Кто рассматривает заявку
+    claim_expires_at: datetime.datetime | None = None  # Срок захвата
 
     async def to_embed(self):
         emoji = "✅" if self.approved else "❌" if self.checked else "⏳"
@@ -285,8 +325,9 @@ class TimeoffRequest(Document):
         e.add_field(name="Заявитель", value=self.data.full_name)
         e.add_field(name="Статик", value=format_game_id(self.data.static_id))
 
-        requester = await User.find_one(User.discord_id == self.user_id)
-        from database import divisions
+        from database import divisions, user_cache
+
+        requester = await user_cache.get(self.user_id)
         division = divisions.get_division(requester.division)
 
         e.add_field(name="Звание", value=display_rank(requester.rank))
@@ -299,6 +340,16 @@ class TimeoffRequest(Document):
 
     class Settings:
         name = "timeoff_requests"
+        indexes = [
+            IndexModel([("user_id", ASCENDING), ("checked", ASCENDING)]),
+            IndexModel(
+                [
+                    ("user_id", ASCENDING),
+                    ("approved", ASCENDING),
+                    ("reviewed_at", DESCENDING),
+                ]
+            ),
+        ]
 
 
 class SupplyRequest(Document):
@@ -310,9 +361,13 @@ class SupplyRequest(Document):
     created_at: datetime.datetime = Field(default_factory=datetime.datetime.now)
     reviewed_at: datetime.datetime | None = None
     message_id: int | None = None  # ID сообщения в канале
+    claimed_by: int | None = None  # Кто рассматривает заявку
+    claim_expires_at: datetime.datetime | None = None  # Срок захвата
 
     async def to_embed(self, bot):
-        requester = await User.find_one(User.discord_id == self.user_id)
+        from database import user_cache
+
+        requester = await user_cache.get(self.user_id)
         requester_game_id = (
             format_game_id(requester.static) if requester else "Неизвестно"
         )
@@ -328,8 +383,10 @@ class SupplyRequest(Document):
             self.status, ("❓ Неизвестно", discord.Color.default())
         )
 
+        # У черновика номер еще не выделен
+        number = f" #{self.id}" if self.status != "DRAFT" else ""
         embed = discord.Embed(
-            title=f"Заявка на склад #{self.id}", color=color, timestamp=self.created_at
+            title=f"Заявка на склад{number}", color=color, timestamp=self.created_at
         )
         embed.add_field(
             name="Запросил",
@@ -355,6 +412,21 @@ class SupplyRequest(Document):
 
     class Settings:
         name = "supply_requests"
+        indexes = [
+            IndexModel(
+                [
+                    ("user_id", ASCENDING),
+                    ("status", ASCENDING),
+                    ("reviewed_at", DESCENDING),
+                ]
+            ),
+            # Черновики больше не сохраняются, старые DRAFT удаляются через сутки
+            IndexModel(
+                [("created_at", ASCENDING)],
+                expireAfterSeconds=24 * 60 * 60,
+                partialFilterExpression={"status": "DRAFT"},
+            ),
+        ]
 
 
 class DismissalType(str, Enum):
@@ -378,6 +450,8 @@ class DismissalRequest(Document):
     reviewer_id: int | None = None
     created_at: datetime.datetime = Field(default_factory=datetime.datetime.now)
     reviewed_at: datetime.datetime | None = None
+    claimed_by: int | None = None  # Кто рассматривает заявку
+    claim_expires_at: datetime.datetime | None = None  # Срок захвата
 
     async def to_embed(self, bot):
         from database import divisions
@@ -434,6 +508,9 @@ class DismissalRequest(Document):
 
     class Settings:
         name = "dismissal_requests"
+        indexes = [
+            IndexModel([("user_id", ASCENDING), ("status", ASCENDING)]),
+        ]
 
 
 class TransferRequest(Document):
@@ -455,11 +532,13 @@ class TransferRequest(Document):
     old_reviewed_at: datetime.datetime | None = None
     new_reviewed_at: datetime.datetime | None = None
     reject_reason: str | None = None
+    claimed_by: int | None = None  # Кто рассматривает заявку
+    claim_expires_at: datetime.datetime | None = None  # Срок захвата
 
     async def to_embed(self, bot):
-        from database import divisions
+        from database import divisions, user_cache
 
-        user = await User.find_one(User.discord_id == self.user_id)
+        user = await user_cache.get(self.user_id)
 
         old_div = (
             divisions.get_division(self.old_division_id)
@@ -546,6 +625,9 @@ class TransferRequest(Document):
 
     class Settings:
         name = "transfer_requests"
+        indexes = [
+            IndexModel([("user_id", ASCENDING), ("status", ASCENDING)]),
+        ]
 
 
 class BottomMessage(Document):
@@ -554,3 +636,60 @@ class BottomMessage(Document):
 
     class Settings:
         name = "bottom_messages"
+
+
+class SyncState(Document):
+    """Отметки о последней синхронизации (watermark)"""
+
+    name: Indexed(str, unique=True)
+    synced_at: datetime.datetime | None = None
+    digest: str | None = None  # хэш синхронизированного содержимого
+
+    class Settings:
+        name = "sync_state"
+
+
+class DailyAnnouncement(Document):
+    """Ежедневная картинка в канале"""
+
+    channel_id: Indexed(int, unique=True)
+    image: str  # имя файла в ./daily_pics
+    hour: int = 18  # время отправки (UTC)
+    minute: int = 0
+    enabled: bool = True
+    last_sent_at: datetime.datetime | None = None  # UTC
+
+    @property
+    def send_time(self) -> datetime.time:
+        return datetime.time(
+            hour=self.hour, minute=self.minute, tzinfo=datetime.timezone.utc
+        )
+
+    class Settings:
+        name = "daily_announcements"
+
+
+class AuditEvent(Document):
+    """Запись журнала аудита"""
+
+    action: str  # значение AuditAction
+    initiator_id: int
+    target_id: int | None = None
+    target: str | None = None  # цель, если это не пользователь Discord
+    full_name: str | None = None
+    static: int | None = None
+    rank: int | None = None
+    division: int | None = None
+    position: str | None = None
+    additional_info: Dict[str, str] = Field(default_factory=dict)
+    message_url: str | None = None  # сообщение в канале аудита
+    created_at: datetime.datetime = Field(default_factory=datetime.datetime.now)
+
+    class Settings:
+        name = "audit_events"
+        indexes = [
+            IndexModel([("target_id", ASCENDING), ("created_at", DESCENDING)]),
+            IndexModel([("initiator_id", ASCENDING), ("created_at", DESCENDING)]),
+            IndexModel([("action", ASCENDING), ("created_at", DESCENDING)]),
+            IndexModel([("created_at", DESCENDING)]),
+        ]
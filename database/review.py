@@ -0,0 +1,58 @@
+import datetime
+from typing import TypeVar
+
+from beanie import Document, UpdateResponse
+from beanie.odm.operators.find.logical import Or
+from beanie.odm.operators.update.general import Set
+
+REVIEW_LEASE = datetime.timedelta(minutes=2)
+
+T = TypeVar("T", bound=Document)
+
+
+async def claim_review(
+    model: type[T], request_id: int, reviewer_id: int, *pending
+) -> T | None:
+    """
+    Атомарно захватывает заявку на рассмотрение одним find_one_and_update.
+
+    Захват удается, только если заявка еще ожидает рассмотрения (условия pending)
+    и никто другой не держит ее захват. Захват выдается на REVIEW_LEASE: если
+    рассматривающий упал посреди обработки, заявка освободится сама.
+    Работает между процессами, поэтому повторное нажатие или второй экземпляр
+    бота не обработают заявку дважды.
+
+    Args:
+        model: Модель заявки (должна иметь поля claimed_by и claim_expires_at)
+        request_id: ID заявки
+        reviewer_id: Discord ID рассматривающего
+        pending: Условия, при которых заявка считается необработанной
+
+    Returns:
+        Захваченная заявка или None, если она не найдена или уже обрабатывается
+    """
+    now = datetime.datetime.now()
+    return await model.find_one(
+        model.id == request_id,
+        *pending,
+        Or(
+            model.claim_expires_at == None,  # noqa: E711
+            model.claim_expires_at < now,
+        ),
+    ).update(
+        Set(
+            {
+                model.claimed_by: reviewer_id,
+                model.claim_expires_at: now + REVIEW_LEASE,
+            }
+        ),
+        response_type=UpdateResponse.NEW_DOCUMENT,
+    )
+
+
+async def release_review(request: Document):
+    """
+    Снять захват, не меняя статус заявки.
+    Нужно, если рассмотрение прервано или заявка переходит на следующий этап.
+    """
+    await request.set({"claimed_by": None, "claim_expires_at": None})
@@ -0,0 +1,96 @@
+import time
+from collections import OrderedDict
+from typing import Any
+
+from beanie.odm.operators.find.comparison import In
+
+from database.models import User
+
+CACHE_MAX_SIZE = 4096
+CACHE_TTL = 300  # секунд
+
+
+class UserCache:
+    """
+    Общий на процесс кэш документов User по discord_id (identity map).
+    Размер ограничен (LRU), записи устаревают по TTL.
+    Обновляется при User.save()/insert и при массовых записях синхронизации.
+    """
+
+    def __init__(self, max_size: int = CACHE_MAX_SIZE, ttl: float = CACHE_TTL):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: OrderedDict[int, tuple[User, float]] = OrderedDict()
+
+    def _get_fresh(self, discord_id: int) -> User | None:
+        entry = self._entries.get(discord_id)
+        if entry is None:
+            return None
+
+        user, expires_at = entry
+        if expires_at <= time.monotonic():
+            del self._entries[discord_id]
+            return None
+
+        self._entries.move_to_end(discord_id)
+        return user
+
+    async def get(self, discord_id: int) -> User | None:
+        """Получить пользователя из кэша или из БД"""
+        if user := self._get_fresh(discord_id):
+            return user
+
+        user = await User.find_one(User.discord_id == discord_id)
+
+        # Пока шел запрос, документ мог быть сохранен - он свежее прочитанного
+        if cached := self._get_fresh(discord_id):
+            return cached
+
+        if user is not None:
+            self.put(user)
+        return user
+
+    async def get_many(self, discord_ids: list[int]) -> dict[int, User]:
+        """Получить нескольких пользователей: недостающих в кэше - одним запросом"""
+        users = {}
+        missing = []
+        for discord_id in discord_ids:
+            if user := self._get_fresh(discord_id):
+                users[discord_id] = user
+            else:
+                missing.append(discord_id)
+
+        if missing:
+            for user in await User.find(In(User.discord_id, missing)).to_list():
+                cached = self._get_fresh(user.discord_id)
+                if cached is None:
+                    self.put(user)
+                users[user.discord_id] = cached or user
+        return users
+
+    async def preload(self, *filters) -> int:
+        """Загрузить в кэш пользователей по условию (прогрев резервного процесса)"""
+        users = await User.find(*filters).to_list()
+        for user in users[-self.max_size :]:
+            self.put(user)
+        return len(users)
+
+    def put(self, user: User):
+        """Положить (или заменить) документ в кэше"""
+        self._entries[user.discord_id] = (user, time.monotonic() + self.ttl)
+        self._entries.move_to_end(user.discord_id)
+
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def update(self, discord_id: int, fields: dict[str, Any]):
+        """Применить к закэшированному документу изменения, записанные в обход save()"""
+        if user := self._get_fresh(discord_id):
+            for key, value in fields.items():
+                setattr(user, key, value)
+
+    def invalidate(self, discord_id: int):
+        self._entries.pop(discord_id, None)
+
+    def clear(self):
+        self._entries.clear()
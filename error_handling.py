@@ -6,6 +6,9 @@ import discord
 from discord import app_commands
 
 from utils.exceptions import StaticInputRequired
+from utils.logs import bind_interaction, error_id_var
+from utils.metrics import metrics
+from utils.permissions import RankRequired
 
 _original_view_on_error = discord.ui.View.on_error
 
@@ -25,8 +28,12 @@ async def on_tree_error(
     if isinstance(error, StaticInputRequired):
         return
 
+    metrics.observe_command(interaction, interaction.command, status="error")
+
     traceback_info = traceback.format_exc()
     error_id = os.urandom(4).hex()
+    bind_interaction(interaction)
+    error_id_var.set(error_id)
 
     if isinstance(error, app_commands.CommandOnCooldown):
         await interaction.response.send_message(
@@ -34,6 +41,8 @@ async def on_tree_error(
             f"через **{error.retry_after:.2f}** сек!",
             ephemeral=True,
         )
+    elif isinstance(error, RankRequired):
+        await interaction.response.send_message(str(error), ephemeral=True)
     elif isinstance(error, app_commands.MissingPermissions):
         await interaction.response.send_message("У вас нет прав", ephemeral=True)
     elif isinstance(error, app_commands.CommandInvokeError) or isinstance(
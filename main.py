@@ -1,30 +1,77 @@
+import asyncio
 import logging
+import sys
 
 import discord
 
 import config
 from bot import Bot
-
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s [%(levelname)s] %(name)s: %(message)s",
-    datefmt="%Y-%m-%d %H:%M:%S",
-    handlers=[
-        logging.FileHandler("bot.log", encoding="utf-8"),
-        logging.StreamHandler(),
-    ],
-)
+from database import divisions, user_cache
+from database.connection import establish_db_connection
+from database.leader import LeaderElection
+from database.models import User
+from utils.logs import setup_logging
+from utils.metrics import metrics
 
 logger = logging.getLogger(__name__)
 
 
-def main():
-    token = config.TOKEN
+async def warm_caches():
+    """Прогрев кэшей резервного процесса, чтобы он мог быстро стать лидером"""
+    await divisions.load()
+    count = await user_cache.preload(User.rank != None)  # noqa: E711
+    logger.debug(f"Standby caches warmed: {count} users")
+
+
+async def run_bot():
+    await establish_db_connection()
+
+    # К Discord подключается и выполняет фоновые задачи только лидер,
+    # резервный процесс ждет освобождения аренды
+    election = LeaderElection()
+    # Проверки /healthz и /readyz нужны и резервному процессу
+    await metrics.start(election)
+    try:
+        await _run_as_leader(election)
+    finally:
+        await metrics.stop()
+
+
+async def _run_as_leader(election: LeaderElection):
+    await election.wait_for_leadership(warm_caches)
 
     intents = discord.Intents.all()
-    bot = Bot(command_prefix="!", intents=intents)
+    bot = Bot(command_prefix="!", intents=intents, http_trace=metrics.http_trace())
+    lost = asyncio.Event()
+
+    def on_lost():
+        lost.set()
+        asyncio.create_task(bot.close())
+
+    election.start_heartbeat(on_lost)
+    try:
+        async with bot:
+            await bot.start(config.TOKEN)
+    finally:
+        await election.release()
+
+    if lost.is_set():
+        # Процесс перезапустится супервизором и станет резервным
+        sys.exit(1)
+
+
+def main():
+    if "--importtime" in sys.argv:
+        # Профиль холодного импорта вместо запуска бота
+        from utils import import_profile
+
+        sys.exit(import_profile.run())
 
-    bot.run(token)
+    setup_logging()
+    try:
+        asyncio.run(run_bot())
+    except KeyboardInterrupt:
+        pass
 
 
 if __name__ == "__main__":
@@ -0,0 +1,5 @@
+import os
+
+# config.py требует эти переменные при импорте
+os.environ.setdefault("TOKEN", "test-token")
+os.environ.setdefault("ENVIRONMENT", "test")
@@ -0,0 +1,71 @@
+import asyncio
+import datetime
+from types import SimpleNamespace
+
+from utils import blacklist_sweeper as sweeper_module
+from utils import notifications
+from utils.blacklist_sweeper import NOTIFY_WINDOW, BlacklistSweeper
+
+
+class _FakeQuery:
+    def __init__(self, users):
+        self.users = users
+
+    async def to_list(self):
+        return self.users
+
+
+class _FakeCollection:
+    def __init__(self):
+        self.updates = []
+
+    async def update_many(self, query, update):
+        self.updates.append((query, update))
+
+
+def _user(discord_id: int, ends_at: datetime.datetime):
+    return SimpleNamespace(
+        discord_id=discord_id,
+        full_name="Иван Иванов",
+        static=123456,
+        blacklist=SimpleNamespace(ends_at=ends_at, reason="Нарушение"),
+    )
+
+
+def _patch(monkeypatch, users):
+    collection = _FakeCollection()
+    fake_user_model = SimpleNamespace(
+        find=lambda query: _FakeQuery(users),
+        get_pymongo_collection=lambda: collection,
+    )
+    notified, announced = [], []
+
+    async def notify(bot, discord_id):
+        notified.append(discord_id)
+
+    async def announce(self, user, old_blacklist):
+        announced.append(user.discord_id)
+
+    monkeypatch.setattr(sweeper_module, "User", fake_user_model)
+    monkeypatch.setattr(notifications, "notify_unblacklisted", notify)
+    monkeypatch.setattr(
+        sweeper_module, "user_cache", SimpleNamespace(update=lambda *args: None)
+    )
+    monkeypatch.setattr(BlacklistSweeper, "_announce", announce)
+    return collection, notified, announced
+
+
+def test_old_expired_entry_is_cleared_silently(monkeypatch):
+    now = datetime.datetime.now()
+    old = _user(1, now - NOTIFY_WINDOW - datetime.timedelta(days=3))
+    recent = _user(2, now - datetime.timedelta(minutes=1))
+    collection, notified, announced = _patch(monkeypatch, [old, recent])
+
+    sweeper = BlacklistSweeper()
+    asyncio.run(sweeper._expire([1, 2]))
+
+    # Обе записи сняты, но уведомлен только недавно истекший
+    assert len(collection.updates) == 1
+    assert sweeper.stats()["expired"] == 2
+    assert notified == [2]
+    assert announced == [2]
@@ -0,0 +1,214 @@
+import asyncio
+from types import SimpleNamespace
+
+import discord
+
+from ui.views import role_getting as role_getting_module
+from ui.views import supplies as supplies_module
+from ui.views.role_getting import ApproveRoleButton
+from ui.views.supplies import SupplyManageButton
+from utils import notifications
+from utils.deadline import DeadlineTracer
+
+DB_DELAY = 0.2
+
+
+class _FakeResponse:
+    def __init__(self):
+        self.deferred = None
+        self.edited = None
+
+    def is_done(self) -> bool:
+        return self.deferred is not None or self.edited is not None
+
+    async def defer(self, **kwargs):
+        self.deferred = kwargs
+
+    async def edit_message(self, **kwargs):
+        self.edited = kwargs
+
+
+class _FakeInteraction:
+    def __init__(self, custom_id: str = "approve_role:7"):
+        self.id = 1
+        self.type = discord.InteractionType.component
+        self.data = {"custom_id": custom_id}
+        self.created_at = discord.utils.utcnow()
+        self.extras = {}
+        self.user = SimpleNamespace(id=10, mention="<@10>", display_name="Офицер")
+        self.client = SimpleNamespace(
+            user=SimpleNamespace(id=1),
+            getch_member=self._getch_member,
+            get_channel=lambda channel_id: None,
+        )
+        self.message = SimpleNamespace(jump_url="https://discord.com/channels/1/2/3")
+        self.response = _FakeResponse()
+        self.followup = SimpleNamespace(send=self._followup_send)
+        self.original_edits = []
+        self.followups = []
+
+    async def _followup_send(self, content=None, **kwargs):
+        self.followups.append(content)
+
+    async def _getch_member(self, user_id):
+        return SimpleNamespace(id=user_id)
+
+    async def edit_original_response(self, **kwargs):
+        self.original_edits.append(kwargs)
+
+
+def _request():
+    async def save():
+        pass
+
+    async def to_embed():
+        return discord.Embed(title="Заявка")
+
+    return SimpleNamespace(
+        id=7,
+        user=20,
+        role_type=role_getting_module.RoleType.SUPPLY_ACCESS,
+        extended_data=SimpleNamespace(faction="ФСБ", full_name="Иван Иванов"),
+        approved=False,
+        checked=False,
+        save=save,
+        to_embed=to_embed,
+    )
+
+
+def _patch(monkeypatch):
+    request = _request()
+    synced, notified = [], []
+
+    async def find_one(*args):
+        await asyncio.sleep(DB_DELAY)
+        return request
+
+    async def claim_review(*args):
+        await asyncio.sleep(DB_DELAY)
+        return request
+
+    async def check_approve_permission(interaction, request):
+        return True
+
+    async def sync_member(member, user, **kwargs):
+        synced.append(member.id)
+
+    async def notify_role_approved(client, user_id, role_name):
+        notified.append((user_id, role_name))
+
+    fake_model = SimpleNamespace(id=None, checked=None, find_one=find_one)
+    monkeypatch.setattr(role_getting_module, "RoleRequest", fake_model)
+    monkeypatch.setattr(role_getting_module, "claim_review", claim_review)
+    monkeypatch.setattr(
+        role_getting_module, "check_approve_permission", check_approve_permission
+    )
+    monkeypatch.setattr(role_getting_module, "sync_member", sync_member)
+    monkeypatch.setattr(notifications, "notify_role_approved", notify_role_approved)
+    return request, synced, notified
+
+
+def test_slow_approve_completes_after_auto_defer(monkeypatch):
+    request, synced, notified = _patch(monkeypatch)
+    interaction = _FakeInteraction()
+    tracer = DeadlineTracer(near_miss_after=0.05, auto_defer_after=0.1)
+
+    async def run():
+        tracer.track(interaction)
+        await ApproveRoleButton(request.id).callback(interaction)
+
+    asyncio.run(run())
+
+    # Ответ отложен трекером, сообщение изменено через edit_original_response
+    assert interaction.response.deferred == {}
+    assert interaction.response.edited is None
+    assert len(interaction.original_edits) == 1
+    assert request.approved and request.checked
+    assert synced == [20]
+    assert notified == [(20, "Доступ к поставке")]
+    assert tracer.stats()["auto_defers_by_handler"] == {"item:approve_role": 1}
+
+
+def test_fast_approve_is_not_deferred(monkeypatch):
+    request, synced, notified = _patch(monkeypatch)
+    interaction = _FakeInteraction()
+    tracer = DeadlineTracer(near_miss_after=5, auto_defer_after=10)
+
+    async def run():
+        tracer.track(interaction)
+        await ApproveRoleButton(request.id).callback(interaction)
+
+    asyncio.run(run())
+
+    assert interaction.response.deferred is None
+    assert interaction.response.edited is not None
+    assert interaction.original_edits == []
+    assert notified == [(20, "Доступ к поставке")]
+
+
+def _patch_supplies(monkeypatch):
+    async def save():
+        pass
+
+    async def to_embed(client):
+        return discord.Embed(title="Заявка на склад")
+
+    request = SimpleNamespace(
+        id=7,
+        user_id=20,
+        items={"Бронежилет": 2},
+        status="PENDING",
+        save=save,
+        to_embed=to_embed,
+    )
+    target_user = SimpleNamespace(last_supply_at=None, save=save)
+
+    async def claim_review(*args):
+        await asyncio.sleep(DB_DELAY)
+        return request
+
+    async def check_rank_silent(interaction, min_rank):
+        return True
+
+    async def get_user(user_id):
+        await asyncio.sleep(DB_DELAY)
+        return target_user
+
+    async def check_quotas(user_id, items):
+        return True, None
+
+    async def no_other_requests():
+        return []
+
+    fake_model = SimpleNamespace(
+        id=None,
+        user_id=None,
+        status=None,
+        find=lambda *args: SimpleNamespace(to_list=no_other_requests),
+    )
+    monkeypatch.setattr(supplies_module, "SupplyRequest", fake_model)
+    monkeypatch.setattr(supplies_module, "claim_review", claim_review)
+    monkeypatch.setattr(supplies_module, "check_rank_silent", check_rank_silent)
+    monkeypatch.setattr(supplies_module, "user_cache", SimpleNamespace(get=get_user))
+    monkeypatch.setattr(supplies_module, "check_quotas", check_quotas)
+    return request, target_user
+
+
+def test_slow_supply_approve_completes_after_auto_defer(monkeypatch):
+    request, target_user = _patch_supplies(monkeypatch)
+    interaction = _FakeInteraction("supply_approve:7")
+    tracer = DeadlineTracer(near_miss_after=0.05, auto_defer_after=0.1)
+
+    async def run():
+        tracer.track(interaction)
+        await SupplyManageButton("approve", request.id).callback(interaction)
+
+    asyncio.run(run())
+
+    assert interaction.response.deferred == {}
+    assert interaction.response.edited is None
+    assert len(interaction.original_edits) == 1
+    assert request.status == "APPROVED"
+    assert target_user.last_supply_at is not None
+    assert interaction.followups == ["✅ Заявка #7 одобрена. КД установлено."]
+    assert tracer.stats()["auto_defers_by_handler"] == {"item:supply_approve": 1}
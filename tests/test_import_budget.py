@@ -0,0 +1,33 @@
+from pathlib import Path
+
+import pytest
+
+from utils import import_profile
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Пакеты-реестры, модули которых должны загружаться только при обращении
+LAZY_PACKAGES = ("ui.modals", "utils.notifications")
+
+
+@pytest.fixture(scope="module")
+def records():
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        monkeypatch.chdir(ROOT)
+        return import_profile.measure(import_profile.startup_modules())
+
+
+def test_cold_import_within_budget(records):
+    total = import_profile.total_ms(records)
+    assert total <= import_profile.IMPORT_BUDGET_MS, import_profile.format_report(
+        records
+    )
+
+
+def test_lazy_modules_not_imported(records):
+    loaded = [
+        record.module
+        for record in records
+        if record.module.startswith(tuple(f"{name}." for name in LAZY_PACKAGES))
+    ]
+    assert loaded == []
@@ -0,0 +1,36 @@
+import asyncio
+
+from utils.outbound import OutboundQueue, Priority
+
+
+def test_coalesced_job_takes_higher_priority():
+    async def run():
+        queue = OutboundQueue(concurrency=1)
+        order = []
+        release = asyncio.Event()
+
+        async def blocker():
+            await release.wait()
+
+        def action(name):
+            async def send():
+                order.append(name)
+
+            return send
+
+        # Единственный обработчик занят, пока в очередь ставятся действия
+        busy = queue.submit("channel:0", blocker, Priority.INTERACTION)
+        await asyncio.sleep(0)
+        queue.submit("channel:1", action("audit"), Priority.AUDIT)
+        queue.submit("member:1", action("old"), Priority.DM, coalesce_key="member")
+        merged = queue.submit(
+            "member:1", action("new"), Priority.INTERACTION, coalesce_key="member"
+        )
+
+        release.set()
+        await asyncio.gather(busy, merged)
+        await queue.close()
+        return order
+
+    # Объединенное действие поднялось до INTERACTION и выполнилось раньше аудита
+    assert asyncio.run(run())[0] == "new"
@@ -0,0 +1,39 @@
+"""
+Модальные окна.
+
+Модули с модалками импортируются лениво - при первом обращении к классу
+(например, modals.DismissalModal), а не при загрузке view и когов.
+"""
+
+import importlib
+
+# Класс модалки -> модуль, в котором он объявлен
+_REGISTRY = {
+    "DismissalModal": "ui.modals.dismissal",
+    "ReinstatementModal": "ui.modals.reinstatement",
+    "RoleRequestModal": "ui.modals.role_getting",
+    "SupplyAccessModal": "ui.modals.role_getting",
+    "GovEmployeeModal": "ui.modals.role_getting",
+    "StaticInputModal": "ui.modals.static_input",
+    "ItemAmountModal": "ui.modals.supplies",
+    "GiveSupplyModal": "ui.modals.supplies_audit",
+    "ClearSupplyModal": "ui.modals.supplies_audit",
+    "TimeoffRequestModal": "ui.modals.timeoff",
+    "TransferModal": "ui.modals.transfers",
+}
+
+__all__ = sorted(_REGISTRY)
+
+
+def __getattr__(name: str):
+    module_name = _REGISTRY.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    value = getattr(importlib.import_module(module_name), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_REGISTRY))
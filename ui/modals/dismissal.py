@@ -1,8 +1,8 @@
 import discord
 
-from database import divisions
+from database import divisions, user_cache
 from database.counters import get_next_id
-from database.models import DismissalRequest, DismissalType, User
+from database.models import DismissalRequest, DismissalType
 from ui.modals.labels import name_component
 
 
@@ -15,7 +15,7 @@ class DismissalModal(discord.ui.Modal):
         self.name.default = default_name
 
     async def on_submit(self, interaction: discord.Interaction):
-        user_db = await User.find_one(User.discord_id == interaction.user.id)
+        user_db = await user_cache.get(interaction.user.id)
         if not user_db or user_db.rank is None:
             await interaction.response.send_message(
                 "❌ Вы не числитесь в составе фракции.", ephemeral=True
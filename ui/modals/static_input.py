@@ -1,7 +1,7 @@
 import discord
 
 import config
-from database.models import User
+from database import user_cache
 from utils.user_data import format_game_id, formatted_static_to_int, display_rank
 
 
@@ -22,7 +22,7 @@ class StaticInputModal(discord.ui.Modal, title="Введите ваш стати
             )
             return
 
-        user = await User.find_one(User.discord_id == interaction.user.id)
+        user = await user_cache.get(interaction.user.id)
         if not user:
             await interaction.response.send_message(
                 "❌ Пользователь не найден в базе данных.", ephemeral=True
@@ -2,10 +2,10 @@ import discord.ui
 
 import config
 from config import nickname_regex
+from database import user_cache
 from database.counters import get_next_id
 from database.models import (
     RoleData,
-    User,
     TimeoffRequest,
 )
 from ui.modals.labels import (
@@ -47,7 +47,7 @@ class TimeoffRequestModal(discord.ui.Modal, title="Заявление на от
             "### Заявление отправлено на рассмотрение.", ephemeral=True
         )
 
-        requester = await User.find_one(User.discord_id == interaction.user.id)
+        requester = await user_cache.get(interaction.user.id)
         static_id = requester.static
         request = TimeoffRequest(
             id=await get_next_id("timeoff_requests"),
@@ -3,9 +3,9 @@ from discord import Interaction
 from discord._types import ClientT
 
 import config
-from database import divisions
+from database import divisions, user_cache
 from database.counters import get_next_id
-from database.models import Division, User
+from database.models import Division
 from ui.views.transfers import (
     ApproveTransferButton,
     OldApproveButton,
@@ -51,7 +51,7 @@ class TransferModal(discord.ui.Modal):
         online_prime_text = self.online_prime.value
         motivation_text = self.motivation.value
 
-        user = await User.find_one(User.discord_id == interaction.user.id)
+        user = await user_cache.get(interaction.user.id)
 
         min_rank = (
             config.RankIndex.JUNIOR_SERGEANT
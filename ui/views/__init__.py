@@ -33,22 +33,31 @@ def load_persistent_views(bot):
     bot.add_view(TimeoffApplyView())
 
 
+DYNAMIC_ITEMS = (
+    ApproveReinstatementButton,
+    ReinstatementRankSelect,
+    RejectReinstatementButton,
+    ApproveRoleButton,
+    RejectRoleButton,
+    SupplyManageButton,
+    DismissalManagementButton,
+    DismissalCancelButton,
+    TransferApply,
+    ApproveTransferButton,
+    RejectTransferButton,
+    OldApproveButton,
+    ApproveTimeoffButton,
+    RejectTimeoffButton,
+    TimeoffCancelButton,
+)
+
+
 def load_buttons(bot):
-    bot.add_dynamic_items(
-        ApproveReinstatementButton,
-        ReinstatementRankSelect,
-        RejectReinstatementButton,
-        ApproveRoleButton,
-        RejectRoleButton,
-        SupplyManageButton,
-        DismissalManagementButton,
-        DismissalCancelButton,
-        TransferApply,
-        ApproveTransferButton,
-        RejectTransferButton,
-        OldApproveButton,
-        ApproveTimeoffButton,
-        RejectTimeoffButton,
-        TimeoffCancelButton,
-    )
+    from utils.logs import bound_to_interaction
+    from utils.metrics import metrics
+
+    for item_cls in DYNAMIC_ITEMS:
+        item_cls.callback = bound_to_interaction(item_cls.callback)
+    metrics.instrument_items(*DYNAMIC_ITEMS)
+    bot.add_dynamic_items(*DYNAMIC_ITEMS)
     load_persistent_views(bot)
@@ -3,19 +3,25 @@ import logging
 import re
 
 import discord
+from beanie.odm.operators.find.comparison import In
 
 import config
-from config import INVESTIGATION_ROLE, PENALTY_ROLES, EXCLUDED_ROLES
-from database.models import Blacklist, DismissalRequest, DismissalType, User
-from ui.modals.dismissal import DismissalModal
+from config import INVESTIGATION_ROLE, PENALTY_ROLES
+from database import user_cache
+from database.models import Blacklist, DismissalRequest, DismissalType
+from database.review import claim_review, release_review
+from ui import modals
+from utils import notifications
 from utils.audit import AuditAction, audit_logger
-from utils.notifications import notify_blacklisted, notify_dismissed
+from utils.blacklist_sweeper import blacklist_sweeper
+from utils.deadline import auto_defer, defer_response, edit_response, send_response
+from utils.outbound import Priority, outbound
+from utils.permissions import check_rank, get_user_rank
+from utils.roles import sync_member
 from utils.user_data import format_game_id, get_initiator
 
 logger = logging.getLogger(__name__)
 
-closed_requests = set()
-
 
 async def open_modal(interaction: discord.Interaction, d_type: DismissalType):
     user_db = await get_initiator(interaction)
@@ -39,7 +45,7 @@ async def open_modal(interaction: discord.Interaction, d_type: DismissalType):
         return
 
     full_name = user_db.full_name or ""
-    await interaction.response.send_modal(DismissalModal(d_type, full_name))
+    await interaction.response.send_modal(modals.DismissalModal(d_type, full_name))
 
 
 async def psj_button_callback(interaction: discord.Interaction):
@@ -96,18 +102,23 @@ class DismissalManagementButton(
     discord.ui.DynamicItem[discord.ui.Button],
     template=r"dismiss_(?P<action>\w+):(?P<id>\d+)",
 ):
-    def __init__(self, action: str, request_id: int):
+    def __init__(self, action: str, request_id: int, row: int | None = None):
         labels = {"approve": "Одобрить", "reject": "Отказать"}
         styles = {
             "approve": discord.ButtonStyle.success,
             "reject": discord.ButtonStyle.danger,
         }
 
+        label = labels.get(action, action)
+        if row is not None:
+            label = f"{label} #{request_id}"  # строка группового сообщения
+
         super().__init__(
             discord.ui.Button(
-                label=labels.get(action, action),
+                label=label,
                 style=styles.get(action, discord.ButtonStyle.secondary),
                 custom_id=f"dismiss_{action}:{request_id}",
+                row=row,
             )
         )
         self.action = action
@@ -122,21 +133,24 @@ class DismissalManagementButton(
     ):
         return cls(match.group("action"), int(match.group("id")))
 
+    @auto_defer()
     async def callback(self, interaction: discord.Interaction):
-        officer = await get_initiator(interaction)
-        if not officer or (officer.rank or 0) < config.CAPTAIN_RANK_INDEX:
-            await interaction.response.send_message(
-                "❌ Доступно со звания Капитан.", ephemeral=True
-            )
+        if not await check_rank(
+            interaction, config.CAPTAIN_RANK_INDEX, "❌ Доступно со звания Капитан."
+        ):
             return
 
-        req = await DismissalRequest.find_one(DismissalRequest.id == self.request_id)
-        if not req or req.status != "PENDING" or self.request_id in closed_requests:
-            await interaction.response.send_message(
-                "❌ Заявка не найдена или уже обработана.", ephemeral=True
+        req = await claim_review(
+            DismissalRequest,
+            self.request_id,
+            interaction.user.id,
+            DismissalRequest.status == "PENDING",
+        )
+        if not req:
+            await send_response(
+                interaction, "❌ Заявка не найдена или уже обработана.", ephemeral=True
             )
             return
-        closed_requests.add(self.request_id)
 
         if self.action == "reject":
             req.status = "REJECTED"
@@ -144,8 +158,14 @@ class DismissalManagementButton(
             req.reviewed_at = datetime.datetime.now()
             await req.save()
 
+            if is_group_message(interaction.message):
+                await defer_response(interaction)
+                await refresh_group_message(interaction.client, interaction.message)
+                return
+
             embed = await req.to_embed(interaction.client)
-            await interaction.response.edit_message(
+            await edit_response(
+                interaction,
                 content=f"<@{req.user_id}> {interaction.user.mention}",
                 embed=embed,
                 view=None,
@@ -153,25 +173,27 @@ class DismissalManagementButton(
             return
 
         if self.action == "approve":
-            target_user_db = await User.find_one(User.discord_id == req.user_id)
+            target_user_db = await user_cache.get(req.user_id)
             if not target_user_db:
-                closed_requests.discard(self.request_id)
-                await interaction.response.send_message(
-                    "❌ Пользователь не найден в БД.", ephemeral=True
+                await release_review(req)
+                await send_response(
+                    interaction, "❌ Пользователь не найден в БД.", ephemeral=True
                 )
                 return
 
-            if (officer.rank or 0) <= (target_user_db.rank or 0):
-                closed_requests.discard(self.request_id)
-                await interaction.response.send_message(
+            officer_rank = await get_user_rank(interaction)
+            if (officer_rank or 0) <= (target_user_db.rank or 0):
+                await release_review(req)
+                await send_response(
+                    interaction,
                     "❌ Вы не можете уволить этого пользователя, так как его "
                     "звание выше или равно вашему.",
                     ephemeral=True,
                 )
                 return
 
-            await interaction.response.send_message(
-                "✅ Выполняются действия...", ephemeral=True
+            await send_response(
+                interaction, "✅ Выполняются действия...", ephemeral=True
             )
 
             penalty_applied = False
@@ -194,7 +216,7 @@ class DismissalManagementButton(
                 target_user_db.blacklist = blacklist
                 penalty_applied = True
 
-            audit_msg = await audit_logger.log_action(
+            audit_future = await audit_logger.log_action(
                 AuditAction.DISMISSED,
                 interaction.user,
                 req.user_id,
@@ -211,26 +233,17 @@ class DismissalManagementButton(
             target_user_db.division = None
             target_user_db.position = None
             await target_user_db.save()
+            if penalty_applied:
+                blacklist_sweeper.schedule(req.user_id, blacklist.ends_at)
 
             target_member = await interaction.client.getch_member(req.user_id)
             if target_member:
                 try:
-                    roles_to_remove = [
-                        role for role in target_member.roles
-                        if (
-                                not role.is_default()
-                                and role.id not in EXCLUDED_ROLES
-                                and role.is_assignable()
-                        )
-                    ]
-
-                    if roles_to_remove:
-                        await target_member.remove_roles(
-                            *roles_to_remove, reason=f"Увольнение по рапорту #{req.id}"
-                        )
-
-                    new_nick = f"Уволен | {req.full_name}"
-                    await target_member.edit(nick=new_nick[:32])
+                    await sync_member(
+                        target_member,
+                        target_user_db,
+                        reason=f"Увольнение по рапорту #{req.id}",
+                    )
                 except discord.Forbidden:
                     await interaction.followup.send(
                         "⚠️ Не удалось обновить роли/ник в Discord (нет прав).",
@@ -249,9 +262,12 @@ class DismissalManagementButton(
                         color=discord.Color.dark_red(),
                         timestamp=datetime.datetime.now(),
                     )
+                    officer = await user_cache.get(interaction.user.id)
                     author_name = (
                         f"Составитель: {officer.full_name} | "
                         f"{format_game_id(officer.static)}"
+                        if officer
+                        else f"Составитель: {interaction.user.display_name}"
                     )
                     bl_embed.set_author(name=author_name)
                     citizen_value = (
@@ -264,9 +280,16 @@ class DismissalManagementButton(
                         inline=False,
                     )
                     bl_embed.add_field(name="Причина", value="Неустойка", inline=False)
+                    # Ссылка на лог появится после отправки пакета аудита
+                    audit_msg = await audit_future
+                    evidence_url = (
+                        audit_msg.jump_url
+                        if audit_msg
+                        else interaction.message.jump_url
+                    )
                     bl_embed.add_field(
                         name="Доказательства",
-                        value=f"[Перейти к логу]({audit_msg.jump_url})",
+                        value=f"[Перейти к логу]({evidence_url})",
                         inline=False,
                     )
 
@@ -276,13 +299,19 @@ class DismissalManagementButton(
                     bl_embed.add_field(
                         name="Срок", value=f"14 дней (до {ends_at_fmt})", inline=False
                     )
-                    await blacklist_channel.send(
-                        content=f"-# ||<@{req.user_id}> <@{officer.discord_id}>"
+                    bl_content = (
+                        f"-# ||<@{req.user_id}> <@{interaction.user.id}>"
                         + " ".join(
                             f"<@&{mention}>" for mention in config.BLACKLIST_MENTIONS
                         )
-                        + "||",
-                        embed=bl_embed,
+                        + "||"
+                    )
+                    await outbound.run(
+                        f"channel:{blacklist_channel.id}",
+                        lambda: blacklist_channel.send(
+                            content=bl_content, embed=bl_embed
+                        ),
+                        Priority.CHANNEL,
                     )
 
             req.status = "APPROVED"
@@ -291,36 +320,47 @@ class DismissalManagementButton(
             await req.save()
 
             # Уведомление в ЛС об увольнении
-            await notify_dismissed(
+            await notifications.notify_dismissed(
                 interaction.client, req.user_id, "Увольнение по рапорту", by_report=True
             )
 
             # Уведомление о ЧС если применена неустойка
             if penalty_applied:
-                await notify_blacklisted(
+                await notifications.notify_blacklisted(
                     interaction.client, req.user_id, "Неустойка", "14 дней"
                 )
 
+            if is_group_message(interaction.message):
+                await refresh_group_message(interaction.client, interaction.message)
+                return
+
             embed = await req.to_embed(interaction.client)
             if penalty_applied:
                 embed.set_footer(text="Автоматически выдан ЧС за неустойку.")
 
-            await interaction.message.edit(
-                content=f"<@{req.user_id}> {interaction.user.mention}",
-                embed=embed,
-                view=None,
+            message = interaction.message
+            await outbound.run(
+                f"channel:{message.channel.id}",
+                lambda: message.edit(
+                    content=f"<@{req.user_id}> {interaction.user.mention}",
+                    embed=embed,
+                    view=None,
+                ),
+                Priority.INTERACTION,
+                coalesce_key=("message", message.id),
             )
 
 
 class DismissalCancelButton(
     discord.ui.DynamicItem[discord.ui.Button], template=r"dismiss:cancel:(?P<id>\d+)"
 ):
-    def __init__(self, request_id: int):
+    def __init__(self, request_id: int, row: int | None = None):
         super().__init__(
             discord.ui.Button(
-                label="Отменить",
+                label="Отменить" if row is None else f"Отменить #{request_id}",
                 style=discord.ButtonStyle.grey,
                 custom_id=f"dismiss:cancel:{request_id}",
+                row=row,
             )
         )
         self.request_id = request_id
@@ -335,11 +375,14 @@ class DismissalCancelButton(
         return cls(int(match.group("id")))
 
     async def callback(self, interaction: discord.Interaction):
-        req = await DismissalRequest.find_one(
-            DismissalRequest.id == self.request_id,
+        req = await claim_review(
+            DismissalRequest,
+            self.request_id,
+            interaction.user.id,
             DismissalRequest.user_id == interaction.user.id,
+            DismissalRequest.status == "PENDING",
         )
-        if not req or req.status != "PENDING":
+        if not req:
             await interaction.response.send_message(
                 "❌ Заявка не найдена или уже обработана.", ephemeral=True
             )
@@ -353,7 +396,10 @@ class DismissalCancelButton(
         await interaction.response.send_message(
             content="✅ Ваш рапорт был отменен.", ephemeral=True
         )
-        await interaction.message.delete()
+        if is_group_message(interaction.message):
+            await refresh_group_message(interaction.client, interaction.message)
+        else:
+            await interaction.message.delete()
 
 
 class DismissalManagementView(discord.ui.View):
@@ -362,3 +408,56 @@ class DismissalManagementView(discord.ui.View):
         self.add_item(DismissalManagementButton("approve", request_id))
         self.add_item(DismissalManagementButton("reject", request_id))
         self.add_item(DismissalCancelButton(request_id))
+
+
+class DismissalGroupView(discord.ui.View):
+    """Кнопки группового сообщения: по строке на каждый ожидающий рапорт"""
+
+    def __init__(self, request_ids: list[int]):
+        super().__init__(timeout=None)
+        for row, request_id in enumerate(request_ids):
+            self.add_item(DismissalManagementButton("approve", request_id, row=row))
+            self.add_item(DismissalManagementButton("reject", request_id, row=row))
+            self.add_item(DismissalCancelButton(request_id, row=row))
+
+
+_REQUEST_ID_PATTERN = re.compile(r"#(\d+)$")
+
+
+def is_group_message(message: discord.Message) -> bool:
+    """Сообщение с несколькими рапортами (см. cogs.auto_dismissial)"""
+    return len(message.embeds) > 1
+
+
+async def refresh_group_message(bot, message: discord.Message):
+    """
+    Перерисовать групповое сообщение по текущему состоянию рапортов в БД.
+
+    Сообщение собирается в момент отправки правки, поэтому одновременные
+    решения по разным рапортам одного сообщения схлопываются в одну правку
+    и не затирают друг друга.
+    """
+    request_ids = [
+        int(match.group(1))
+        for embed in message.embeds
+        if (match := _REQUEST_ID_PATTERN.search(embed.title or ""))
+    ]
+
+    async def edit():
+        found = await DismissalRequest.find(
+            In(DismissalRequest.id, request_ids)
+        ).to_list()
+        by_id = {req.id: req for req in found}
+        requests = [by_id[rid] for rid in request_ids if rid in by_id]
+
+        embeds = [await req.to_embed(bot) for req in requests]
+        pending = [req.id for req in requests if req.status == "PENDING"]
+        view = DismissalGroupView(pending) if pending else None
+        return await message.edit(embeds=embeds, view=view)
+
+    await outbound.run(
+        f"channel:{message.channel.id}",
+        edit,
+        Priority.INTERACTION,
+        coalesce_key=("message", message.id),
+    )
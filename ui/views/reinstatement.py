@@ -3,21 +3,21 @@ import re
 from typing import Any
 
 import discord
-from discord import Interaction, InteractionResponse, SelectOption
+from discord import Interaction, SelectOption
 from discord._types import ClientT
 
 import config
 import texts
 from config import RANKS
-from database import divisions
-from database.models import ReinstatementRequest, User
+from database import divisions, user_cache
+from database.models import ReinstatementRequest
+from database.review import claim_review, release_review
+from ui import modals
 from ui.views.indicators import indicator_view
+from utils import notifications
 from utils.audit import AuditAction, audit_logger
-from utils.notifications import (
-    notify_reinstatement_approved,
-    notify_reinstatement_rejected,
-)
-from utils.roles import to_division, to_position, to_rank
+from utils.deadline import auto_defer, edit_response, send_response
+from utils.roles import sync_member
 from utils.user_data import (
     get_full_name,
     get_initiator,
@@ -37,9 +37,7 @@ async def button_callback(interaction: discord.Interaction):
         )
         return
 
-    from ui.modals.reinstatement import ReinstatementModal
-
-    modal = ReinstatementModal(await get_full_name(interaction))
+    modal = modals.ReinstatementModal(await get_full_name(interaction))
     await interaction.response.send_modal(modal)
 
 
@@ -105,21 +103,32 @@ class ReinstatementRankSelect(
         request_id = int(match.group("id"))
         return cls(request_id)
 
+    @auto_defer()
     async def callback(self, interaction: Interaction[ClientT]) -> Any:
-        request = await ReinstatementRequest.find_one(
-            ReinstatementRequest.id == self.request_id
+        request = await claim_review(
+            ReinstatementRequest,
+            self.request_id,
+            interaction.user.id,
+            ReinstatementRequest.approved == True,  # noqa: E712
+            ReinstatementRequest.checked == False,  # noqa: E712
         )
+        if not request:
+            await send_response(
+                interaction, "Запрос не найден или уже обработан.", ephemeral=True
+            )
+            return
+
         request.approved = True
         request.checked = True
         request.rank = int(self.item.values[0])
         await request.save()
-        assert isinstance(interaction.response, InteractionResponse)
-        await interaction.response.edit_message(
+        await edit_response(
+            interaction,
             embed=await request.to_embed(),
             view=indicator_view(f"Одобрил {interaction.user.display_name}", emoji="👍"),
         )
 
-        user = await User.find_one(User.discord_id == request.user)
+        user = await user_cache.get(request.user)
 
         user.rank = request.rank
         user.division = 0
@@ -130,21 +139,14 @@ class ReinstatementRankSelect(
 
         user_discord = await interaction.client.getch_member(request.user)
 
-        remove_roles = [
-            config.RoleId.ATTESTATION.value,
-            config.RoleId.REINFORCEMENT.value,
-        ]
-        new_user_roles = [
-            role for role in user_discord.roles if role.id not in remove_roles
-        ]
-        new_user_roles = to_division(new_user_roles, user.division)
-        new_user_roles = to_rank(new_user_roles, user.rank)
-        new_user_roles = to_position(new_user_roles, user.division, user.position)
-
-        await user_discord.edit(
-            nick=user.discord_nick,
-            roles=new_user_roles,
+        await sync_member(
+            user_discord,
+            user,
             reason=f"Одобрено восстановление by {interaction.user.id}",
+            remove_role_ids=[
+                config.RoleId.ATTESTATION.value,
+                config.RoleId.REINFORCEMENT.value,
+            ],
         )
 
         await audit_logger.log_action(
@@ -155,7 +157,9 @@ class ReinstatementRankSelect(
 
         # Уведомление в ЛС
         rank_name = RANKS[request.rank] if request.rank is not None else "Неизвестно"
-        await notify_reinstatement_approved(interaction.client, request.user, rank_name)
+        await notifications.notify_reinstatement_approved(
+            interaction.client, request.user, rank_name
+        )
 
 
 basic_roles = config.RoleId.ATTESTATION, config.RoleId.REINFORCEMENT
@@ -187,12 +191,19 @@ class ApproveReinstatementButton(
         request_id = int(match.group("id"))
         return cls(request_id)
 
+    @auto_defer()
     async def callback(self, interaction: Interaction[ClientT]) -> Any:
-        request = await ReinstatementRequest.find_one(
-            ReinstatementRequest.id == self.request_id
+        request = await claim_review(
+            ReinstatementRequest,
+            self.request_id,
+            interaction.user.id,
+            ReinstatementRequest.approved == False,  # noqa: E712
+            ReinstatementRequest.checked == False,  # noqa: E712
         )
         if not request:
-            await interaction.response.send_message("Запрос не найден.", ephemeral=True)
+            await send_response(
+                interaction, "Запрос не найден или уже обработан.", ephemeral=True
+            )
             return
 
         request.approved = True
@@ -206,20 +217,22 @@ class ApproveReinstatementButton(
                     role_id=role.value,
                 )
         except Exception as e:
-            await interaction.response.send_message(
-                f"Не удалось выдать роли: {e}", ephemeral=True
+            await release_review(request)
+            await send_response(
+                interaction, f"Не удалось выдать роли: {e}", ephemeral=True
             )
             return
 
+        # Выбор звания - отдельный этап, его может выполнить другой сотрудник
+        request.claim_expires_at = None
         await request.save()
 
-        assert isinstance(interaction.response, InteractionResponse)
-
         view = discord.ui.View(timeout=None)
         view.add_item(ReinstatementRankSelect(request_id=self.request_id))
         view.add_item(RejectReinstatementButton(request_id=self.request_id))
 
-        await interaction.response.edit_message(
+        await edit_response(
+            interaction,
             content=f"-# ||<@{request.user}> <@{interaction.user.id}>||",
             embed=await request.to_embed(),
             view=view,
@@ -252,12 +265,18 @@ class RejectReinstatementButton(
         request_id = int(match.group("id"))
         return cls(request_id)
 
+    @auto_defer()
     async def callback(self, interaction: Interaction[ClientT]) -> Any:
-        request = await ReinstatementRequest.find_one(
-            ReinstatementRequest.id == self.request_id
+        request = await claim_review(
+            ReinstatementRequest,
+            self.request_id,
+            interaction.user.id,
+            ReinstatementRequest.checked == False,  # noqa: E712
         )
         if not request:
-            await interaction.response.send_message("Запрос не найден.", ephemeral=True)
+            await send_response(
+                interaction, "Запрос не найден или уже обработан.", ephemeral=True
+            )
             return
 
         request.approved = False
@@ -276,8 +295,8 @@ class RejectReinstatementButton(
                 f"Failed to remove roles from rejected user {request.user}: {e}"
             )
 
-        assert isinstance(interaction.response, InteractionResponse)
-        await interaction.response.edit_message(
+        await edit_response(
+            interaction,
             embed=await request.to_embed(),
             view=indicator_view(
                 f"Отклонил {interaction.user.display_name}", emoji="👎"
@@ -285,4 +304,6 @@ class RejectReinstatementButton(
         )
 
         # Уведомление в ЛС
-        await notify_reinstatement_rejected(interaction.client, request.user)
+        await notifications.notify_reinstatement_rejected(
+            interaction.client, request.user
+        )
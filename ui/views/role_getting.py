@@ -3,21 +3,23 @@ import re
 from typing import Any
 
 import discord
-from discord import Interaction, InteractionResponse
+from discord import Interaction
 from discord._types import ClientT
 
 import config
 import texts
-from database import divisions
+from database import user_cache
 from database.models import RoleRequest, RoleType, User
+from database.review import claim_review
+from ui import modals
 from ui.views.indicators import indicator_view
+from utils import notifications
 from utils.audit import AuditAction, audit_logger
-from utils.exceptions import StaticInputRequired
-from utils.notifications import notify_role_approved, notify_role_rejected
+from utils.deadline import auto_defer, edit_response, send_response
+from utils.permissions import resolve_interaction
+from utils.roles import sync_member
 from utils.user_data import format_game_id, get_initiator
 
-closed_requests = set()
-
 
 async def _get_user_defaults(interaction: discord.Interaction):
     """Получить данные пользователя для заполнения формы."""
@@ -64,10 +66,8 @@ async def army_button_callback(interaction: discord.Interaction):
 
     _, user_name, static_id = await _get_user_defaults(interaction)
 
-    from ui.modals.role_getting import RoleRequestModal
-
     await interaction.response.send_modal(
-        RoleRequestModal(user_name=user_name, static_id=static_id)
+        modals.RoleRequestModal(user_name=user_name, static_id=static_id)
     )
 
 
@@ -78,10 +78,8 @@ async def supply_access_button_callback(interaction: discord.Interaction):
 
     _, user_name, static_id = await _get_user_defaults(interaction)
 
-    from ui.modals.role_getting import SupplyAccessModal
-
     await interaction.response.send_modal(
-        SupplyAccessModal(user_name=user_name, static_id=static_id)
+        modals.SupplyAccessModal(user_name=user_name, static_id=static_id)
     )
 
 
@@ -92,10 +90,8 @@ async def gov_employee_button_callback(interaction: discord.Interaction):
 
     _, user_name, static_id = await _get_user_defaults(interaction)
 
-    from ui.modals.role_getting import GovEmployeeModal
-
     await interaction.response.send_modal(
-        GovEmployeeModal(user_name=user_name, static_id=static_id)
+        modals.GovEmployeeModal(user_name=user_name, static_id=static_id)
     )
 
 
@@ -158,31 +154,19 @@ async def check_approve_permission(
     interaction: Interaction[ClientT], request: RoleRequest
 ) -> bool:
     """Проверить права на одобрение заявки в зависимости от типа."""
-    try:
-        user = await get_initiator(interaction)
-    except StaticInputRequired:
-        return False
-
-    if not user:
-        return False
-
+    approver = await resolve_interaction(interaction)
     required_rank = get_required_rank(request.role_type)
 
     # Проверка по званию
-    if (user.rank or 0) >= required_rank:
+    if (approver.rank or 0) >= required_rank:
         return True
 
     # Для ВС РФ - дополнительная проверка по подразделению
-    if request.role_type == RoleType.ARMY:
-        division = divisions.get_division(user.division)
-        if not division:
-            return False
-        if division.abbreviation == "ВК":
+    if request.role_type == RoleType.ARMY and approver.division:
+        if approver.division.abbreviation == "ВК":
+            return True
+        if approver.privilege.value >= 3:
             return True
-        if division.positions:
-            for position in division.positions:
-                if position.name == user.position and position.privilege.value >= 3:
-                    return True
 
     return False
 
@@ -211,40 +195,52 @@ class ApproveRoleButton(
         request_id = int(match.group("id"))
         return cls(request_id)
 
+    @auto_defer()
     async def callback(self, interaction: Interaction[ClientT]) -> Any:
-        request = await RoleRequest.find_one(RoleRequest.id == self.request_id)
+        # Права проверяются по обычному чтению, захват - только у того, кто вправе
+        request = await RoleRequest.find_one(
+            RoleRequest.id == self.request_id,
+            RoleRequest.checked == False,  # noqa: E712
+        )
         if not request:
-            await interaction.response.send_message("Запрос не найден.", ephemeral=True)
-            return
-
-        if request.checked or self.request_id in closed_requests:
-            await interaction.response.send_message(
-                "Этот запрос уже был обработан.", ephemeral=True
+            await send_response(
+                interaction, "Запрос не найден или уже обработан.", ephemeral=True
             )
             return
-        closed_requests.add(self.request_id)
 
         # Проверка прав
         if not await check_approve_permission(interaction, request):
-            closed_requests.discard(self.request_id)
             role_names = {
                 RoleType.ARMY: "Младший лейтенант",
                 RoleType.SUPPLY_ACCESS: "Подполковник",
                 RoleType.GOV_EMPLOYEE: "Полковник",
             }
             required = role_names.get(request.role_type, "Полковник")
-            await interaction.response.send_message(
+            await send_response(
+                interaction,
                 f"У вас нет прав для одобрения этой заявки. "
                 f"Требуется звание: {required}+",
                 ephemeral=True,
             )
             return
 
+        request = await claim_review(
+            RoleRequest,
+            self.request_id,
+            interaction.user.id,
+            RoleRequest.checked == False,  # noqa: E712
+        )
+        if not request:
+            await send_response(
+                interaction, "Запрос не найден или уже обработан.", ephemeral=True
+            )
+            return
+
         request.approved = True
         request.checked = True
         await request.save()
-        assert isinstance(interaction.response, InteractionResponse)
-        await interaction.response.edit_message(
+        await edit_response(
+            interaction,
             content=f"-# ||<@{request.user}> {interaction.user.mention}||",
             embed=await request.to_embed(),
             view=indicator_view(f"Одобрил {interaction.user.display_name}", emoji="👍"),
@@ -254,7 +250,7 @@ class ApproveRoleButton(
 
         if request.role_type == RoleType.ARMY:
             # Логика для ВС РФ
-            user = await User.find_one(User.discord_id == request.user)
+            user = await user_cache.get(request.user)
             if not user:
                 user = User(discord_id=request.user)
             user.rank = 0
@@ -265,20 +261,12 @@ class ApproveRoleButton(
             user.pre_inited = True
             await user.save()
 
-            # Роли: Военнослужащий, Рядовой, Военная академия
-            role_ids = [
-                config.RoleId.MILITARY.value,
-                config.RANK_ROLES[config.RANKS[0]],
-                config.RoleId.MILITARY_ACADEMY.value,
-            ]
-            roles_to_add = [interaction.guild.get_role(role_id) for role_id in role_ids]
-            new_roles = [
-                role for role in user_discord.roles if role.id not in role_ids
-            ] + [role for role in roles_to_add if role is not None]
-            await user_discord.edit(
-                nick=user.discord_nick,
-                roles=new_roles,
+            # Роли звания и подразделения из БД + Военная академия
+            await sync_member(
+                user_discord,
+                user,
                 reason=f"Одобрено получение роли ВС РФ by {interaction.user.id}",
+                add_role_ids=[config.RoleId.MILITARY_ACADEMY.value],
             )
 
             await audit_logger.log_action(
@@ -289,38 +277,30 @@ class ApproveRoleButton(
 
         elif request.role_type == RoleType.SUPPLY_ACCESS:
             # Логика для Доступ к поставке
-            role = interaction.guild.get_role(config.RoleId.SUPPLY_ACCESS.value)
-            new_roles = list(user_discord.roles)
-            if role:
-                new_roles.append(role)
             # Ник: Фракция | Имя Фамилия
             new_nick = (
-                f"{request.extended_data.faction} | {request.extended_data.full_name}"[
-                    :32
-                ]
+                f"{request.extended_data.faction} | {request.extended_data.full_name}"
             )
-            await user_discord.edit(
-                nick=new_nick,
-                roles=new_roles,
+            await sync_member(
+                user_discord,
+                None,
                 reason=f"Одобрено роль Доступ к поставке by {interaction.user.id}",
+                add_role_ids=[config.RoleId.SUPPLY_ACCESS.value],
+                nick=new_nick,
             )
 
         elif request.role_type == RoleType.GOV_EMPLOYEE:
             # Логика для Гос. сотрудник
-            role = interaction.guild.get_role(config.RoleId.GOV_EMPLOYEE.value)
-            new_roles = list(user_discord.roles)
-            if role:
-                new_roles.append(role)
             # Ник: Фракция | Имя Фамилия
             new_nick = (
-                f"{request.extended_data.faction} | {request.extended_data.full_name}"[
-                    :32
-                ]
+                f"{request.extended_data.faction} | {request.extended_data.full_name}"
             )
-            await user_discord.edit(
-                nick=new_nick,
-                roles=new_roles,
+            await sync_member(
+                user_discord,
+                None,
                 reason=f"Одобрено роль Гос. сотрудник by {interaction.user.id}",
+                add_role_ids=[config.RoleId.GOV_EMPLOYEE.value],
+                nick=new_nick,
             )
 
         # Уведомление в ЛС
@@ -329,7 +309,7 @@ class ApproveRoleButton(
             RoleType.SUPPLY_ACCESS: "Доступ к поставке",
             RoleType.GOV_EMPLOYEE: "Гос. сотрудник",
         }
-        await notify_role_approved(
+        await notifications.notify_role_approved(
             interaction.client, request.user, role_names.get(request.role_type, "Роль")
         )
 
@@ -358,41 +338,52 @@ class RejectRoleButton(
         request_id = int(match.group("id"))
         return cls(request_id)
 
+    @auto_defer()
     async def callback(self, interaction: Interaction[ClientT]) -> Any:
-        request = await RoleRequest.find_one(RoleRequest.id == self.request_id)
+        # Права проверяются по обычному чтению, захват - только у того, кто вправе
+        request = await RoleRequest.find_one(
+            RoleRequest.id == self.request_id,
+            RoleRequest.checked == False,  # noqa: E712
+        )
         if not request:
-            await interaction.response.send_message("Запрос не найден.", ephemeral=True)
-            return
-
-        # Двойная проверка: БД (персистентная) + in-memory (быстрая)
-        if request.checked or self.request_id in closed_requests:
-            await interaction.response.send_message(
-                "Этот запрос уже был обработан.", ephemeral=True
+            await send_response(
+                interaction, "Запрос не найден или уже обработан.", ephemeral=True
             )
             return
-        closed_requests.add(self.request_id)
 
         # Проверка прав
         if not await check_approve_permission(interaction, request):
-            closed_requests.discard(self.request_id)
             role_names = {
                 RoleType.ARMY: "Младший лейтенант",
                 RoleType.SUPPLY_ACCESS: "Подполковник",
                 RoleType.GOV_EMPLOYEE: "Полковник",
             }
             required = role_names.get(request.role_type, "Полковник")
-            await interaction.response.send_message(
+            await send_response(
+                interaction,
                 f"У вас нет прав для отклонения этой заявки. "
                 f"Требуется звание: {required}+",
                 ephemeral=True,
             )
             return
 
+        request = await claim_review(
+            RoleRequest,
+            self.request_id,
+            interaction.user.id,
+            RoleRequest.checked == False,  # noqa: E712
+        )
+        if not request:
+            await send_response(
+                interaction, "Запрос не найден или уже обработан.", ephemeral=True
+            )
+            return
+
         request.approved = False
         request.checked = True
         await request.save()
-        assert isinstance(interaction.response, InteractionResponse)
-        await interaction.response.edit_message(
+        await edit_response(
+            interaction,
             content=f"-# ||<@{request.user}> {interaction.user.mention}||",
             embed=await request.to_embed(),
             view=indicator_view(
@@ -406,6 +397,6 @@ class RejectRoleButton(
             RoleType.SUPPLY_ACCESS: "Доступ к поставке",
             RoleType.GOV_EMPLOYEE: "Гос. сотрудник",
         }
-        await notify_role_rejected(
+        await notifications.notify_role_rejected(
             interaction.client, request.user, role_names.get(request.role_type, "Роль")
         )
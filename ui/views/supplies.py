@@ -1,72 +1,30 @@
 import datetime
 import logging
 import re
-from typing import Dict, Tuple
 
 import discord
+from beanie import UpdateResponse
+from beanie.odm.operators.update.general import Set
 from discord import Interaction
 
 import config
 from config import PENALTY_ROLES
+from database import user_cache
 from database.counters import get_next_id
-from database.models import SupplyRequest, User
-from ui.modals.supplies import ItemAmountModal
+from database.models import SupplyRequest
+from database.review import claim_review, release_review
+from ui import modals
+from utils.deadline import auto_defer, edit_response, send_response
+from utils.outbound import Priority, outbound
+from utils.permissions import check_rank, check_rank_silent
+from utils.supply_quotas import check_quotas
 from utils.user_data import get_initiator
 
 logger = logging.getLogger(__name__)
 
 
-def check_limits(items: Dict[str, int]) -> Tuple[bool, str]:
-    cat_counts = {cat: 0 for cat in config.SUPPLY_ITEMS}
-
-    for item_name, qty in items.items():
-        if item_name in config.SUPPLY_LIMITS:
-            if qty > config.SUPPLY_LIMITS[item_name]:
-                limit = config.SUPPLY_LIMITS[item_name]
-                return (
-                    False,
-                    f"Лимит на '{item_name}': максимум {limit} шт.",
-                )
-
-        found_cat = False
-        for cat, cat_items in config.SUPPLY_ITEMS.items():
-            if item_name in cat_items:
-                cat_counts[cat] += qty
-                found_cat = True
-                break
-
-        if not found_cat and "Misc" in cat_counts:
-            cat_counts["Misc"] += qty
-
-    if cat_counts["Оружие"] > config.SUPPLY_LIMITS.get("Оружие", 999):
-        return False, f"Лимит на Оружие: максимум {config.SUPPLY_LIMITS['Оружие']} ед."
-
-    if cat_counts["Броня"] > config.SUPPLY_LIMITS.get("Броня", 999):
-        return (
-            False,
-            f"Лимит на Бронежилеты: максимум {config.SUPPLY_LIMITS['Броня']} шт.",
-        )
-
-    mats_qty = items.get("Материалы", 0)
-    if mats_qty > config.SUPPLY_LIMITS.get("Материалы", 9999):
-        return (
-            False,
-            f"Лимит на Материалы: максимум {config.SUPPLY_LIMITS['Материалы']} ед.",
-        )
-
-    # Медикаменты (общий лимит на категорию, если есть)
-    med_limit = config.SUPPLY_LIMITS.get("Медикаменты", 999)
-    if cat_counts["Медикаменты"] > med_limit:
-        return (
-            False,
-            f"Лимит на Медикаменты (всего): максимум {med_limit} шт.",
-        )
-
-    return True, ""
-
-
 async def handle_approve(interaction: discord.Interaction, req: SupplyRequest):
-    target_user = await User.find_one(User.discord_id == req.user_id)
+    target_user = await user_cache.get(req.user_id)
 
     if target_user.last_supply_at:
         cooldown_time = target_user.last_supply_at + datetime.timedelta(hours=3)
@@ -74,13 +32,21 @@ async def handle_approve(interaction: discord.Interaction, req: SupplyRequest):
             remaining = cooldown_time - datetime.datetime.now()
             hours, remainder = divmod(int(remaining.total_seconds()), 3600)
             minutes, _ = divmod(remainder, 60)
-            await interaction.response.send_message(
+            await send_response(
+                interaction,
                 f"❌ У пользователя КД на получение склада. "
                 f"Осталось: {hours}ч {minutes}м.",
                 ephemeral=True,
             )
+            await release_review(req)
             return
 
+    is_valid, error_msg = await check_quotas(req.user_id, req.items)
+    if not is_valid:
+        await send_response(interaction, f"❌ {error_msg}", ephemeral=True)
+        await release_review(req)
+        return
+
     req.status = "APPROVED"
     req.reviewer_id = interaction.user.id
     req.reviewed_at = datetime.datetime.now()
@@ -101,7 +67,7 @@ async def handle_approve(interaction: discord.Interaction, req: SupplyRequest):
         await other.save()
 
     embed = await req.to_embed(interaction.client)
-    await interaction.response.edit_message(embed=embed, view=None)
+    await edit_response(interaction, embed=embed, view=None)
     await interaction.followup.send(
         f"✅ Заявка #{req.id} одобрена. КД установлено.", ephemeral=True
     )
@@ -125,8 +91,12 @@ async def handle_approve(interaction: discord.Interaction, req: SupplyRequest):
 
         audit_channel = interaction.client.get_channel(config.CHANNELS["storage_audit"])
         if audit_channel:
-            await audit_channel.send(
-                content=f"-# ||<@{req.user_id}>||", embed=embed_audit
+            await outbound.run(
+                f"channel:{audit_channel.id}",
+                lambda: audit_channel.send(
+                    content=f"-# ||<@{req.user_id}>||", embed=embed_audit
+                ),
+                Priority.AUDIT,
             )
 
             from cogs.supplies_audit import update_bottom_message
@@ -143,7 +113,7 @@ async def handle_reject(interaction: discord.Interaction, req: SupplyRequest):
     await req.save()
 
     embed = await req.to_embed(interaction.client)
-    await interaction.response.edit_message(embed=embed, view=None)
+    await edit_response(interaction, embed=embed, view=None)
     await interaction.followup.send(f"❌ Заявка #{req.id} отклонена.", ephemeral=True)
 
 
@@ -152,7 +122,11 @@ async def handle_edit(interaction: discord.Interaction, req: SupplyRequest):
     embed = await req.to_embed(interaction.client)
     embed.title = f"🛠 Редактирование заявки #{req.id}"
     embed.set_footer(text="Режим редактирования (Майор+)")
-    await interaction.response.send_message(embed=embed, view=view, ephemeral=True)
+    sent = await send_response(interaction, embed=embed, view=view, ephemeral=True)
+    if isinstance(sent, discord.WebhookMessage):
+        # Ответ отложен: исходный ответ - сообщение заявки в канале,
+        # поэтому конструктор обновляет свое followup-сообщение
+        view.message = sent
 
 
 class ItemSelectView(discord.ui.View):
@@ -185,7 +159,7 @@ class ItemSelectView(discord.ui.View):
         item_name = interaction.data["values"][0]
         current_qty = self.request.items.get(item_name, 0)
 
-        modal = ItemAmountModal(item_name, current_qty)
+        modal = modals.ItemAmountModal(item_name, current_qty)
         await interaction.response.send_modal(modal)
         await modal.wait()
 
@@ -197,8 +171,6 @@ class ItemSelectView(discord.ui.View):
             else:
                 self.request.items[item_name] = new_qty
 
-            await self.request.save()
-
             await self.parent_view.refresh_embed(self.parent_view.original_interaction)
             await interaction.delete_original_response()
 
@@ -224,9 +196,15 @@ class SupplyBuilderView(discord.ui.View):
         is_edit_mode: bool = False,
     ):
         super().__init__(timeout=900)
-        self.request = request
+        # В режиме редактирования корзина собирается на копии заявки
+        self.request = request.model_copy(deep=True) if is_edit_mode else request
         self.original_interaction = original_interaction
+        self.message: discord.WebhookMessage | None = None
         self.is_edit_mode = is_edit_mode
+        # Флаги ставятся до первого await: повторное нажатие или повтор
+        # взаимодействия не выделит второй ID и не создаст вторую заявку
+        self._submitting = False
+        self._submitted = False
         self.update_buttons()
 
     def update_buttons(self):
@@ -265,7 +243,9 @@ class SupplyBuilderView(discord.ui.View):
             embed.set_footer(text="Выберите категорию, чтобы добавить предметы.")
 
         try:
-            if not interaction.response.is_done():
+            if interaction is self.original_interaction and self.message:
+                await self.message.edit(embed=embed, view=self)
+            elif not interaction.response.is_done():
                 await interaction.response.edit_message(embed=embed, view=self)
             else:
                 await interaction.edit_original_response(embed=embed, view=self)
@@ -274,29 +254,53 @@ class SupplyBuilderView(discord.ui.View):
 
     async def clear_cart_callback(self, interaction: discord.Interaction):
         self.request.items = {}
-        await self.request.save()
         await self.refresh_embed(interaction)
 
     async def cancel_callback(self, interaction: discord.Interaction):
-        if not self.is_edit_mode:
-            await self.request.delete()
         await interaction.response.edit_message(
             content="❌ Действие отменено.", embed=None, view=None
         )
 
     async def submit_callback(self, interaction: discord.Interaction):
+        if self._submitting or self._submitted:
+            await interaction.response.defer()
+            return
+
+        self._submitting = True
+        try:
+            await self._submit(interaction)
+        finally:
+            self._submitting = False
+
+    async def _submit(self, interaction: discord.Interaction):
         if not self.request.items:
             await interaction.response.send_message("❌ Корзина пуста!", ephemeral=True)
             return
 
-        is_valid, error_msg = check_limits(self.request.items)
+        is_valid, error_msg = await check_quotas(
+            self.request.user_id, self.request.items
+        )
         if not is_valid:
             await interaction.response.send_message(f"❌ {error_msg}", ephemeral=True)
             return
 
-        await self.request.save()
-
         if self.is_edit_mode:
+            updated = await SupplyRequest.find_one(
+                SupplyRequest.id == self.request.id,
+                SupplyRequest.status == "PENDING",
+            ).update(
+                Set({SupplyRequest.items: self.request.items}),
+                response_type=UpdateResponse.NEW_DOCUMENT,
+            )
+            if not updated:
+                await interaction.response.edit_message(
+                    content="❌ Заявка уже обработана.", embed=None, view=None
+                )
+                return
+            self.request = updated
+            self._submitted = True
+            self.stop()
+
             # Обновляем оригинальное сообщение в канале
             if self.request.message_id:
                 channel = interaction.client.get_channel(
@@ -329,9 +333,13 @@ class SupplyBuilderView(discord.ui.View):
                     )
                     return
 
+            # ID выделяется и заявка сохраняется только при отправке
+            self.request.id = await get_next_id("supply_requests")
             self.request.status = "PENDING"
             self.request.created_at = datetime.datetime.now()
-            await self.request.save()
+            await self.request.create()
+            self._submitted = True
+            self.stop()
 
             channel = interaction.client.get_channel(
                 config.CHANNELS["storage_requests"]
@@ -344,8 +352,7 @@ class SupplyBuilderView(discord.ui.View):
                     embed=embed,
                     view=manage_view,
                 )
-                self.request.message_id = message.id
-                await self.request.save()
+                await self.request.set({SupplyRequest.message_id: message.id})
 
                 from cogs.supplies import update_bottom_message
 
@@ -389,42 +396,40 @@ class SupplyManageButton(
     ):
         return cls(match.group("action"), int(match.group("id")))
 
+    @auto_defer()
     async def callback(self, interaction: Interaction) -> None:
-        req = await SupplyRequest.find_one(SupplyRequest.id == self.request_id)
-        if not req:
-            await interaction.response.send_message(
-                "❌ Заявка не найдена в базе данных.", ephemeral=True
-            )
-            return
+        is_major = await check_rank_silent(interaction, config.RankIndex.MAJOR)
 
-        if req.status != "PENDING":
-            await interaction.response.send_message(
-                f"❌ Эта заявка уже обработана (Статус: {req.status}).", ephemeral=True
+        # Проверка прав: Майор и выше (редактировать может и автор заявки)
+        if self.action != "edit" and not is_major:
+            await send_response(
+                interaction,
+                "❌ У вас недостаточно прав для этого действия (Требуется: Майор+).",
+                ephemeral=True,
             )
             return
 
-        user = await get_initiator(interaction)
+        # Автор без звания Майора захватывает только свою заявку
+        pending = [SupplyRequest.status == "PENDING"]
+        if not is_major:
+            pending.append(SupplyRequest.user_id == interaction.user.id)
 
-        if self.action == "edit":
-            if user.discord_id != req.user_id and (user.rank or 0) < 12:
-                await interaction.response.send_message(
-                    "❌ У вас недостаточно прав для этого действия (Требуется: Майор+).",
-                    ephemeral=True,
-                )
-                return
-            await handle_edit(interaction, req)
-            return
-
-
-        # Проверка прав: Майор и выше. Индекс Майора = 12
-        if (user.rank or 0) < 12:
-            await interaction.response.send_message(
-                "❌ У вас недостаточно прав для этого действия (Требуется: Майор+).",
+        req = await claim_review(
+            SupplyRequest, self.request_id, interaction.user.id, *pending
+        )
+        if not req:
+            await send_response(
+                interaction,
+                "❌ Заявка не найдена, уже обработана или рассматривается.",
                 ephemeral=True,
             )
             return
 
-        if self.action == "approve":
+        if self.action == "edit":
+            # Изменения сохраняются условным обновлением, захват не держим
+            await release_review(req)
+            await handle_edit(interaction, req)
+        elif self.action == "approve":
             await handle_approve(interaction, req)
         elif self.action == "reject":
             await handle_reject(interaction, req)
@@ -451,12 +456,11 @@ class SupplyCreateView(discord.ui.View):
     async def create_request(
         self, interaction: discord.Interaction, button: discord.ui.Button
     ):
-        user = await get_initiator(interaction)
-
-        if not user or (user.rank or 0) < 4:
-            await interaction.response.send_message(
-                "❌ Доступно со звания Старший Сержант.", ephemeral=True
-            )
+        if not await check_rank(
+            interaction,
+            config.RankIndex.SENIOR_SERGEANT,
+            "❌ Доступно со звания Старший Сержант.",
+        ):
             return
 
         user_roles = [role.id for role in interaction.user.roles]
@@ -480,9 +484,8 @@ class SupplyCreateView(discord.ui.View):
             )
             return
 
-        new_id = await get_next_id("supply_requests")
-        req = SupplyRequest(id=new_id, user_id=interaction.user.id, status="DRAFT")
-        await req.create()
+        # Черновик живет только в памяти view до отправки
+        req = SupplyRequest(id=0, user_id=interaction.user.id, status="DRAFT")
 
         view = SupplyBuilderView(req, interaction)
         embed = await req.to_embed(interaction.client)
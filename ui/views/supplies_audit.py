@@ -2,32 +2,18 @@ import discord
 
 import config
 import texts
-from ui.modals.supplies_audit import ClearSupplyModal, GiveSupplyModal
-from utils.user_data import get_initiator
+from ui import modals
+from utils.permissions import rank_required
 
 
+@rank_required(config.RankIndex.MAJOR)
 async def give_button_callback(interaction: discord.Interaction):
-    user = await get_initiator(interaction)
-
-    if not user or (user.rank or 0) < config.RankIndex.MAJOR:
-        await interaction.response.send_message(
-            "❌ Доступно со звания Майор.", ephemeral=True
-        )
-        return
-
-    await interaction.response.send_modal(GiveSupplyModal())
+    await interaction.response.send_modal(modals.GiveSupplyModal())
 
 
+@rank_required(config.RankIndex.MAJOR)
 async def clear_button_callback(interaction: discord.Interaction):
-    user = await get_initiator(interaction)
-
-    if not user or (user.rank or 0) < config.RankIndex.MAJOR:
-        await interaction.response.send_message(
-            "❌ Доступно со звания Майор.", ephemeral=True
-        )
-        return
-
-    await interaction.response.send_modal(ClearSupplyModal())
+    await interaction.response.send_modal(modals.ClearSupplyModal())
 
 
 class SupplyAuditView(discord.ui.LayoutView):
@@ -3,19 +3,20 @@ import re
 from typing import Any
 
 import discord
-from discord import Interaction, InteractionResponse
+from discord import Interaction
 from discord._types import ClientT
 
 import config
 from database.models import TimeoffRequest
+from database.review import claim_review
 from texts import timeoff_title, timeoff_submission, timeoff_description
+from ui import modals
 from ui.views.indicators import indicator_view
-from utils.exceptions import StaticInputRequired
-from utils.notifications import notify_timeoff_approved, notify_timeoff_rejected
+from utils import notifications
+from utils.deadline import auto_defer, edit_response, send_response
+from utils.permissions import check_rank_silent
 from utils.user_data import format_game_id, get_initiator
 
-closed_requests = set()
-
 MSK = datetime.timezone(datetime.timedelta(hours=3))
 
 async def _get_user_defaults(interaction: discord.Interaction):
@@ -83,9 +84,8 @@ async def timeoff_button_callback(interaction: discord.Interaction):
 
     _, user_name, static_id = await _get_user_defaults(interaction)
 
-    from ui.modals.timeoff import TimeoffRequestModal
     await interaction.response.send_modal(
-        TimeoffRequestModal(user_name=user_name)
+        modals.TimeoffRequestModal(user_name=user_name)
     )
 
 
@@ -113,23 +113,9 @@ class TimeoffApplyView(discord.ui.LayoutView):
     container.add_item(action_row)
 
 
-async def check_approve_permission(
-    interaction: Interaction[ClientT], request: TimeoffRequest
-) -> bool:
-    """Проверить права на одобрение заявки в зависимости от типа."""
-    try:
-        user = await get_initiator(interaction)
-    except StaticInputRequired:
-        return False
-
-    if not user:
-        return False
-
-    # Проверка по званию
-    if (user.rank or 0) >= config.RankIndex.MAJOR:
-        return True
-
-    return False
+async def check_approve_permission(interaction: Interaction[ClientT]) -> bool:
+    """Проверить права на рассмотрение заявки (от заявки не зависят)."""
+    return await check_rank_silent(interaction, config.RankIndex.MAJOR)
 
 
 class ApproveTimeoffButton(
@@ -156,41 +142,42 @@ class ApproveTimeoffButton(
         request_id = int(match.group("id"))
         return cls(request_id)
 
+    @auto_defer()
     async def callback(self, interaction: Interaction[ClientT]) -> Any:
-        request = await TimeoffRequest.find_one(TimeoffRequest.id == self.request_id)
-        if not request:
-            await interaction.response.send_message("Запрос не найден.", ephemeral=True)
-            return
-
-        if request.checked or self.request_id in closed_requests:
-            await interaction.response.send_message(
-                "Этот запрос уже был обработан.", ephemeral=True
-            )
-            return
-        closed_requests.add(self.request_id)
-
-        # Проверка прав
-        if not await check_approve_permission(interaction, request):
-            closed_requests.discard(self.request_id)
-            await interaction.response.send_message(
+        # Проверка прав до захвата: отказ не блокирует заявку для других
+        if not await check_approve_permission(interaction):
+            await send_response(
+                interaction,
                 f"У вас нет прав для одобрения этой заявки. "
                 f"Требуется звание: Майор+",
                 ephemeral=True,
             )
             return
 
+        request = await claim_review(
+            TimeoffRequest,
+            self.request_id,
+            interaction.user.id,
+            TimeoffRequest.checked == False,  # noqa: E712
+        )
+        if not request:
+            await send_response(
+                interaction, "Запрос не найден или уже обработан.", ephemeral=True
+            )
+            return
+
         request.approved = True
         request.checked = True
         request.reviewed_at = datetime.datetime.now(MSK)
         await request.save()
-        assert isinstance(interaction.response, InteractionResponse)
-        await interaction.response.edit_message(
+        await edit_response(
+            interaction,
             content=f"-# ||<@{request.user_id}> {interaction.user.mention}||",
             embed=await request.to_embed(),
             view=indicator_view(f"Одобрил {interaction.user.display_name}", emoji="👍"),
         )
 
-        await notify_timeoff_approved(
+        await notifications.notify_timeoff_approved(
             interaction.client, request.user_id
         )
 
@@ -219,36 +206,36 @@ class RejectTimeoffButton(
         request_id = int(match.group("id"))
         return cls(request_id)
 
+    @auto_defer()
     async def callback(self, interaction: Interaction[ClientT]) -> Any:
-        request = await TimeoffRequest.find_one(TimeoffRequest.id == self.request_id)
-        if not request:
-            await interaction.response.send_message("Запрос не найден.", ephemeral=True)
-            return
-
-        # Двойная проверка: БД (персистентная) + in-memory (быстрая)
-        if request.checked or self.request_id in closed_requests:
-            await interaction.response.send_message(
-                "Этот запрос уже был обработан.", ephemeral=True
-            )
-            return
-        closed_requests.add(self.request_id)
-
-        # Проверка прав
-        if not await check_approve_permission(interaction, request):
-            closed_requests.discard(self.request_id)
-            await interaction.response.send_message(
+        # Проверка прав до захвата: отказ не блокирует заявку для других
+        if not await check_approve_permission(interaction):
+            await send_response(
+                interaction,
                 f"У вас нет прав для отклонения этой заявки. "
                 f"Требуется звание: Майор+",
                 ephemeral=True,
             )
             return
 
+        request = await claim_review(
+            TimeoffRequest,
+            self.request_id,
+            interaction.user.id,
+            TimeoffRequest.checked == False,  # noqa: E712
+        )
+        if not request:
+            await send_response(
+                interaction, "Запрос не найден или уже обработан.", ephemeral=True
+            )
+            return
+
         request.approved = False
         request.checked = True
         request.reviewed_at = datetime.datetime.now(MSK)
         await request.save()
-        assert isinstance(interaction.response, InteractionResponse)
-        await interaction.response.edit_message(
+        await edit_response(
+            interaction,
             content=f"-# ||<@{request.user_id}> {interaction.user.mention}||",
             embed=await request.to_embed(),
             view=indicator_view(
@@ -256,7 +243,7 @@ class RejectTimeoffButton(
             ),
         )
 
-        await notify_timeoff_rejected(
+        await notifications.notify_timeoff_rejected(
             interaction.client, request.user_id
         )
 
@@ -283,11 +270,14 @@ class TimeoffCancelButton(
         return cls(int(match.group("id")))
 
     async def callback(self, interaction: discord.Interaction):
-        req = await TimeoffRequest.find_one(
-            TimeoffRequest.id == self.request_id,
+        req = await claim_review(
+            TimeoffRequest,
+            self.request_id,
+            interaction.user.id,
             TimeoffRequest.user_id == interaction.user.id,
+            TimeoffRequest.checked == False,  # noqa: E712
         )
-        if not req or req.checked == True:
+        if not req:
             await interaction.response.send_message(
                 "❌ Заявка не найдена или уже обработана.", ephemeral=True
             )
@@ -4,16 +4,19 @@ from typing import Any
 
 import discord
 from beanie.odm.operators.find.comparison import NotIn
-from discord import Interaction, InteractionResponse
+from discord import Interaction
 from discord._types import ClientT
 
 import config
-from database import divisions
+from database import divisions, user_cache
 from database.models import Division, TransferRequest, User
+from database.review import claim_review
+from ui import modals
 from ui.views.indicators import indicator_view
+from utils import notifications
 from utils.audit import AuditAction, audit_logger
-from utils.notifications import notify_transfer_approved, notify_transfer_rejected
-from utils.roles import to_division, to_position
+from utils.deadline import auto_defer, edit_response, send_response
+from utils.roles import sync_member
 from utils.user_data import get_initiator
 
 
@@ -109,10 +112,8 @@ class TransferApply(
         if user and user.full_name:
             user_name = user.full_name
 
-        from ui.modals.transfers import TransferModal
-
         await interaction.response.send_modal(
-            TransferModal(destination=self.division, default_nickname=user_name)
+            modals.TransferModal(destination=self.division, default_nickname=user_name)
         )
 
 
@@ -144,23 +145,46 @@ class OldApproveButton(
         division_id = int(match.group("div"))
         return cls(request_id, division_id)
 
+    @auto_defer()
     async def callback(self, interaction: Interaction[ClientT]) -> Any:
-        request = await TransferRequest.find_one(TransferRequest.id == self.request_id)
+        # Права проверяются по обычному чтению, захват - только у того, кто вправе
+        request = await TransferRequest.find_one(
+            TransferRequest.id == self.request_id,
+            TransferRequest.status == "OLD_DIVISION_REVIEW",
+        )
         if not request:
-            await interaction.response.send_message("Запрос не найден.", ephemeral=True)
+            await send_response(
+                interaction, "Запрос не найден или уже обработан.", ephemeral=True
+            )
             return
 
         officer = await get_initiator(interaction)
 
         if not can_user_handle_transfer(officer, [request.old_division_id]):
-            await interaction.response.send_message(
-                "У вас нет прав взаимодействовать с этой кнопкой.", ephemeral=True
+            await send_response(
+                interaction,
+                "У вас нет прав взаимодействовать с этой кнопкой.",
+                ephemeral=True,
+            )
+            return
+
+        request = await claim_review(
+            TransferRequest,
+            self.request_id,
+            interaction.user.id,
+            TransferRequest.status == "OLD_DIVISION_REVIEW",
+        )
+        if not request:
+            await send_response(
+                interaction, "Запрос не найден или уже обработан.", ephemeral=True
             )
             return
 
         request.status = "NEW_DIVISION_REVIEW"
         request.old_reviewer_id = interaction.user.id
         request.old_reviewed_at = datetime.datetime.now()
+        # Следующий этап рассматривает новое подразделение
+        request.claim_expires_at = None
         await request.save()
 
         view = discord.ui.View(timeout=None)
@@ -178,8 +202,8 @@ class OldApproveButton(
             if pos.privilege.value >= 2
         ]
 
-        assert isinstance(interaction.response, InteractionResponse)
-        await interaction.response.edit_message(
+        await edit_response(
+            interaction,
             content="-# " + " ".join(mentions),
             embed=await request.to_embed(interaction.client),
             view=view,
@@ -218,16 +242,37 @@ class ApproveTransferButton(
         div_id = int(match.group("div"))
         return cls(request_id, div_id)
 
+    @auto_defer()
     async def callback(self, interaction: Interaction[ClientT]) -> Any:
-        request = await TransferRequest.find_one(TransferRequest.id == self.request_id)
+        # Права проверяются по обычному чтению, захват - только у того, кто вправе
+        request = await TransferRequest.find_one(
+            TransferRequest.id == self.request_id,
+            TransferRequest.status == "NEW_DIVISION_REVIEW",
+        )
         if not request:
-            await interaction.response.send_message("Запрос не найден.", ephemeral=True)
+            await send_response(
+                interaction, "Запрос не найден или уже обработан.", ephemeral=True
+            )
             return
 
         officer = await get_initiator(interaction)
         if not can_user_handle_transfer(officer, [request.new_division_id]):
-            await interaction.response.send_message(
-                "У вас нет прав взаимодействовать с этой кнопкой.", ephemeral=True
+            await send_response(
+                interaction,
+                "У вас нет прав взаимодействовать с этой кнопкой.",
+                ephemeral=True,
+            )
+            return
+
+        request = await claim_review(
+            TransferRequest,
+            self.request_id,
+            interaction.user.id,
+            TransferRequest.status == "NEW_DIVISION_REVIEW",
+        )
+        if not request:
+            await send_response(
+                interaction, "Запрос не найден или уже обработан.", ephemeral=True
             )
             return
 
@@ -236,13 +281,13 @@ class ApproveTransferButton(
         request.new_reviewed_at = datetime.datetime.now()
         await request.save()
 
-        assert isinstance(interaction.response, InteractionResponse)
-        await interaction.response.edit_message(
+        await edit_response(
+            interaction,
             embed=await request.to_embed(interaction.client),
             view=indicator_view("Одобрено", emoji="👍"),
         )
 
-        user = await User.find_one(User.discord_id == request.user_id)
+        user = await user_cache.get(request.user_id)
         user.division = request.new_division_id
         user.first_name, user.last_name = request.full_name.split(" ", 1)
         user.position = (
@@ -251,12 +296,8 @@ class ApproveTransferButton(
         await user.save()
 
         user_discord = await interaction.client.getch_member(request.user_id)
-        new_roles = to_division(user_discord.roles, self.division.division_id)
-        new_roles = to_position(new_roles, user.division, user.position)
-        await user_discord.edit(
-            nick=user.discord_nick,
-            roles=new_roles,
-            reason=f"Одобрен перевод by {interaction.user.id}",
+        await sync_member(
+            user_discord, user, reason=f"Одобрен перевод by {interaction.user.id}"
         )
 
         action = (
@@ -269,7 +310,7 @@ class ApproveTransferButton(
         )
 
         # Уведомление в ЛС
-        await notify_transfer_approved(
+        await notifications.notify_transfer_approved(
             interaction.client, request.user_id, self.division.name
         )
 
@@ -315,13 +356,6 @@ class RejectTransferButton(
             )
             return
 
-        if officer.division == request.old_division_id:
-            request.old_reviewer_id = interaction.user.id
-            request.old_reviewed_at = datetime.datetime.now()
-        else:
-            request.new_reviewer_id = interaction.user.id
-            request.new_reviewed_at = datetime.datetime.now()
-
         modal = discord.ui.Modal(title="Отклонение заявления на перевод")
         reason_input = discord.ui.TextInput(
             label="Причина отклонения",
@@ -332,20 +366,44 @@ class RejectTransferButton(
         )
         modal.add_item(reason_input)
 
+        @auto_defer()
         async def on_modal_submit(modal_interaction: discord.Interaction):
+            request = await claim_review(
+                TransferRequest,
+                self.request_id,
+                interaction.user.id,
+                NotIn(TransferRequest.status, ["APPROVED", "REJECTED"]),
+            )
+            if not request:
+                await send_response(
+                    modal_interaction,
+                    "Запрос не найден или уже обработан.",
+                    ephemeral=True,
+                )
+                return
+
+            if officer.division == request.old_division_id:
+                request.old_reviewer_id = interaction.user.id
+                request.old_reviewed_at = datetime.datetime.now()
+            else:
+                request.new_reviewer_id = interaction.user.id
+                request.new_reviewed_at = datetime.datetime.now()
+
             reason = reason_input.value
             request.reject_reason = reason
             request.status = "REJECTED"
             await request.save()
 
-            assert isinstance(interaction.response, InteractionResponse)
-            await modal_interaction.response.edit_message(
+            await edit_response(
+                modal_interaction,
                 embed=await request.to_embed(interaction.client),
                 view=indicator_view("Отклонено", emoji="👎"),
             )
 
             # Уведомление в ЛС
-            await notify_transfer_rejected(interaction.client, request.user_id, reason)
+            await notifications.notify_transfer_rejected(
+                interaction.client, request.user_id, reason
+            )
 
         modal.on_submit = on_modal_submit
         await interaction.response.send_modal(modal)
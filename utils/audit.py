@@ -1,3 +1,7 @@
+import asyncio
+import logging
+from collections import deque
+from dataclasses import dataclass
 from enum import StrEnum
 from typing import TYPE_CHECKING
 
@@ -7,10 +11,13 @@ import config
 
 if TYPE_CHECKING:
     from bot import Bot
-from database import divisions
-from database.models import User
+from database import divisions, user_cache
+from database.models import AuditEvent, User
+from utils.outbound import Priority, outbound
 from utils.user_data import format_game_id, display_rank
 
+logger = logging.getLogger(__name__)
+
 
 class AuditAction(StrEnum):
     INVITED = "Принятие на службу"
@@ -57,13 +64,48 @@ action_emojis = {
 channel_id = config.CHANNELS["audit"]
 
 
+FLUSH_INTERVAL = 2.0  # секунд
+MAX_EMBEDS_PER_MESSAGE = 10
+MAX_EMBEDS_LENGTH = 6000  # лимит Discord на суммарный размер embed'ов
+
+
+@dataclass
+class _AuditEntry:
+    embed: discord.Embed
+    mentions: set[int]
+    event: AuditEvent
+    future: asyncio.Future
+
+
 class AuditLogger:
+    """
+    Журнал аудита.
+
+    log_action сразу собирает embed (снимок данных на момент действия) и ставит
+    его в очередь. Фоновая задача отправляет записи по порядку, упаковывая до
+    10 embed'ов в одно сообщение. Пакет отправляется, когда он заполнен или
+    через FLUSH_INTERVAL после первой записи. После отправки записи пакета
+    сохраняются в коллекцию audit_events одним insert_many.
+    """
+
     def __init__(self):
         self.bot: Bot | None = None
+        self._queue: deque[_AuditEntry] = deque()
+        self._wakeup: asyncio.Event | None = None
+        self._flusher: asyncio.Task | None = None
+        self._sent_messages = 0
+        self._sent_entries = 0
+        self._failed_entries = 0
 
     def set_bot(self, bot: "Bot"):
         self.bot = bot
 
+    def _ensure_flusher(self):
+        if self._wakeup is None:
+            self._wakeup = asyncio.Event()
+        if self._flusher is None or self._flusher.done():
+            self._flusher = asyncio.create_task(self._flush_loop())
+
     async def log_action(
         self,
         action: AuditAction,
@@ -71,7 +113,14 @@ class AuditLogger:
         target: discord.Member | discord.User | int | str,
         display_info: User | None = None,
         additional_info: dict[str, str] | None = None,
-    ):
+    ) -> asyncio.Future:
+        """
+        Поставить запись в журнал аудита.
+
+        Returns:
+            Future, который получит сообщение журнала после отправки пакета
+            (None, если отправить не удалось)
+        """
         mentions = set()
         if isinstance(target, (discord.Member, discord.User)):
             mentions.add(target.id)
@@ -79,15 +128,15 @@ class AuditLogger:
             mentions.add(target)
         mentions.add(initiator.id)
 
-        initiator_info = await User.find_one(User.discord_id == initiator.id)
+        initiator_info = await user_cache.get(initiator.id)
 
         target_info = None
         if display_info is not None:
             target_info = display_info
         elif isinstance(target, (discord.Member, discord.User)):
-            target_info = await User.find_one(User.discord_id == target.id)
+            target_info = await user_cache.get(target.id)
         elif isinstance(target, int):
-            target_info = await User.find_one(User.discord_id == target)
+            target_info = await user_cache.get(target)
 
         embed = discord.Embed(
             title=f"{action_emojis[action]} {action.value}",
@@ -121,18 +170,106 @@ class AuditLogger:
         if target_info and target_info.position is not None:
             embed.add_field(name="Должность", value=target_info.position, inline=False)
         embed.set_footer(text="Записано в журнал аудита")
+
+        for key, value in (additional_info or {}).items():
+            embed.add_field(name=key, value=value, inline=False)
+
+        if isinstance(target, (discord.Member, discord.User)):
+            target_id = target.id
+        elif isinstance(target, int):
+            target_id = target
+        else:
+            target_id = None
+
+        event = AuditEvent(
+            action=action.value,
+            initiator_id=initiator.id,
+            target_id=target_id,
+            target=None if target_id else str(target),
+            full_name=target_info.full_name if target_info else None,
+            static=target_info.static if target_info else None,
+            rank=target_info.rank if target_info else None,
+            division=target_info.division if target_info else None,
+            position=target_info.position if target_info else None,
+            additional_info=additional_info or {},
+        )
+
+        self._ensure_flusher()
+        future = asyncio.get_running_loop().create_future()
+        self._queue.append(_AuditEntry(embed, mentions, event, future))
+        self._wakeup.set()
+        return future
+
+    def _take_batch(self) -> list[_AuditEntry]:
+        batch = []
+        length = 0
+        while self._queue and len(batch) < MAX_EMBEDS_PER_MESSAGE:
+            entry_length = len(self._queue[0].embed)
+            if batch and length + entry_length > MAX_EMBEDS_LENGTH:
+                break
+            batch.append(self._queue.popleft())
+            length += entry_length
+        return batch
+
+    async def _flush_loop(self):
+        while True:
+            if not self._queue:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+
+            # Даем пакету набраться, если он еще не полон
+            if len(self._queue) < MAX_EMBEDS_PER_MESSAGE:
+                await asyncio.sleep(FLUSH_INTERVAL)
+
+            while self._queue:
+                await self._send_batch(self._take_batch())
+
+    async def _send_batch(self, batch: list[_AuditEntry]):
+        mentions = []
+        for entry in batch:
+            mentions.extend(uid for uid in entry.mentions if uid not in mentions)
         mention_text = (
             ("-# ||" + " ".join(f"<@{uid}>" for uid in mentions) + "||")
             if mentions
             else None
         )
+        embeds = [entry.embed for entry in batch]
 
-        for key, value in (additional_info or {}).items():
-            embed.add_field(name=key, value=value, inline=False)
+        try:
+            channel = self.bot.get_channel(channel_id)
+            message = await outbound.run(
+                f"channel:{channel_id}",
+                lambda: channel.send(content=mention_text, embeds=embeds),
+                Priority.AUDIT,
+            )
+        except Exception as e:
+            logger.error(f"Failed to send {len(batch)} audit entries: {e}")
+            self._failed_entries += len(batch)
+            message = None
+        else:
+            self._sent_messages += 1
+            self._sent_entries += len(batch)
 
-        return await self.bot.get_channel(channel_id).send(
-            content=mention_text, embed=embed
-        )
+        events = [entry.event for entry in batch]
+        for event in events:
+            event.message_url = message.jump_url if message else None
+        try:
+            await AuditEvent.insert_many(events)
+        except Exception as e:
+            logger.error(f"Failed to store {len(events)} audit events: {e}")
+
+        for entry in batch:
+            if not entry.future.done():
+                entry.future.set_result(message)
+
+    def stats(self) -> dict[str, int]:
+        """Очередь журнала аудита для метрик"""
+        return {
+            "backlog": len(self._queue),
+            "sent_messages": self._sent_messages,
+            "sent_entries": self._sent_entries,
+            "failed_entries": self._failed_entries,
+        }
 
 
 audit_logger = AuditLogger()
@@ -0,0 +1,165 @@
+import asyncio
+import datetime
+import heapq
+import logging
+
+import discord
+
+import config
+from database import user_cache
+from database.models import User
+from utils import notifications
+from utils.outbound import Priority, outbound
+from utils.user_data import format_game_id
+
+logger = logging.getLogger(__name__)
+
+LOOKAHEAD = datetime.timedelta(hours=1)  # на сколько вперед загружаются сроки
+BATCH_SIZE = 100
+# Сроки, истекшие раньше, чем одно окно назад (например, пока бот был
+# выключен), снимаются без ЛС и объявлений
+NOTIFY_WINDOW = LOOKAHEAD
+
+
+class BlacklistSweeper:
+    """
+    Снимает истекшие черные списки.
+
+    Ближайшие сроки окончания (в пределах LOOKAHEAD) держатся в куче, и задача
+    спит до ближайшего из них. Истекшие записи снимаются пакетами через
+    update_many; о каждом снятии пользователь получает ЛС, а в канал черного
+    списка отправляется сообщение. Перед снятием срок проверяется по БД,
+    поэтому продленные или уже снятые вручную записи не затрагиваются.
+    Давно истекшие записи (старше NOTIFY_WINDOW) снимаются молча.
+    """
+
+    def __init__(self):
+        self.bot = None
+        self._heap: list[tuple[datetime.datetime, int]] = []
+        self._wakeup: asyncio.Event | None = None
+        self._task: asyncio.Task | None = None
+        self._expired = 0
+
+    def start(self, bot):
+        self.bot = bot
+        self._wakeup = asyncio.Event()
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    def stop(self):
+        if self._task:
+            self._task.cancel()
+            self._task = None
+
+    def schedule(self, discord_id: int, ends_at: datetime.datetime | None):
+        """Добавить срок окончания черного списка в расписание"""
+        if ends_at is None:
+            return
+        heapq.heappush(self._heap, (ends_at, discord_id))
+        if self._wakeup:
+            self._wakeup.set()
+
+    async def _load(self, until: datetime.datetime):
+        collection = User.get_pymongo_collection()
+        cursor = collection.find(
+            {"blacklist.ends_at": {"$ne": None, "$lte": until}},
+            {"_id": 0, "discord_id": 1, "blacklist.ends_at": 1},
+        )
+        async for doc in cursor:
+            self.schedule(doc["discord_id"], doc["blacklist"]["ends_at"])
+
+    async def _run(self):
+        await self.bot.wait_until_ready()
+        next_reload = datetime.datetime.now()
+
+        while True:
+            now = datetime.datetime.now()
+            try:
+                if now >= next_reload:
+                    self._heap.clear()
+                    next_reload = now + LOOKAHEAD
+                    await self._load(next_reload)
+
+                due = set()
+                while self._heap and self._heap[0][0] <= now:
+                    due.add(heapq.heappop(self._heap)[1])
+                if due:
+                    await self._expire(list(due))
+            except Exception as e:
+                logger.error(f"Blacklist sweep failed: {e}")
+
+            wake_at = min(self._heap[0][0], next_reload) if self._heap else next_reload
+            timeout = max((wake_at - datetime.datetime.now()).total_seconds(), 0)
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _expire(self, discord_ids: list[int]):
+        now = datetime.datetime.now()
+        for start in range(0, len(discord_ids), BATCH_SIZE):
+            query = {
+                "discord_id": {"$in": discord_ids[start : start + BATCH_SIZE]},
+                "blacklist.ends_at": {"$ne": None, "$lte": now},
+            }
+            users = await User.find(query).to_list()
+            if not users:
+                continue
+
+            await User.get_pymongo_collection().update_many(
+                query, {"$set": {"blacklist": None}}
+            )
+            logger.info(f"Removed {len(users)} expired blacklist entries")
+            self._expired += len(users)
+
+            stale = 0
+            for user in users:
+                old_blacklist = user.blacklist
+                user_cache.update(user.discord_id, {"blacklist": None})
+                if old_blacklist.ends_at < now - NOTIFY_WINDOW:
+                    stale += 1
+                    continue
+                await notifications.notify_unblacklisted(self.bot, user.discord_id)
+                await self._announce(user, old_blacklist)
+
+            if stale:
+                logger.info(f"Silently removed {stale} long-expired blacklist entries")
+
+    def stats(self) -> dict[str, int]:
+        """Расписание снятия черных списков для метрик"""
+        return {"scheduled": len(self._heap), "expired": self._expired}
+
+    async def _announce(self, user: User, old_blacklist):
+        channel = self.bot.get_channel(config.CHANNELS["blacklist"])
+        if not channel:
+            return
+
+        embed = discord.Embed(
+            title="Дело закрыто",
+            color=discord.Color.dark_green(),
+            timestamp=datetime.datetime.now(),
+        )
+        embed.add_field(
+            name="Гражданин",
+            value=f"{user.full_name} | {format_game_id(user.static)}",
+            inline=False,
+        )
+        embed.add_field(
+            name="Изначальная причина ЧС",
+            value=old_blacklist.reason,
+            inline=False,
+        )
+        embed.add_field(name="Причина снятия", value="Истек срок", inline=False)
+
+        try:
+            await outbound.run(
+                f"channel:{channel.id}",
+                lambda: channel.send(f"-# ||<@{user.discord_id}>||", embed=embed),
+                Priority.AUDIT,
+            )
+        except discord.HTTPException as e:
+            logger.warning(f"Failed to announce blacklist expiry: {e}")
+
+
+blacklist_sweeper = BlacklistSweeper()
@@ -1,56 +1,168 @@
+import asyncio
 import logging
 
 import discord
 
 from database.models import BottomMessage
+from utils.outbound import Priority, outbound
 
 logger = logging.getLogger(__name__)
 
+DEBOUNCE_DELAY = 2.0  # секунд
+
+
+class BottomMessageRefresher:
+    """
+    Обновляет "закрепленные" сообщения внизу каналов.
+
+    Запросы на обновление одного канала откладываются на DEBOUNCE_DELAY и
+    схлопываются: за серию подач заявок сообщение перевыкладывается один раз,
+    с последними переданными view и embed. Для канала одновременно выполняется
+    не больше одного обновления, поэтому пересекающиеся обновления не
+    оставляют лишних сообщений. Записи BottomMessage после первой загрузки
+    хранятся в памяти.
+    """
+
+    def __init__(self, delay: float = DEBOUNCE_DELAY):
+        self.delay = delay
+        self._records: dict[int, BottomMessage | None] = {}
+        self._pending: dict[int, tuple] = {}
+        self._waiters: dict[int, list[asyncio.Future]] = {}
+        self._tasks: dict[int, asyncio.Task] = {}
+
+    def schedule(
+        self,
+        bot,
+        channel_id: int,
+        view: discord.ui.View,
+        embed: discord.Embed | None = None,
+        force: bool = False,
+    ) -> asyncio.Future:
+        """Запланировать обновление; Future получит новое сообщение"""
+        pending_force = channel_id in self._pending and self._pending[channel_id][3]
+        self._pending[channel_id] = (bot, view, embed, force or pending_force)
+
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.setdefault(channel_id, []).append(future)
+
+        task = self._tasks.get(channel_id)
+        if task is None or task.done():
+            self._tasks[channel_id] = asyncio.create_task(self._run(channel_id))
+        return future
+
+    async def _run(self, channel_id: int):
+        while channel_id in self._pending:
+            await asyncio.sleep(self.delay)
+
+            bot, view, embed, force = self._pending.pop(channel_id)
+            waiters = self._waiters.pop(channel_id, [])
+            try:
+                message = await self._refresh(bot, channel_id, view, embed, force)
+            except Exception as e:
+                logger.error(f"Failed to update bottom message in {channel_id}: {e}")
+                message = None
+
+            for future in waiters:
+                if not future.done():
+                    future.set_result(message)
+
+    async def _get_record(self, channel_id: int) -> BottomMessage | None:
+        if channel_id not in self._records:
+            self._records[channel_id] = await BottomMessage.find_one(
+                BottomMessage.channel_id == channel_id
+            )
+        return self._records[channel_id]
+
+    async def _refresh(
+        self,
+        bot,
+        channel_id: int,
+        view: discord.ui.View,
+        embed: discord.Embed | None,
+        force: bool,
+    ) -> discord.Message | None:
+        channel = bot.get_channel(channel_id)
+        if not channel:
+            logger.warning(f"Channel {channel_id} not found")
+            return None
+
+        bottom_message = await self._get_record(channel_id)
+
+        if (
+            bottom_message
+            and not force
+            and channel.last_message_id == bottom_message.message_id
+        ):
+            # Сообщение и так последнее в канале
+            return channel.get_partial_message(bottom_message.message_id)
+
+        route = f"channel:{channel_id}"
+        if bottom_message:
+            try:
+                await outbound.run(
+                    route,
+                    lambda: bot.http.delete_message(
+                        channel_id, bottom_message.message_id
+                    ),
+                    Priority.CHANNEL,
+                )
+            except discord.NotFound:
+                logger.debug(
+                    f"Bottom message {bottom_message.message_id} already deleted"
+                )
+            except discord.Forbidden:
+                logger.warning(
+                    f"No permission to delete message in channel {channel_id}"
+                )
+            except Exception as e:
+                logger.error(f"Failed to delete bottom message: {e}")
+
+        new_message = await outbound.run(
+            route, lambda: channel.send(embed=embed, view=view), Priority.CHANNEL
+        )
+
+        if bottom_message:
+            bottom_message.message_id = new_message.id
+            await bottom_message.save()
+        else:
+            bottom_message = BottomMessage(
+                channel_id=channel_id, message_id=new_message.id
+            )
+            await bottom_message.create()
+            self._records[channel_id] = bottom_message
+
+        return new_message
+
+
+bottom_messages = BottomMessageRefresher()
+
 
 async def update_bottom_message(
-    bot, channel_id: int, view: discord.ui.View, embed: discord.Embed | None = None
+    bot,
+    channel_id: int,
+    view: discord.ui.View,
+    embed: discord.Embed | None = None,
+    force: bool = False,
+    wait: bool = False,
 ) -> discord.Message | None:
     """
     Обновляет "закрепленное" сообщение внизу канала.
     Удаляет старое сообщение и создает новое с указанным view и embed.
+    Обновление выполняется с задержкой и схлопывается с другими обновлениями
+    этого канала (см. BottomMessageRefresher).
 
     Args:
         bot: Экземпляр бота
         channel_id: ID канала
         view: View для сообщения
         embed: Опциональный Embed для сообщения
+        force: Перевыложить сообщение, даже если оно уже последнее в канале
+        wait: Дождаться обновления
 
     Returns:
-        Новое сообщение или None если канал не найден
+        Новое сообщение, если wait=True, иначе None
     """
-    bottom_message = await BottomMessage.find_one(
-        BottomMessage.channel_id == channel_id
-    )
-
-    if bottom_message:
-        try:
-            await bot.http.delete_message(channel_id, bottom_message.message_id)
-        except discord.NotFound:
-            logger.debug(f"Bottom message {bottom_message.message_id} already deleted")
-        except discord.Forbidden:
-            logger.warning(f"No permission to delete message in channel {channel_id}")
-        except Exception as e:
-            logger.error(f"Failed to delete bottom message: {e}")
-
-    channel = bot.get_channel(channel_id)
-    if not channel:
-        logger.warning(f"Channel {channel_id} not found")
-        return None
-
-    new_message = await channel.send(embed=embed, view=view)
-
-    if bottom_message:
-        bottom_message.message_id = new_message.id
-        await bottom_message.save()
-    else:
-        new_bottom_message = BottomMessage(
-            channel_id=channel_id, message_id=new_message.id
-        )
-        await new_bottom_message.create()
-
-    return new_message
+    future = bottom_messages.schedule(bot, channel_id, view, embed, force)
+    if wait:
+        return await future
+    return None
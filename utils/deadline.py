@@ -0,0 +1,177 @@
+import asyncio
+import functools
+import logging
+import re
+from collections import defaultdict
+
+import discord
+
+logger = logging.getLogger(__name__)
+
+NEAR_MISS_AFTER = 1.5  # секунд без ответа - обработчик записывается как медленный
+AUTO_DEFER_AFTER = 2.2  # секунд без ответа - ответ откладывается автоматически
+
+_ID_PART = re.compile(r"[:_]?\d+")
+_AUTO_DEFER_KEY = "auto_defer"
+_LOCK_KEY = "response_lock"
+
+
+def handler_name(interaction: discord.Interaction) -> str:
+    """Имя обработчика для статистики: команда или custom_id без ID"""
+    data = interaction.data or {}
+    if interaction.type == discord.InteractionType.application_command:
+        return f"command:{data.get('name', '?')}"
+    custom_id = data.get("custom_id", "?")
+    if interaction.type == discord.InteractionType.modal_submit:
+        kind = "modal"
+    else:
+        kind = "item"
+    return f"{kind}:{_ID_PART.sub('', custom_id)}"
+
+
+def auto_defer(**defer_kwargs):
+    """
+    Разрешить трекеру отложить ответ обработчика, если тот не успевает.
+
+    Подходит только обработчикам, которые не открывают модалки и отвечают
+    через edit_response/send_response/defer_response. Параметры передаются в
+    interaction.response.defer(): для кнопок достаточно значений по
+    умолчанию, команда должна явно указать видимость
+    (thinking=True, ephemeral=...).
+    """
+
+    def decorator(callback):
+        @functools.wraps(callback)
+        async def wrapped(*args):
+            args[-1].extras[_AUTO_DEFER_KEY] = defer_kwargs
+            return await callback(*args)
+
+        return wrapped
+
+    return decorator
+
+
+def _response_lock(interaction: discord.Interaction) -> asyncio.Lock:
+    """Общий для трекера и обработчика замок первого ответа"""
+    lock = interaction.extras.get(_LOCK_KEY)
+    if lock is None:
+        lock = interaction.extras[_LOCK_KEY] = asyncio.Lock()
+    return lock
+
+
+async def edit_response(interaction: discord.Interaction, **kwargs):
+    """Изменить сообщение компонента, даже если ответ уже отложен"""
+    async with _response_lock(interaction):
+        if interaction.response.is_done():
+            await interaction.edit_original_response(**kwargs)
+        else:
+            await interaction.response.edit_message(**kwargs)
+
+
+async def send_response(interaction: discord.Interaction, content=None, **kwargs):
+    """
+    Ответить сообщением, даже если ответ уже отложен.
+
+    Returns:
+        WebhookMessage, если ответ ушел followup-сообщением, иначе
+        результат interaction.response.send_message()
+    """
+    async with _response_lock(interaction):
+        if interaction.response.is_done():
+            return await interaction.followup.send(content, **kwargs)
+        return await interaction.response.send_message(content, **kwargs)
+
+
+async def defer_response(interaction: discord.Interaction, **kwargs):
+    """Отложить ответ, если трекер еще не сделал этого сам"""
+    async with _response_lock(interaction):
+        if not interaction.response.is_done():
+            await interaction.response.defer(**kwargs)
+
+
+class DeadlineTracer:
+    """
+    Следит, чтобы каждое взаимодействие получило ответ за 3 секунды.
+
+    Отсчет идет от interaction.created_at. Если обработчик не ответил за
+    near_miss_after секунд, он записывается как медленный. Если не ответил
+    за auto_defer_after и помечен auto_defer, ответ откладывается (defer),
+    а обработчик дальше отвечает через edit_response/send_response.
+    Остальные обработчики только записываются: им может понадобиться
+    модалка или своя видимость ответа.
+    """
+
+    def __init__(
+        self,
+        near_miss_after: float = NEAR_MISS_AFTER,
+        auto_defer_after: float = AUTO_DEFER_AFTER,
+    ):
+        self.near_miss_after = near_miss_after
+        self.auto_defer_after = auto_defer_after
+        self._near_misses: dict[str, int] = defaultdict(int)
+        self._auto_defers: dict[str, int] = defaultdict(int)
+        self._tasks: set[asyncio.Task] = set()
+
+    def track(self, interaction: discord.Interaction):
+        if interaction.type not in (
+            discord.InteractionType.application_command,
+            discord.InteractionType.component,
+            discord.InteractionType.modal_submit,
+        ):
+            return
+
+        task = asyncio.create_task(self._watch(interaction))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    def _age(self, interaction: discord.Interaction) -> float:
+        return (discord.utils.utcnow() - interaction.created_at).total_seconds()
+
+    async def _watch(self, interaction: discord.Interaction):
+        name = handler_name(interaction)
+
+        await asyncio.sleep(max(self.near_miss_after - self._age(interaction), 0))
+        if interaction.response.is_done():
+            return
+        self._near_misses[name] += 1
+        logger.warning(
+            f"Slow interaction handler {name}: "
+            f"no response after {self._age(interaction):.2f}s"
+        )
+
+        await asyncio.sleep(max(self.auto_defer_after - self._age(interaction), 0))
+        if interaction.response.is_done():
+            return
+        await self._auto_defer(interaction, name)
+
+    async def _auto_defer(self, interaction: discord.Interaction, name: str):
+        defer_kwargs = interaction.extras.get(_AUTO_DEFER_KEY)
+        if defer_kwargs is None:
+            logger.warning(
+                f"Handler {name} is about to miss the deadline, auto defer not allowed"
+            )
+            return
+
+        async with _response_lock(interaction):
+            if interaction.response.is_done():
+                return
+            try:
+                await interaction.response.defer(**defer_kwargs)
+            except (discord.InteractionResponded, discord.HTTPException) as e:
+                logger.debug(f"Auto defer skipped for {name}: {e}")
+                return
+
+        self._auto_defers[name] += 1
+        logger.warning(
+            f"Auto deferred {name} after {self._age(interaction):.2f}s without response"
+        )
+
+    def stats(self) -> dict[str, dict[str, int]]:
+        """Медленные обработчики для метрик"""
+        return {
+            "near_misses_by_handler": dict(self._near_misses),
+            "auto_defers_by_handler": dict(self._auto_defers),
+        }
+
+
+deadline_tracer = DeadlineTracer()
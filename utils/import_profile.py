@@ -0,0 +1,90 @@
+"""
+Профиль импорта бота в духе `python -X importtime`.
+
+Импорт выполняется в отдельном процессе с чистым кэшем модулей, поэтому
+замер соответствует холодному старту. Запуск: `python main.py --importtime`;
+бюджет проверяет tests/test_import_budget.py.
+"""
+
+import os
+import subprocess
+import sys
+from dataclasses import dataclass
+
+IMPORT_BUDGET_MS = 1500  # бюджет холодного импорта бота со всеми когами
+REPORT_LIMIT = 25
+
+
+@dataclass
+class ImportRecord:
+    module: str
+    self_us: int
+    cumulative_us: int
+    depth: int
+
+
+def startup_modules() -> list[str]:
+    """Модули, которые импортируются при запуске бота"""
+    cogs = sorted(
+        f"cogs.{file[:-3]}" for file in os.listdir("./cogs") if file.endswith(".py")
+    )
+    return ["bot", *cogs]
+
+
+def measure(modules: list[str]) -> list[ImportRecord]:
+    """Импортировать модули в новом процессе и разобрать вывод -X importtime"""
+    code = "; ".join(f"import {module}" for module in modules)
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Import failed:\n{result.stderr[-2000:]}")
+
+    records = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:") :].split("|", 2)
+        stripped = name.lstrip()
+        records.append(
+            ImportRecord(
+                module=stripped.strip(),
+                self_us=int(self_us),
+                cumulative_us=int(cumulative_us),
+                depth=(len(name) - len(stripped) - 1) // 2,
+            )
+        )
+    return records
+
+
+def total_ms(records: list[ImportRecord]) -> float:
+    """Суммарное время импорта верхнего уровня"""
+    return sum(r.cumulative_us for r in records if r.depth == 0) / 1000
+
+
+def format_report(records: list[ImportRecord], limit: int = REPORT_LIMIT) -> str:
+    lines = [
+        f"Cold import: {total_ms(records):.0f}ms "
+        f"(budget {IMPORT_BUDGET_MS}ms), {len(records)} modules",
+        f"{'cumulative':>12} {'self':>10}  module",
+    ]
+    for record in sorted(records, key=lambda r: r.cumulative_us, reverse=True)[:limit]:
+        lines.append(
+            f"{record.cumulative_us / 1000:>10.1f}ms "
+            f"{record.self_us / 1000:>8.1f}ms  {record.module}"
+        )
+    return "\n".join(lines)
+
+
+def run() -> int:
+    """Вывести отчет; код возврата 1, если бюджет превышен"""
+    records = measure(startup_modules())
+    print(format_report(records))
+
+    total = total_ms(records)
+    if total > IMPORT_BUDGET_MS:
+        print(f"Import budget exceeded by {total - IMPORT_BUDGET_MS:.0f}ms")
+        return 1
+    return 0
@@ -0,0 +1,145 @@
+import atexit
+import contextvars
+import datetime
+import functools
+import json
+import logging
+import logging.handlers
+import queue
+
+import discord
+
+import config
+
+LOG_FILE = "bot.log"
+TEXT_FORMAT = "%(asctime)s [%(levelname)s] %(name)s: %(message)s"
+DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+# Корреляция записей с взаимодействием, в обработке которого они сделаны
+interaction_id_var: contextvars.ContextVar[int | None] = contextvars.ContextVar(
+    "interaction_id", default=None
+)
+user_id_var: contextvars.ContextVar[int | None] = contextvars.ContextVar(
+    "user_id", default=None
+)
+error_id_var: contextvars.ContextVar[str | None] = contextvars.ContextVar(
+    "error_id", default=None
+)
+
+_CONTEXT_FIELDS = {
+    "interaction_id": interaction_id_var,
+    "user_id": user_id_var,
+    "error_id": error_id_var,
+}
+
+
+def bind_interaction(interaction: discord.Interaction):
+    """Привязать последующие записи текущей задачи к взаимодействию"""
+    interaction_id_var.set(interaction.id)
+    user_id_var.set(interaction.user.id if interaction.user else None)
+    error_id_var.set(None)
+
+
+def bound_to_interaction(handler):
+    """
+    Обернуть обработчик, последний аргумент которого - взаимодействие.
+
+    Подходит для interaction_check деревьев и view и для callback
+    DynamicItem: все они выполняются в задаче обработки взаимодействия.
+    """
+    if getattr(handler, "_binds_interaction", False):
+        return handler
+
+    @functools.wraps(handler)
+    async def wrapped(*args):
+        bind_interaction(args[-1])
+        return await handler(*args)
+
+    wrapped._binds_interaction = True
+    return wrapped
+
+
+class _ContextFilter(logging.Filter):
+    """Добавляет к записи поля корреляции (в задаче, которая пишет лог)"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        for field, var in _CONTEXT_FIELDS.items():
+            setattr(record, field, var.get())
+        return True
+
+
+class TextFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        line = super().format(record)
+        context = " ".join(
+            f"{field}={value}"
+            for field in _CONTEXT_FIELDS
+            if (value := getattr(record, field, None)) is not None
+        )
+        return f"{line} [{context}]" if context else line
+
+
+class JsonFormatter(logging.Formatter):
+    """Одна запись - одна строка JSON (traceback уже в message, см. QueueHandler)"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": datetime.datetime.fromtimestamp(record.created).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for field in _CONTEXT_FIELDS:
+            if (value := getattr(record, field, None)) is not None:
+                entry[field] = value
+        return json.dumps(entry, ensure_ascii=False)
+
+
+def _file_handler() -> logging.Handler:
+    if config.LOG_ROTATE_WHEN:
+        return logging.handlers.TimedRotatingFileHandler(
+            LOG_FILE,
+            when=config.LOG_ROTATE_WHEN,
+            backupCount=config.LOG_BACKUP_COUNT,
+            encoding="utf-8",
+        )
+    return logging.handlers.RotatingFileHandler(
+        LOG_FILE,
+        maxBytes=config.LOG_MAX_BYTES,
+        backupCount=config.LOG_BACKUP_COUNT,
+        encoding="utf-8",
+    )
+
+
+def setup_logging(level: int = logging.INFO):
+    """
+    Настроить логирование через очередь.
+
+    Корневой логгер только кладет записи в очередь, запись на диск и в консоль
+    выполняет поток QueueListener - цикл событий на вводе-выводе не блокируется.
+    Файл ротируется по размеру или по времени (config.LOG_ROTATE_WHEN).
+    Оставшиеся в очереди записи дописываются при выходе из процесса.
+    """
+    if config.LOG_FORMAT == "json":
+        formatter = JsonFormatter()
+    else:
+        formatter = TextFormatter(TEXT_FORMAT, datefmt=DATE_FORMAT)
+
+    handlers = [_file_handler(), logging.StreamHandler()]
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    log_queue = queue.SimpleQueue()
+    queue_handler = logging.handlers.QueueHandler(log_queue)
+    queue_handler.addFilter(_ContextFilter())
+
+    root = logging.getLogger()
+    root.handlers.clear()
+    root.addHandler(queue_handler)
+    root.setLevel(level)
+
+    listener = logging.handlers.QueueListener(
+        log_queue, *handlers, respect_handler_level=True
+    )
+    listener.start()
+    atexit.register(listener.stop)
@@ -0,0 +1,111 @@
+import asyncio
+import logging
+
+import discord
+from pymongo import UpdateOne
+
+from database import divisions, user_cache
+from database.models import User
+from utils.roles import get_rank_from_roles
+
+logger = logging.getLogger(__name__)
+
+FLUSH_DELAY = 2.0  # секунд
+
+
+def member_fields(member: discord.Member) -> dict:
+    """Поля User, которые выводятся из ролей участника"""
+    div, pos = divisions.get_user_data(member)
+    return {
+        "division": div.division_id if div else None,
+        "position": pos.name if pos else None,
+        "rank": get_rank_from_roles(member.roles),
+    }
+
+
+class MemberSyncQueue:
+    """
+    Накапливает изменения участников из событий гейтвея и отправляет их в Mongo
+    одним bulk_write после короткой паузы.
+
+    Источник истины - БД, роли в Discord выставляет sync_member. Поэтому из
+    ролей заполняются только пустые поля записи: ручная выдача ролей или
+    пришедшее не по порядку собственное изменение бота не переписывают
+    кадровые данные.
+    """
+
+    def __init__(self, flush_delay: float = FLUSH_DELAY):
+        self.flush_delay = flush_delay
+        self._set: dict[int, dict] = {}
+        self._set_on_insert: dict[int, dict] = {}
+        self._flush_task: asyncio.Task | None = None
+
+    def _schedule_flush(self):
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._flush_later())
+
+    async def _flush_later(self):
+        await asyncio.sleep(self.flush_delay)
+        await self.flush()
+
+    def member_joined(self, member: discord.Member):
+        """Новый участник: создать запись, если ее еще нет"""
+        fields = member_fields(member)
+        fields["pre_inited"] = True
+        self._set_on_insert[member.id] = fields
+        self._schedule_flush()
+
+    def member_updated(self, before: discord.Member, after: discord.Member):
+        """Изменились роли: дополнить запись полями, которые из-за этого поменялись"""
+        if before.roles == after.roles:
+            return
+
+        old_fields = member_fields(before)
+        changed = {
+            key: value
+            for key, value in member_fields(after).items()
+            if old_fields[key] != value
+        }
+        if not changed:
+            return
+
+        self._set.setdefault(after.id, {}).update(changed)
+        self._schedule_flush()
+
+    async def flush(self):
+        to_set, self._set = self._set, {}
+        to_insert, self._set_on_insert = self._set_on_insert, {}
+
+        operations = []
+        for discord_id in to_set.keys() | to_insert.keys():
+            fields = {**to_insert.get(discord_id, {}), **to_set.get(discord_id, {})}
+            # Поле пишется, только если в записи его нет (null или отсутствует)
+            update = [
+                {
+                    "$set": {
+                        key: {"$ifNull": [f"${key}", {"$literal": value}]}
+                        for key, value in fields.items()
+                    }
+                }
+            ]
+            op = UpdateOne(
+                {"discord_id": discord_id}, update, upsert=discord_id in to_insert
+            )
+            operations.append(op)
+
+        if not operations:
+            return
+
+        try:
+            await User.get_pymongo_collection().bulk_write(operations, ordered=False)
+        except Exception as e:
+            logger.error(f"Failed to write {len(operations)} member updates: {e}")
+            return
+
+        # Что именно записалось, зависит от документа - кэш перечитает его
+        for discord_id in to_set.keys() | to_insert.keys():
+            user_cache.invalidate(discord_id)
+        logger.info(f"Synchronized {len(operations)} changed guild members")
+
+
+member_sync = MemberSyncQueue()
@@ -0,0 +1,361 @@
+import asyncio
+import functools
+import logging
+import re
+import time
+
+import aiohttp
+from aiohttp import web
+from pymongo import monitoring
+
+import config
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+LOOP_LAG_INTERVAL = 1.0  # секунд
+LOOP_LAG_UNHEALTHY = 5.0  # секунд: при большей задержке /healthz отвечает 503
+
+_SNOWFLAKE = re.compile(r"\d{15,}")
+_TOKEN_ROUTE = re.compile(r"/(webhooks|interactions)/:id/[^/]+")
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: tuple[str, ...], values: tuple) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values))
+    return "{" + pairs + "}"
+
+
+class Counter:
+    def __init__(self, name: str, documentation: str, labels: tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self._values: dict[tuple, float] = {}
+
+    def inc(self, *label_values, amount: float = 1.0):
+        self._values[label_values] = self._values.get(label_values, 0.0) + amount
+
+    def render(self) -> list[str]:
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} counter",
+        ]
+        for values, value in self._values.items():
+            lines.append(f"{self.name}{_format_labels(self.labels, values)} {value}")
+        return lines
+
+
+class Histogram:
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labels: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self.buckets = buckets
+        # метки -> [накопленные счетчики корзин..., сумма, количество]
+        self._series: dict[tuple, list] = {}
+
+    def observe(self, value: float, *label_values):
+        series = self._series.get(label_values)
+        if series is None:
+            series = self._series[label_values] = [0] * len(self.buckets) + [0.0, 0]
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                series[i] += 1
+        series[-2] += value
+        series[-1] += 1
+
+    def render(self) -> list[str]:
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} histogram",
+        ]
+        for values, series in self._series.items():
+            for bound, count in zip(self.buckets, series):
+                labels = _format_labels((*self.labels, "le"), (*values, bound))
+                lines.append(f"{self.name}_bucket{labels} {count}")
+            labels = _format_labels((*self.labels, "le"), (*values, "+Inf"))
+            lines.append(f"{self.name}_bucket{labels} {series[-1]}")
+            labels = _format_labels(self.labels, values)
+            lines.append(f"{self.name}_sum{labels} {series[-2]}")
+            lines.append(f"{self.name}_count{labels} {series[-1]}")
+        return lines
+
+
+class _MongoListener(monitoring.CommandListener):
+    """Длительность и ошибки команд Mongo по коллекциям"""
+
+    def __init__(self, metrics: "Metrics"):
+        self.metrics = metrics
+        self._collections: dict[tuple, str] = {}
+
+    def started(self, event: monitoring.CommandStartedEvent):
+        collection = event.command.get(event.command_name)
+        self._collections[event.connection_id, event.request_id] = (
+            collection if isinstance(collection, str) else "-"
+        )
+
+    def succeeded(self, event: monitoring.CommandSucceededEvent):
+        collection = self._collections.pop((event.connection_id, event.request_id), "-")
+        self.metrics.mongo_latency.observe(
+            event.duration_micros / 1_000_000, collection, event.command_name
+        )
+
+    def failed(self, event: monitoring.CommandFailedEvent):
+        collection = self._collections.pop((event.connection_id, event.request_id), "-")
+        self.metrics.mongo_latency.observe(
+            event.duration_micros / 1_000_000, collection, event.command_name
+        )
+        self.metrics.mongo_failures.inc(collection, event.command_name)
+
+
+class Metrics:
+    """
+    Метрики бота в текстовом формате Prometheus.
+
+    Сервер на config.METRICS_HOST:config.METRICS_PORT отдает /metrics,
+    /healthz (цикл событий отвечает без больших задержек) и /readyz. Сервер
+    запускается до ожидания аренды лидера, поэтому резервный процесс тоже
+    отвечает на проверки: /readyz сообщает роль процесса и у лидера требует
+    подключения к Discord. Счетчики очередей берутся из stats() компонентов
+    в момент запроса.
+    """
+
+    def __init__(self):
+        self.bot = None
+        self.election = None
+        self.handler_latency = Histogram(
+            "bot_handler_duration_seconds",
+            "Время обработки команд, контекстных меню и кнопок",
+            ("kind", "name", "status"),
+        )
+        self.mongo_latency = Histogram(
+            "bot_mongo_command_duration_seconds",
+            "Длительность команд MongoDB",
+            ("collection", "command"),
+        )
+        self.mongo_failures = Counter(
+            "bot_mongo_command_failures_total",
+            "Неудачные команды MongoDB",
+            ("collection", "command"),
+        )
+        self.rest_latency = Histogram(
+            "bot_discord_rest_duration_seconds",
+            "Длительность запросов к REST API Discord",
+            ("method", "route"),
+        )
+        self.rate_limited = Counter(
+            "bot_discord_rate_limited_total",
+            "Ответы 429 от REST API Discord",
+            ("method", "route"),
+        )
+        self.loop_lag = 0.0
+        self.mongo_listener = _MongoListener(self)
+        self._runner: web.AppRunner | None = None
+        self._lag_task: asyncio.Task | None = None
+
+    # Обработчики взаимодействий
+
+    def instrument_tree(self, tree):
+        """Отмечать начало обработки команд; конец - в observe_command"""
+        original = tree.interaction_check
+
+        async def interaction_check(interaction):
+            interaction.extras["started_at"] = time.perf_counter()
+            return await original(interaction)
+
+        tree.interaction_check = interaction_check
+
+    def observe_command(self, interaction, command, status: str = "ok"):
+        started_at = interaction.extras.get("started_at")
+        if started_at is None or command is None:
+            return
+        from discord import app_commands
+
+        kind = (
+            "context_menu"
+            if isinstance(command, app_commands.ContextMenu)
+            else "command"
+        )
+        self.handler_latency.observe(
+            time.perf_counter() - started_at, kind, command.qualified_name, status
+        )
+
+    def instrument_items(self, *item_classes):
+        """Обернуть callback классов DynamicItem замером времени"""
+        for cls in item_classes:
+            if getattr(cls.callback, "_metrics_wrapped", False):
+                continue
+            cls.callback = self._wrap_callback(cls.callback, cls.__name__)
+
+    def _wrap_callback(self, callback, name: str):
+        @functools.wraps(callback)
+        async def wrapped(item, interaction):
+            started_at = time.perf_counter()
+            status = "ok"
+            try:
+                return await callback(item, interaction)
+            except Exception:
+                status = "error"
+                raise
+            finally:
+                self.handler_latency.observe(
+                    time.perf_counter() - started_at, "dynamic_item", name, status
+                )
+
+        wrapped._metrics_wrapped = True
+        return wrapped
+
+    # REST API Discord
+
+    def http_trace(self) -> aiohttp.TraceConfig:
+        """TraceConfig для HTTP-клиента discord.py (параметр http_trace)"""
+        trace = aiohttp.TraceConfig()
+        trace.on_request_start.append(self._on_request_start)
+        trace.on_request_end.append(self._on_request_end)
+        return trace
+
+    async def _on_request_start(self, session, context, params):
+        context.started_at = time.perf_counter()
+
+    async def _on_request_end(self, session, context, params):
+        url = params.url
+        if url.host and url.host.endswith("discord.com"):
+            route = _TOKEN_ROUTE.sub(r"/\1/:id/:token", _SNOWFLAKE.sub(":id", url.path))
+        else:
+            route = url.host or "-"  # CDN и вложения
+
+        self.rest_latency.observe(
+            time.perf_counter() - context.started_at, params.method, route
+        )
+        if params.response.status == 429:
+            self.rate_limited.inc(params.method, route)
+
+    # HTTP-сервер
+
+    def attach_bot(self, bot):
+        """Бот лидера: с этого момента /readyz проверяет подключение к Discord"""
+        self.bot = bot
+
+    async def start(self, election=None):
+        self.election = election
+        if self._runner is not None:
+            return
+
+        app = web.Application()
+        app.router.add_get("/metrics", self._handle_metrics)
+        app.router.add_get("/healthz", self._handle_healthz)
+        app.router.add_get("/readyz", self._handle_readyz)
+
+        runner = web.AppRunner(app, access_log=None)
+        await runner.setup()
+        try:
+            await web.TCPSite(runner, config.METRICS_HOST, config.METRICS_PORT).start()
+        except OSError as e:
+            logger.error(f"Failed to start metrics server: {e}")
+            await runner.cleanup()
+            return
+
+        self._runner = runner
+        self._lag_task = asyncio.create_task(self._measure_loop_lag())
+        logger.info(
+            f"Metrics server listening on {config.METRICS_HOST}:{config.METRICS_PORT}"
+        )
+
+    async def stop(self):
+        if self._lag_task:
+            self._lag_task.cancel()
+            self._lag_task = None
+        if self._runner:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def _measure_loop_lag(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + LOOP_LAG_INTERVAL
+            await asyncio.sleep(LOOP_LAG_INTERVAL)
+            self.loop_lag = max(loop.time() - expected, 0.0)
+
+    def _component_stats(self) -> list[tuple[str, dict]]:
+        from utils.audit import audit_logger
+        from utils.blacklist_sweeper import blacklist_sweeper
+        from utils.deadline import deadline_tracer
+        from utils.notifications import dm_queue
+        from utils.outbound import outbound
+
+        return [
+            ("outbound", outbound.stats()),
+            ("audit", audit_logger.stats()),
+            ("dm_queue", dm_queue.stats()),
+            ("blacklist_sweeper", blacklist_sweeper.stats()),
+            ("deadline", deadline_tracer.stats()),
+        ]
+
+    def render(self) -> str:
+        lines = []
+        for metric in (
+            self.handler_latency,
+            self.mongo_latency,
+            self.mongo_failures,
+            self.rest_latency,
+            self.rate_limited,
+        ):
+            lines.extend(metric.render())
+
+        gauges = {
+            "bot_event_loop_lag_seconds": self.loop_lag,
+            "bot_leader": int(self._is_leader()),
+            "bot_ready": int(bool(self.bot and self.bot.is_ready())),
+        }
+        if self.bot and self.bot.is_ready():
+            gauges["bot_gateway_latency_seconds"] = self.bot.latency
+        for name, value in gauges.items():
+            lines += [f"# TYPE {name} gauge", f"{name} {value}"]
+
+        for component, stats in self._component_stats():
+            for key, value in stats.items():
+                name = f"bot_{component}_{key}"
+                lines.append(f"# TYPE {name} untyped")
+                if isinstance(value, dict):
+                    label = key.rsplit("_by_", 1)[-1]
+                    for sub_key, sub_value in value.items():
+                        labels = _format_labels((label,), (sub_key,))
+                        lines.append(f"{name}{labels} {sub_value}")
+                else:
+                    lines.append(f"{name} {value}")
+
+        return "\n".join(lines) + "\n"
+
+    async def _handle_metrics(self, request: web.Request) -> web.Response:
+        return web.Response(text=self.render(), content_type="text/plain")
+
+    async def _handle_healthz(self, request: web.Request) -> web.Response:
+        if self.loop_lag > LOOP_LAG_UNHEALTHY:
+            return web.Response(status=503, text=f"loop lag {self.loop_lag:.2f}s")
+        return web.Response(text="ok")
+
+    def _is_leader(self) -> bool:
+        return self.election is None or self.election.is_leader
+
+    async def _handle_readyz(self, request: web.Request) -> web.Response:
+        if not self._is_leader():
+            # Резервный процесс исправен и ждет аренды
+            return web.Response(text="standby")
+        if self.bot and self.bot.is_ready() and not self.bot.is_closed():
+            return web.Response(text="leader")
+        return web.Response(status=503, text="leader, not connected")
+
+
+metrics = Metrics()
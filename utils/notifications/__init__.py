@@ -0,0 +1,48 @@
+"""
+Уведомления в личные сообщения.
+
+Модуль с очередью ЛС и сборщиками уведомлений импортируется лениво - при
+первом обращении (например, notifications.notify_dismissed), а не при
+загрузке view и когов.
+"""
+
+import importlib
+
+# Имя -> модуль, в котором оно объявлено
+_REGISTRY = {
+    name: "utils.notifications.dm"
+    for name in (
+        "DMQueue",
+        "dm_queue",
+        "notify_blacklisted",
+        "notify_demoted",
+        "notify_dismissed",
+        "notify_position_changed",
+        "notify_promoted",
+        "notify_reinstatement_approved",
+        "notify_reinstatement_rejected",
+        "notify_role_approved",
+        "notify_role_rejected",
+        "notify_timeoff_approved",
+        "notify_timeoff_rejected",
+        "notify_transfer_approved",
+        "notify_transfer_rejected",
+        "notify_unblacklisted",
+    )
+}
+
+__all__ = sorted(_REGISTRY)
+
+
+def __getattr__(name: str):
+    module_name = _REGISTRY.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    value = getattr(importlib.import_module(module_name), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_REGISTRY))
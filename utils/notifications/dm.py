@@ -1,27 +1,123 @@
+import asyncio
 import logging
+import time
 from typing import Optional
 
 import discord
 
 from utils.audit import AuditAction, action_emojis
+from utils.outbound import Priority, outbound
 
 logger = logging.getLogger(__name__)
 
 
-async def _send_dm(bot, user_id: int, embed: discord.Embed) -> bool:
-    try:
-        user = await bot.fetch_user(user_id)
-        await user.send(embed=embed)
+CLOSED_DM_TTL = 6 * 60 * 60  # секунд
+MAX_ATTEMPTS = 3
+RETRY_BASE_DELAY = 5.0  # секунд
+
+
+class DMQueue:
+    """
+    Фоновая отправка личных сообщений.
+
+    Сообщения уходят через очередь исходящих действий с низшим приоритетом,
+    вызывающий не ждет отправки. Пользователь берется из кэша клиента,
+    а не через REST. Временные ошибки (429, 5xx) повторяются с
+    экспоненциальной задержкой. Пользователи с закрытыми ЛС запоминаются
+    на CLOSED_DM_TTL, и сообщения им не отправляются.
+    """
+
+    def __init__(self, closed_ttl: float = CLOSED_DM_TTL):
+        self.closed_ttl = closed_ttl
+        self._closed: dict[int, float] = {}  # user_id -> monotonic время истечения
+        self._sent = 0
+        self._dropped = 0
+
+    def is_closed(self, user_id: int) -> bool:
+        expires_at = self._closed.get(user_id)
+        if expires_at is None:
+            return False
+        if time.monotonic() >= expires_at:
+            del self._closed[user_id]
+            return False
         return True
-    except discord.Forbidden:
-        logger.debug(f"Cannot send DM to user {user_id}: DMs are closed")
-        return False
-    except discord.NotFound:
-        logger.debug(f"Cannot send DM to user {user_id}: user not found")
-        return False
-    except discord.HTTPException as e:
-        logger.warning(f"Failed to send DM to user {user_id}: {e}")
-        return False
+
+    def enqueue(self, bot, user_id: int, embed: discord.Embed) -> bool:
+        """
+        Поставить сообщение в очередь.
+
+        Returns:
+            False, если ЛС пользователя известны как закрытые
+        """
+        if self.is_closed(user_id):
+            self._dropped += 1
+            return False
+        self._submit(bot, user_id, embed, 1)
+        return True
+
+    def _submit(self, bot, user_id: int, embed: discord.Embed, attempt: int):
+        future = outbound.submit(
+            "dm", lambda: self._send(bot, user_id, embed), Priority.DM
+        )
+        future.add_done_callback(
+            lambda f: self._on_done(f, bot, user_id, embed, attempt)
+        )
+
+    @staticmethod
+    async def _send(bot, user_id: int, embed: discord.Embed):
+        user = await bot.getch_user(user_id)
+        channel = user.dm_channel or await user.create_dm()
+        await channel.send(embed=embed)
+
+    def _on_done(
+        self,
+        future: asyncio.Future,
+        bot,
+        user_id: int,
+        embed: discord.Embed,
+        attempt: int,
+    ):
+        if future.cancelled():
+            return
+
+        error = future.exception()
+        if error is None:
+            self._sent += 1
+            return
+
+        if isinstance(error, discord.Forbidden):
+            logger.debug(f"Cannot send DM to user {user_id}: DMs are closed")
+            self._closed[user_id] = time.monotonic() + self.closed_ttl
+        elif isinstance(error, discord.NotFound):
+            logger.debug(f"Cannot send DM to user {user_id}: user not found")
+        elif (
+            isinstance(error, discord.HTTPException)
+            and (error.status == 429 or error.status >= 500)
+            and attempt < MAX_ATTEMPTS
+        ):
+            delay = RETRY_BASE_DELAY * 2 ** (attempt - 1)
+            asyncio.get_running_loop().call_later(
+                delay, self._submit, bot, user_id, embed, attempt + 1
+            )
+            return
+        else:
+            logger.warning(f"Failed to send DM to user {user_id}: {error}")
+        self._dropped += 1
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "sent": self._sent,
+            "dropped": self._dropped,
+            "closed_users": len(self._closed),
+        }
+
+
+dm_queue = DMQueue()
+
+
+async def _send_dm(bot, user_id: int, embed: discord.Embed) -> bool:
+    """Поставить личное сообщение в очередь, не дожидаясь отправки"""
+    return dm_queue.enqueue(bot, user_id, embed)
 
 
 async def notify_role_approved(bot, user_id: int, role_type: str) -> bool:
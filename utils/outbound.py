@@ -0,0 +1,195 @@
+import asyncio
+import heapq
+import itertools
+import logging
+from dataclasses import dataclass, field
+from enum import IntEnum
+from typing import Any, Awaitable, Callable, Hashable
+
+logger = logging.getLogger(__name__)
+
+MAX_CONCURRENCY = 4  # одновременных запросов по разным маршрутам
+
+
+class Priority(IntEnum):
+    """Чем меньше значение, тем раньше выполняется действие"""
+
+    INTERACTION = 0  # видимый результат нажатия кнопки или команды
+    MEMBER = 1  # роли и ники
+    CHANNEL = 2  # сообщения в каналы
+    AUDIT = 3  # журнал аудита
+    DM = 4  # личные сообщения
+
+
+@dataclass(order=True)
+class _Job:
+    priority: int
+    seq: int
+    route: str = field(compare=False)
+    factory: Callable[[], Awaitable[Any]] = field(compare=False)
+    future: asyncio.Future = field(compare=False)
+    coalesce_key: Hashable | None = field(compare=False, default=None)
+
+
+class OutboundQueue:
+    """
+    Единая очередь исходящих действий в Discord.
+
+    Каждое действие привязано к маршруту (бакету лимитов Discord: канал,
+    участники гильдии, ЛС). По одному маршруту одновременно выполняется
+    не больше одного запроса, поэтому всплеск нажатий не упирается в 429,
+    а разные маршруты обслуживаются параллельно. Из готовых к выполнению
+    действий первым берется действие с наивысшим приоритетом.
+
+    Если для coalesce_key уже ждет действие, оно заменяется новым: выполнится
+    только последнее, а все вызывающие получат его результат. Приоритет
+    объединенного действия - наивысший из приоритетов вызовов, маршрут
+    остается от первого.
+    """
+
+    def __init__(self, concurrency: int = MAX_CONCURRENCY):
+        self.concurrency = concurrency
+        self._heap: list[_Job] = []
+        self._seq = itertools.count()
+        self._pending: dict[Hashable, _Job] = {}
+        self._busy_routes: set[str] = set()
+        self._wakeup: asyncio.Event | None = None
+        self._workers: list[asyncio.Task] = []
+        self._completed = 0
+        self._failed = 0
+        self._coalesced = 0
+
+    def _ensure_workers(self):
+        if self._wakeup is None:
+            self._wakeup = asyncio.Event()
+        self._workers = [task for task in self._workers if not task.done()]
+        while len(self._workers) < self.concurrency:
+            self._workers.append(asyncio.create_task(self._worker()))
+
+    def start(self):
+        """Запустить обработчики очереди (иначе запустятся при первом действии)"""
+        self._ensure_workers()
+
+    async def close(self):
+        for task in self._workers:
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    def submit(
+        self,
+        route: str,
+        factory: Callable[[], Awaitable[Any]],
+        priority: Priority = Priority.CHANNEL,
+        coalesce_key: Hashable | None = None,
+    ) -> asyncio.Future:
+        """
+        Поставить действие в очередь.
+
+        Args:
+            route: Маршрут лимитов, например f"channel:{id}"
+            factory: Функция без аргументов, создающая корутину запроса
+            priority: Приоритет действия
+            coalesce_key: Ключ, по которому ожидающие действия заменяются новым
+
+        Returns:
+            Future с результатом запроса
+        """
+        self._ensure_workers()
+
+        if coalesce_key is not None and coalesce_key in self._pending:
+            job = self._pending[coalesce_key]
+            job.factory = factory
+            if priority < job.priority:
+                # Ожидающее действие поднимается до приоритета нового вызова
+                job.priority = int(priority)
+                heapq.heapify(self._heap)
+            self._coalesced += 1
+            return job.future
+
+        job = _Job(
+            priority=int(priority),
+            seq=next(self._seq),
+            route=route,
+            factory=factory,
+            future=asyncio.get_running_loop().create_future(),
+            coalesce_key=coalesce_key,
+        )
+        if coalesce_key is not None:
+            self._pending[coalesce_key] = job
+        heapq.heappush(self._heap, job)
+        self._wakeup.set()
+        return job.future
+
+    async def run(
+        self,
+        route: str,
+        factory: Callable[[], Awaitable[Any]],
+        priority: Priority = Priority.CHANNEL,
+        coalesce_key: Hashable | None = None,
+    ) -> Any:
+        """Поставить действие в очередь и дождаться результата"""
+        return await self.submit(route, factory, priority, coalesce_key)
+
+    def _take_ready(self) -> _Job | None:
+        """Достать самое приоритетное действие, маршрут которого свободен"""
+        skipped = []
+        job = None
+        while self._heap:
+            candidate = heapq.heappop(self._heap)
+            if candidate.route in self._busy_routes:
+                skipped.append(candidate)
+                continue
+            job = candidate
+            break
+
+        for candidate in skipped:
+            heapq.heappush(self._heap, candidate)
+        return job
+
+    async def _worker(self):
+        while True:
+            job = self._take_ready()
+            if job is None:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+
+            if job.coalesce_key is not None:
+                self._pending.pop(job.coalesce_key, None)
+            self._busy_routes.add(job.route)
+            try:
+                result = await job.factory()
+            except asyncio.CancelledError:
+                if not job.future.done():
+                    job.future.cancel()
+                raise
+            except Exception as e:
+                self._failed += 1
+                if not job.future.done():
+                    job.future.set_exception(e)
+            else:
+                self._completed += 1
+                if not job.future.done():
+                    job.future.set_result(result)
+            finally:
+                self._busy_routes.discard(job.route)
+                # Маршрут освободился - отложенные по нему действия снова доступны
+                self._wakeup.set()
+
+    def stats(self) -> dict[str, Any]:
+        """Глубина очереди и счетчики для метрик"""
+        by_priority = {priority.name: 0 for priority in Priority}
+        for job in self._heap:
+            by_priority[Priority(job.priority).name] += 1
+        return {
+            "queued": len(self._heap),
+            "queued_by_priority": by_priority,
+            "in_flight": len(self._busy_routes),
+            "completed": self._completed,
+            "failed": self._failed,
+            "coalesced": self._coalesced,
+        }
+
+
+outbound = OutboundQueue()
@@ -1,13 +1,78 @@
+import functools
+from dataclasses import dataclass
+
 import discord
+from discord import app_commands
 
 import config
-from database.models import User
+from database import divisions, user_cache
+from database.models import Division, Position, Privilege
+from utils.deadline import send_response
+from utils.roles import get_exact_rank_from_roles
+
+_EXTRAS_KEY = "authority"
+
+
+@dataclass(frozen=True)
+class Authority:
+    """Звание, подразделение и должность пользователя для проверок прав"""
+
+    rank: int | None
+    division: Division | None = None
+    position: Position | None = None
+    from_roles: bool = False  # получено из ролей участника, без обращения к БД
 
+    @property
+    def privilege(self) -> Privilege:
+        return self.position.privilege if self.position else Privilege.DEFAULT
+
+
+async def resolve(user: discord.User | discord.Member) -> Authority:
+    """
+    Определить права пользователя по ролям участника.
+
+    Звание берется из ролей config.RANK_ROLES, подразделение и должность -
+    из обратных индексов divisions. Роли поддерживает member_sync, поэтому
+    БД читается только при расхождении: не участник гильдии (ЛС) или у
+    участника не ровно одна роль звания.
+    """
+    if isinstance(user, discord.Member):
+        rank = get_exact_rank_from_roles(user.roles)
+        if rank is not None:
+            division, position = divisions.get_user_data(user)
+            return Authority(rank, division, position, from_roles=True)
 
-async def get_user_rank(user_id: int) -> int | None:
-    """Получить ранг пользователя по его Discord ID"""
-    user = await User.find_one(User.discord_id == user_id)
-    return user.rank if user else None
+    user_db = await user_cache.get(user.id)
+    if not user_db:
+        return Authority(None)
+
+    division = divisions.get_division(user_db.division)
+    position = (
+        division.get_position_by_name(user_db.position)
+        if division and user_db.position
+        else None
+    )
+    return Authority(user_db.rank, division, position)
+
+
+async def resolve_interaction(interaction: discord.Interaction) -> Authority:
+    """Права автора взаимодействия; результат запоминается в interaction.extras"""
+    authority = interaction.extras.get(_EXTRAS_KEY)
+    if authority is None:
+        authority = interaction.extras[_EXTRAS_KEY] = await resolve(interaction.user)
+    return authority
+
+
+async def get_user_rank(interaction: discord.Interaction) -> int | None:
+    """Получить ранг автора взаимодействия"""
+    return (await resolve_interaction(interaction)).rank
+
+
+def rank_error_message(min_rank: int) -> str:
+    rank_name = (
+        config.RANKS[min_rank] if min_rank < len(config.RANKS) else f"ранг {min_rank}"
+    )
+    return f"❌ Доступно со звания {rank_name}."
 
 
 async def check_rank(
@@ -24,53 +89,83 @@ async def check_rank(
     Returns:
         True если пользователь имеет достаточный ранг, False иначе
     """
-    user = await User.find_one(User.discord_id == interaction.user.id)
-
-    if not user or (user.rank or 0) < min_rank:
-        if error_message is None:
-            rank_name = (
-                config.RANKS[min_rank]
-                if min_rank < len(config.RANKS)
-                else f"ранг {min_rank}"
-            )
-            error_message = f"❌ Доступно со звания {rank_name}."
-
-        await interaction.response.send_message(error_message, ephemeral=True)
-        return False
+    if await check_rank_silent(interaction, min_rank):
+        return True
 
-    return True
+    await send_response(
+        interaction, error_message or rank_error_message(min_rank), ephemeral=True
+    )
+    return False
 
 
-async def check_rank_silent(user_id: int, min_rank: int) -> bool:
+async def check_rank_silent(interaction: discord.Interaction, min_rank: int) -> bool:
     """
     Проверяет ранг без отправки сообщения об ошибке.
 
     Args:
-        user_id: Discord ID пользователя
+        interaction: Discord Interaction
         min_rank: Минимальный индекс ранга
 
     Returns:
         True если пользователь имеет достаточный ранг
     """
-    user = await User.find_one(User.discord_id == user_id)
-    return user is not None and (user.rank or 0) >= min_rank
+    return ((await get_user_rank(interaction)) or 0) >= min_rank
 
 
-async def is_officer(user_id: int) -> bool:
+async def is_officer(interaction: discord.Interaction) -> bool:
     """Проверка на офицера (Капитан+)"""
-    return await check_rank_silent(user_id, config.RankIndex.CAPTAIN)
+    return await check_rank_silent(interaction, config.RankIndex.CAPTAIN)
 
 
-async def is_senior_officer(user_id: int) -> bool:
+async def is_senior_officer(interaction: discord.Interaction) -> bool:
     """Проверка на старшего офицера (Майор+)"""
-    return await check_rank_silent(user_id, config.RankIndex.MAJOR)
+    return await check_rank_silent(interaction, config.RankIndex.MAJOR)
 
 
-async def is_high_command(user_id: int) -> bool:
+async def is_high_command(interaction: discord.Interaction) -> bool:
     """Проверка на высшее командование (Полковник+)"""
-    return await check_rank_silent(user_id, config.RankIndex.COLONEL)
+    return await check_rank_silent(interaction, config.RankIndex.COLONEL)
 
 
-async def is_general(user_id: int) -> bool:
+async def is_general(interaction: discord.Interaction) -> bool:
     """Проверка на генерала (Генерал-майор+)"""
-    return await check_rank_silent(user_id, config.RankIndex.MAJOR_GENERAL)
+    return await check_rank_silent(interaction, config.RankIndex.MAJOR_GENERAL)
+
+
+class RankRequired(app_commands.CheckFailure):
+    """Недостаточное звание; текст ошибки показывается пользователю"""
+
+
+def require_rank(min_rank: int, error_message: str | None = None):
+    """
+    Проверка звания для команд и контекстных меню.
+
+    При отказе выбрасывает RankRequired, сообщение отправляет on_tree_error.
+    """
+
+    async def predicate(interaction: discord.Interaction) -> bool:
+        if await check_rank_silent(interaction, min_rank):
+            return True
+        raise RankRequired(error_message or rank_error_message(min_rank))
+
+    return app_commands.check(predicate)
+
+
+def rank_required(min_rank: int, error_message: str | None = None):
+    """
+    Проверка звания для callback кнопок, селектов и модалок.
+
+    Взаимодействие - последний аргумент callback. При отказе пользователь
+    получает эфемерное сообщение, а callback не вызывается.
+    """
+
+    def decorator(callback):
+        @functools.wraps(callback)
+        async def wrapped(*args):
+            if not await check_rank(args[-1], min_rank, error_message):
+                return None
+            return await callback(*args)
+
+        return wrapped
+
+    return decorator
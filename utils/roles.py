@@ -1,9 +1,20 @@
+from typing import TYPE_CHECKING, Iterable
+
 import discord
 from discord import Role
 
 import config
 from config import RoleId
 from database import divisions
+from utils.outbound import Priority, outbound
+
+if TYPE_CHECKING:
+    from database.models import User
+
+# ID роли звания -> индекс звания
+_RANK_BY_ROLE = {
+    role_id: config.RANKS.index(rank) for rank, role_id in config.RANK_ROLES.items()
+}
 
 
 def _apply_role_changes(
@@ -12,9 +23,10 @@ def _apply_role_changes(
     target_role_ids: set[int],
 ) -> list[Role]:
     new_roles = [role for role in initial_roles if role.id not in roles_to_remove]
+    present_ids = {role.id for role in new_roles}
 
     for role_id in target_role_ids:
-        if not any(role.id == role_id for role in new_roles):
+        if role_id not in present_ids:
             if initial_roles:
                 guild = initial_roles[0].guild
                 role = guild.get_role(role_id)
@@ -27,17 +39,11 @@ def _apply_role_changes(
 def to_division(
     initial_roles: list[discord.Role], division_id: int | None
 ) -> list[Role]:
-    target_role_id = None
-    other_division_role_ids = set()
-
-    for division in divisions.divisions:
-        if division.division_id == division_id:
-            target_role_id = division.role_id
-        else:
-            other_division_role_ids.add(division.role_id)
-
-    target_ids = {target_role_id} if target_role_id else set()
-    return _apply_role_changes(initial_roles, other_division_role_ids, target_ids)
+    division = divisions.get_division(division_id)
+    target_ids = {division.role_id} if division else set()
+    return _apply_role_changes(
+        initial_roles, divisions.division_role_ids - target_ids, target_ids
+    )
 
 
 def to_rank(initial_roles: list[discord.Role], rank: int | None) -> list[Role]:
@@ -71,26 +77,126 @@ def to_position(
     division_id: int | None,
     position_name: str | None,
 ) -> list[Role]:
-    all_position_role_ids = set()
-    target_role_id = None
-
-    for division in divisions.divisions:
-        if division.positions:
-            for pos in division.positions:
-                all_position_role_ids.add(pos.role_id)
-                if division.division_id == division_id and pos.name == position_name:
-                    target_role_id = pos.role_id
-
+    target_role_id = divisions.get_position_role_id(division_id, position_name)
     target_ids = {target_role_id} if target_role_id else set()
-    return _apply_role_changes(initial_roles, all_position_role_ids, target_ids)
+    return _apply_role_changes(initial_roles, divisions.position_role_ids, target_ids)
 
 
 def get_rank_from_roles(roles: list[discord.Role]) -> int | None:
-    role_ids = {role.id for role in roles}
-
-    for rank, role_id in config.RANK_ROLES.items():
-        if role_id in role_ids:
-            for rank_num, rank_name in enumerate(config.RANKS):
-                if rank_name == rank:
-                    return rank_num
-    return None
+    ranks = [_RANK_BY_ROLE[role.id] for role in roles if role.id in _RANK_BY_ROLE]
+    return min(ranks) if ranks else None
+
+
+def get_exact_rank_from_roles(roles: list[discord.Role]) -> int | None:
+    """Ранг по ролям, только если роль звания ровно одна (иначе None)"""
+    ranks = [_RANK_BY_ROLE[role.id] for role in roles if role.id in _RANK_BY_ROLE]
+    return ranks[0] if len(ranks) == 1 else None
+
+
+def project_member(
+    member: discord.Member,
+    user: "User | None",
+    add_role_ids: Iterable[int] = (),
+    remove_role_ids: Iterable[int] = (),
+    nick: str | None = None,
+) -> tuple[list[Role], str | None]:
+    """
+    Вычислить целевые роли и ник участника по записи в БД.
+
+    Args:
+        member: Участник Discord
+        user: Запись пользователя (None - роли из БД не проецируются)
+        add_role_ids: Дополнительные роли, которые нужно выдать
+        remove_role_ids: Дополнительные роли, которые нужно снять
+        nick: Ник вместо вычисленного из записи
+
+    Returns:
+        Целевой список ролей и ник (None - ник не меняется)
+    """
+    roles = member.roles
+    target_nick = None
+
+    if user is not None:
+        if user.rank is None:
+            roles = [
+                role
+                for role in roles
+                if role.is_default()
+                or role.id in config.EXCLUDED_ROLES
+                or not role.is_assignable()
+            ]
+            full_name = (
+                user.full_name
+                if (len(user.full_name) + 9) <= 32
+                else (user.short_name or "Неизвестный")
+            )
+            target_nick = f"Уволен | {full_name}"
+        else:
+            roles = to_division(roles, user.division)
+            roles = to_rank(roles, user.rank)
+            roles = to_position(roles, user.division, user.position)
+
+            division = divisions.get_division(user.division)
+            # ССО сами выбирают себе ник
+            if not division or division.abbreviation != "ССО":
+                target_nick = user.discord_nick
+
+    add_role_ids = set(add_role_ids)
+    roles = _apply_role_changes(roles, set(remove_role_ids) - add_role_ids, set())
+    present_ids = {role.id for role in roles}
+    for role_id in add_role_ids - present_ids:
+        if role := member.guild.get_role(role_id):
+            roles.append(role)
+
+    if nick is not None:
+        target_nick = nick
+    if target_nick is not None:
+        target_nick = target_nick[:32]
+
+    return roles, target_nick
+
+
+async def sync_member(
+    member: discord.Member,
+    user: "User | None",
+    reason: str | None = None,
+    add_role_ids: Iterable[int] = (),
+    remove_role_ids: Iterable[int] = (),
+    nick: str | None = None,
+) -> bool:
+    """
+    Привести роли и ник участника к состоянию из БД.
+    Сравнивает целевое состояние с закэшированным участником и отправляет
+    не больше одного запроса, только с изменившимися полями.
+    Запрос идет через очередь исходящих действий; разница считается в момент
+    отправки, поэтому несколько синхронизаций одного участника без
+    дополнительных ролей и ника схлопываются в одну.
+
+    Returns:
+        True, если профиль участника был изменен
+    """
+
+    async def apply() -> bool:
+        roles, target_nick = project_member(
+            member, user, add_role_ids, remove_role_ids, nick
+        )
+
+        changes = {}
+        if {role.id for role in roles} != {role.id for role in member.roles}:
+            changes["roles"] = roles
+        if target_nick is not None and target_nick != member.nick:
+            changes["nick"] = target_nick
+
+        if not changes:
+            return False
+
+        await member.edit(**changes, reason=reason)
+        return True
+
+    plain = not add_role_ids and not remove_role_ids and nick is None
+    return await outbound.run(
+        f"member:{member.guild.id}",
+        apply,
+        Priority.MEMBER,
+        coalesce_key=("member", member.id) if plain and user is not None else None,
+    )
@@ -0,0 +1,162 @@
+import datetime
+from collections import Counter
+from dataclasses import dataclass
+
+import config
+from database.models import SupplyRequest
+
+# Предмет -> категория, строится один раз при загрузке
+ITEM_CATEGORIES: dict[str, str] = {
+    item: category for category, items in config.SUPPLY_ITEMS.items() for item in items
+}
+
+_SCOPES = ("item", "category", "total")
+
+
+@dataclass(frozen=True)
+class Quota:
+    scope: str
+    key: str | None
+    limit: int
+    window: datetime.timedelta | None
+    label: str
+
+    @property
+    def counter_key(self) -> tuple[str, str | None]:
+        return self.scope, self.key
+
+    def describe_window(self) -> str:
+        hours = int(self.window.total_seconds()) // 3600
+        if hours > 24 and hours % 24 == 0:
+            return f"{hours // 24} дн."
+        return f"{hours} ч."
+
+
+def _compile(specs: list[dict]) -> tuple[Quota, ...]:
+    quotas = []
+    for spec in specs:
+        scope, key = spec["scope"], spec.get("key")
+        if scope not in _SCOPES:
+            raise ValueError(f"Unknown supply quota scope: {scope}")
+        if scope == "category" and key not in config.SUPPLY_ITEMS:
+            raise ValueError(f"Unknown supply category in quota: {key}")
+        if scope == "item" and key not in ITEM_CATEGORIES:
+            raise ValueError(f"Unknown supply item in quota: {key}")
+
+        window = spec.get("window")
+        quotas.append(
+            Quota(
+                scope=scope,
+                key=None if scope == "total" else key,
+                limit=spec["limit"],
+                window=datetime.timedelta(hours=window) if window else None,
+                label=spec.get("label") or key or "Все предметы",
+            )
+        )
+    return tuple(quotas)
+
+
+QUOTAS = _compile(config.SUPPLY_QUOTAS)
+CART_QUOTAS = tuple(quota for quota in QUOTAS if quota.window is None)
+WINDOW_QUOTAS = tuple(quota for quota in QUOTAS if quota.window is not None)
+WINDOWS = sorted({quota.window for quota in WINDOW_QUOTAS})
+
+
+def tally(items: dict[str, int]) -> Counter:
+    """Количество по ключам квот: предметы, категории и общее"""
+    counts = Counter()
+    for item, qty in items.items():
+        counts["item", item] += qty
+        category = ITEM_CATEGORIES.get(item)
+        if category:
+            counts["category", category] += qty
+        counts["total", None] += qty
+    return counts
+
+
+def check_cart(items: dict[str, int]) -> tuple[bool, str]:
+    """Проверить лимиты на одну заявку"""
+    counts = tally(items)
+    for quota in CART_QUOTAS:
+        if counts[quota.counter_key] > quota.limit:
+            return False, f"Лимит на {quota.label}: максимум {quota.limit} шт."
+    return True, ""
+
+
+async def get_consumed(
+    user_id: int, now: datetime.datetime | None = None
+) -> dict[datetime.timedelta, Counter]:
+    """
+    Получено пользователем по одобренным заявкам за каждый период квот.
+
+    Все периоды считаются одной агрегацией по индексу
+    (user_id, status, reviewed_at): выборка ограничена самым длинным периодом,
+    а суммы по более коротким считаются условно внутри $group.
+    """
+    if not WINDOWS:
+        return {}
+
+    now = now or datetime.datetime.now()
+    since = [now - window for window in WINDOWS]
+    pipeline = [
+        {
+            "$match": {
+                "user_id": user_id,
+                "status": "APPROVED",
+                "reviewed_at": {"$gte": min(since)},
+            }
+        },
+        {
+            "$project": {
+                "_id": 0,
+                "reviewed_at": 1,
+                "items": {"$objectToArray": "$items"},
+            }
+        },
+        {"$unwind": "$items"},
+        {
+            "$group": {
+                "_id": "$items.k",
+                **{
+                    f"w{i}": {
+                        "$sum": {
+                            "$cond": [
+                                {"$gte": ["$reviewed_at", start]},
+                                "$items.v",
+                                0,
+                            ]
+                        }
+                    }
+                    for i, start in enumerate(since)
+                },
+            }
+        },
+    ]
+    rows = await SupplyRequest.aggregate(pipeline).to_list()
+
+    consumed = {}
+    for i, window in enumerate(WINDOWS):
+        consumed[window] = tally({row["_id"]: row[f"w{i}"] for row in rows})
+    return consumed
+
+
+async def check_quotas(user_id: int, items: dict[str, int]) -> tuple[bool, str]:
+    """Проверить заявку по лимитам на одну заявку и по расходу за периоды"""
+    is_valid, error_msg = check_cart(items)
+    if not is_valid or not WINDOW_QUOTAS:
+        return is_valid, error_msg
+
+    counts = tally(items)
+    consumed = await get_consumed(user_id)
+    for quota in WINDOW_QUOTAS:
+        requested = counts[quota.counter_key]
+        if not requested:
+            continue
+        used = consumed[quota.window][quota.counter_key]
+        if used + requested > quota.limit:
+            return (
+                False,
+                f"Лимит на {quota.label}: не более {quota.limit} шт. "
+                f"за {quota.describe_window()} Уже получено: {used} шт.",
+            )
+    return True, ""
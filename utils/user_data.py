@@ -5,30 +5,23 @@ from typing import TYPE_CHECKING
 import discord
 
 import config
+from ui import modals
 from utils.exceptions import StaticInputRequired
 
 if TYPE_CHECKING:
     from database.models import User
 
-statics_cache = {}
-names_cache = {}
-
 
 async def ask_game_id(interaction: discord.Interaction) -> None:
     await interaction.response.send_message("")
 
 
 async def get_full_name(interaction: discord.Interaction) -> str | None:
-    if interaction.user.id in names_cache:
-        return names_cache[interaction.user.id]
-
-    from database.models import User
+    from database import user_cache
 
-    user_info = await User.find_one(User.discord_id == interaction.user.id)
+    user_info = await user_cache.get(interaction.user.id)
     if user_info and user_info.first_name and user_info.last_name:
-        full_name = f"{user_info.first_name} {user_info.last_name}"
-        names_cache[interaction.user.id] = full_name
-        return full_name
+        return f"{user_info.first_name} {user_info.last_name}"
     else:
         return None
 
@@ -118,14 +111,12 @@ def needs_static_input(user: User | None) -> bool:
 
 
 async def get_initiator(interaction: discord.Interaction) -> User | None:
-    from database.models import User
+    from database import user_cache
 
-    initiator = await User.find_one(User.discord_id == interaction.user.id)
+    initiator = await user_cache.get(interaction.user.id)
 
     if needs_static_input(initiator):
-        from ui.modals.static_input import StaticInputModal
-
-        await interaction.response.send_modal(StaticInputModal())
+        await interaction.response.send_modal(modals.StaticInputModal())
         raise StaticInputRequired()
 
     return initiator